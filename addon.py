@@ -1,5 +1,10 @@
 import bpy
+import bmesh
 import json
+import ast
+import codecs
+import struct
+import zlib
 import threading
 import socket
 import time
@@ -9,6 +14,19 @@ from bpy.props import StringProperty, IntProperty
 import traceback
 import os
 import shutil
+import sys
+import math
+import select
+import stat
+import argparse
+import cProfile
+import pstats
+import heapq
+import inspect
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from mathutils import Vector
+from mathutils.kdtree import KDTree
 
 bl_info = {
     "name": "Blender MCP",
@@ -20,120 +38,1171 @@ bl_info = {
     "category": "Interface",
 }
 
+def _bmesh_primitive(build):
+    """Wrap a bmesh builder as a mesh filler with the default UV map."""
+    def fill(mesh):
+        bm = bmesh.new()
+        bm.loops.layers.uv.new("UVMap")
+        build(bm)
+        bm.to_mesh(mesh)
+        bm.free()
+    return fill
+
+
+def _fill_torus(mesh, major_segments=48, minor_segments=12, major_radius=1.0, minor_radius=0.25):
+    verts = []
+    faces = []
+    for i in range(major_segments):
+        theta = 2 * math.pi * i / major_segments
+        for j in range(minor_segments):
+            phi = 2 * math.pi * j / minor_segments
+            radius = major_radius + minor_radius * math.cos(phi)
+            verts.append((radius * math.cos(theta), radius * math.sin(theta), minor_radius * math.sin(phi)))
+            next_i = (i + 1) % major_segments
+            next_j = (j + 1) % minor_segments
+            faces.append((i * minor_segments + j, next_i * minor_segments + j,
+                          next_i * minor_segments + next_j, i * minor_segments + next_j))
+    mesh.from_pydata(verts, [], faces)
+    mesh.uv_layers.new(name="UVMap")
+    mesh.update()
+
+
+# Same dimensions as the matching bpy.ops.mesh.primitive_*_add defaults.
+MESH_PRIMITIVES = {
+    "CUBE": _bmesh_primitive(lambda bm: bmesh.ops.create_cube(bm, size=2.0, calc_uvs=True)),
+    "SPHERE": _bmesh_primitive(lambda bm: bmesh.ops.create_uvsphere(
+        bm, u_segments=32, v_segments=16, radius=1.0, calc_uvs=True)),
+    "CYLINDER": _bmesh_primitive(lambda bm: bmesh.ops.create_cone(
+        bm, cap_ends=True, segments=32, radius1=1.0, radius2=1.0, depth=2.0, calc_uvs=True)),
+    "PLANE": _bmesh_primitive(lambda bm: bmesh.ops.create_grid(
+        bm, x_segments=1, y_segments=1, size=1.0, calc_uvs=True)),
+    "CONE": _bmesh_primitive(lambda bm: bmesh.ops.create_cone(
+        bm, cap_ends=True, segments=32, radius1=1.0, radius2=0.0, depth=2.0, calc_uvs=True)),
+    "TORUS": _fill_torus,
+}
+
+# Per-command trace output; enable with --verbose in background mode or BLENDERMCP_VERBOSE=1.
+VERBOSE = os.environ.get("BLENDERMCP_VERBOSE", "") not in ("", "0")
+
+def log_debug(msg, *args):
+    """Print a trace line only when verbose, formatting lazily."""
+    if VERBOSE:
+        print(msg % args if args else msg)
+
+# Wire codecs. Mirrors blender_open_mcp/codec.py, since the add-on ships as a single file:
+# connections start on unframed JSON and may switch to length-prefixed MessagePack
+# (optionally with large frames compressed) after a "hello" command, using the
+# msgpack package if Blender has it.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MSGPACK_NATIVE = msgpack is not None
+
+_FRAME = struct.Struct(">I")
+_COMPRESSED_FRAME = struct.Struct(">IB")
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(b"\xc0")
+    elif obj is True:
+        out.append(b"\xc3")
+    elif obj is False:
+        out.append(b"\xc2")
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(bytes((obj,)))
+        elif -32 <= obj < 0:
+            out.append(bytes((obj & 0xff,)))
+        elif obj >= 0:
+            for code, fmt, limit in ((0xcc, ">B", 0xff), (0xcd, ">H", 0xffff), (0xce, ">I", 0xffffffff), (0xcf, ">Q", None)):
+                if limit is None or obj <= limit:
+                    out.append(bytes((code,)) + struct.pack(fmt, obj))
+                    break
+        else:
+            for code, fmt, limit in ((0xd0, ">b", -0x80), (0xd1, ">h", -0x8000), (0xd2, ">i", -0x80000000), (0xd3, ">q", None)):
+                if limit is None or obj >= limit:
+                    out.append(bytes((code,)) + struct.pack(fmt, obj))
+                    break
+    elif isinstance(obj, float):
+        out.append(b"\xcb" + struct.pack(">d", obj))
+    elif isinstance(obj, (str, bytes, bytearray)):
+        is_str = isinstance(obj, str)
+        data = obj.encode("utf-8") if is_str else bytes(obj)
+        n = len(data)
+        if is_str and n < 32:
+            out.append(bytes((0xa0 | n,)))
+        elif n <= 0xff:
+            out.append((b"\xd9" if is_str else b"\xc4") + struct.pack(">B", n))
+        elif n <= 0xffff:
+            out.append((b"\xda" if is_str else b"\xc5") + struct.pack(">H", n))
+        else:
+            out.append((b"\xdb" if is_str else b"\xc6") + struct.pack(">I", n))
+        out.append(data)
+    elif isinstance(obj, (list, tuple, dict)):
+        n = len(obj)
+        is_map = isinstance(obj, dict)
+        if n < 16:
+            out.append(bytes(((0x80 if is_map else 0x90) | n,)))
+        elif n <= 0xffff:
+            out.append((b"\xde" if is_map else b"\xdc") + struct.pack(">H", n))
+        else:
+            out.append((b"\xdf" if is_map else b"\xdd") + struct.pack(">I", n))
+        for item in (obj.items() if is_map else obj):
+            if is_map:
+                _pack(item[0], out)
+                _pack(item[1], out)
+            else:
+                _pack(item, out)
+    else:
+        raise TypeError(f"Cannot serialize {type(obj).__name__} with MessagePack")
+
+_SIZED = {0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q", 0xd0: ">b", 0xd1: ">h",
+          0xd2: ">i", 0xd3: ">q", 0xca: ">f", 0xcb: ">d"}
+_LENGTHS = {0xc4: ">B", 0xc5: ">H", 0xc6: ">I", 0xd9: ">B", 0xda: ">H", 0xdb: ">I",
+            0xdc: ">H", 0xdd: ">I", 0xde: ">H", 0xdf: ">I"}
+
+def _unpack(data, pos):
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if code in (0xc0, 0xc2, 0xc3):
+        return {0xc0: None, 0xc2: False, 0xc3: True}[code], pos
+    if 0xa0 <= code <= 0xbf:
+        n, kind = code & 0x1f, "str"
+    elif 0x90 <= code <= 0x9f:
+        n, kind = code & 0x0f, "array"
+    elif 0x80 <= code <= 0x8f:
+        n, kind = code & 0x0f, "map"
+    elif code in _SIZED:
+        return struct.unpack_from(_SIZED[code], data, pos)[0], pos + struct.calcsize(_SIZED[code])
+    elif code in _LENGTHS:
+        n = struct.unpack_from(_LENGTHS[code], data, pos)[0]
+        pos += struct.calcsize(_LENGTHS[code])
+        kind = "bin" if code <= 0xc6 else "str" if code <= 0xdb else "array" if code <= 0xdd else "map"
+    else:
+        raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+    if kind == "bin":
+        return bytes(data[pos:pos + n]), pos + n
+    if kind == "str":
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    items = []
+    for _ in range(n * 2 if kind == "map" else n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return (dict(zip(items[::2], items[1::2])) if kind == "map" else items), pos
+
+def packb(obj):
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = []
+    _pack(obj, out)
+    return b"".join(out)
+
+def unpackb(data):
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return _unpack(data, 0)[0]
+
+class JsonStream:
+    name = "json"
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+
+    def encode(self, message):
+        return json.dumps(message).encode('utf-8')
+
+    def feed(self, data):
+        self._buffer += self._utf8.decode(data)
+        messages = []
+        while self._buffer:
+            try:
+                message, end = self._decoder.raw_decode(self._buffer)
+            except json.JSONDecodeError:
+                break
+            self._buffer = self._buffer[end:].lstrip()
+            messages.append(message)
+        return messages
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+SERIALIZERS = {
+    "json": (lambda message: json.dumps(message).encode('utf-8'), json.loads),
+    "msgpack": (packb, unpackb),
+}
+
+COMPRESSORS = {"zlib": (lambda data: zlib.compress(data, 1), zlib.decompressobj)}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+                           lambda: zstandard.ZstdDecompressor().decompressobj())
+
+class FramedStream:
+    """Length-prefixed frames, with a compressed flag byte once compression is negotiated."""
+
+    def __init__(self, codec="msgpack", compression=None, threshold=16 * 1024):
+        self.name = f"{codec}+{compression}" if compression else codec
+        self._dumps, self._loads = SERIALIZERS[codec]
+        self._compress, self._decompressor = COMPRESSORS[compression] if compression else (None, None)
+        self._header = _COMPRESSED_FRAME if compression else _FRAME
+        self._threshold = threshold
+        self._buffer = bytearray()
+        self._payload = None
+        self._remaining = 0
+        self._inflate = None
+
+    def encode(self, message):
+        payload = self._dumps(message)
+        if self._compress is None:
+            return _FRAME.pack(len(payload)) + payload
+        compressed = len(payload) >= self._threshold
+        if compressed:
+            payload = self._compress(payload)
+        return _COMPRESSED_FRAME.pack(len(payload), compressed) + payload
+
+    def feed(self, data):
+        messages = []
+        view = memoryview(data)
+        while view:
+            if self._payload is None:
+                take = self._header.size - len(self._buffer)
+                self._buffer += view[:take]
+                view = view[take:]
+                if len(self._buffer) < self._header.size:
+                    break
+                header = self._header.unpack(self._buffer)
+                self._buffer.clear()
+                self._remaining = header[0]
+                self._inflate = self._decompressor() if len(header) > 1 and header[1] else None
+                self._payload = bytearray()
+            # Compressed payloads are inflated as they arrive rather than buffered first.
+            chunk = view[:self._remaining]
+            view = view[len(chunk):]
+            self._remaining -= len(chunk)
+            self._payload += self._inflate.decompress(chunk) if self._inflate else chunk
+            if not self._remaining:
+                if self._inflate:
+                    self._payload += self._inflate.flush()
+                messages.append(self._loads(self._payload))
+                self._payload = self._inflate = None
+        return messages
+
+    @property
+    def pending(self):
+        return len(self._buffer) + (len(self._payload) + 1 if self._payload is not None else 0)
+
+def make_stream(codec="json", compression=None, threshold=16 * 1024):
+    if codec == "json" and not compression:
+        return JsonStream()
+    return FramedStream(codec, compression, threshold)
+
+class CommandWatchdog:
+    """One long-lived thread that watches whichever command the main thread is running.
+
+    While a command runs, clients that asked for heartbeats get a small
+    ``{"status": "heartbeat"}`` message every interval, which restarts their
+    idle timeout; Blender operators that hold the GIL (e.g. renders) pause
+    them. Once a command has run past the slow-command threshold, the main
+    thread's stack is sampled so the response can say where the time went.
+    The main thread only flips state under a lock, so cheap commands don't
+    pay for starting and joining threads.
+    """
+
+    def __init__(self, interval=0.005, top=15):
+        self.interval = interval
+        self.top = top
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        # Heartbeat state for the running command
+        self._targets = []
+        self._command_type = ""
+        self._beat_started = 0.0
+        self._beat_every = 0.0
+        self._beat_at = None
+        # Sampling state for the running handler
+        self._thread_id = None
+        self._sample_at = None
+        self.samples = 0
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="blendermcp-watchdog", daemon=True)
+            self._thread.start()
+
+    def begin_heartbeat(self, clients, command_type):
+        targets = [(client, state["heartbeat"], state["stream"]) for client, state in clients.items()
+                   if state.get("heartbeat")]
+        if not targets:
+            return
+        with self._cond:
+            self._targets = targets
+            self._command_type = command_type
+            self._beat_started = time.perf_counter()
+            self._beat_every = min(seconds for _, seconds, _ in targets)
+            self._beat_at = self._beat_started + self._beat_every
+            self._ensure_thread()
+            self._cond.notify()
+
+    def end_heartbeat(self):
+        """Stop heartbeats; none is sent after this returns."""
+        with self._cond:
+            self._targets = []
+            self._beat_at = None
+
+    def begin_sampling(self, threshold):
+        """Sample the calling thread's stack once it has run ``threshold`` seconds from now."""
+        with self._cond:
+            self._thread_id = threading.get_ident()
+            self._sample_at = time.perf_counter() + threshold
+            self.samples = 0
+            self.self_counts = Counter()
+            self.total_counts = Counter()
+            self._ensure_thread()
+            self._cond.notify()
+
+    def end_sampling(self):
+        """Stop sampling; returns a report if the threshold was crossed, else None."""
+        with self._cond:
+            self._sample_at = None
+            if not self.samples:
+                return None
+            return {
+                "samples": self.samples,
+                "interval": self.interval,
+                "top": [{
+                    "function": key,
+                    "self_samples": count,
+                    "total_samples": self.total_counts[key],
+                } for key, count in self.self_counts.most_common(self.top)],
+            }
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._targets, self._beat_at, self._sample_at = [], None, None
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        with self._cond:
+            while not self._stopped:
+                due = [at for at in (self._beat_at, self._sample_at) if at is not None]
+                now = time.perf_counter()
+                if not due or min(due) > now:
+                    # Idle until a command starts, or until the next thing falls due.
+                    self._cond.wait(min(due) - now if due else None)
+                    continue
+                if self._beat_at is not None and self._beat_at <= now:
+                    self._beat(now)
+                    self._beat_at = now + self._beat_every
+                if self._sample_at is not None and self._sample_at <= now:
+                    self._sample()
+                    self._sample_at = now + self.interval
+
+    def _beat(self, now):
+        message = {"status": "heartbeat", "command": self._command_type,
+                   "elapsed": round(now - self._beat_started, 3)}
+        for client, _, stream in self._targets:
+            try:
+                # Skip rather than block (or half-write) on a client that isn't reading.
+                if select.select([], [client], [], 0)[1]:
+                    client.sendall(stream.encode(message))
+            except Exception:
+                pass
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+        self.samples += 1
+        self.self_counts[self._key(frame)] += 1
+        seen = set()
+        while frame is not None:
+            key = self._key(frame)
+            if key not in seen:
+                seen.add(key)
+                self.total_counts[key] += 1
+            frame = frame.f_back
+
+    @staticmethod
+    def _key(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+# Commands that only read the scene; these may run between the steps of a long write.
+READ_COMMANDS = frozenset({
+    "get_scene_info", "get_object_info", "get_objects_info", "get_properties",
+    "query_nearest", "query_radius", "query_bbox", "get_polyhaven_status",
+    "get_polyhaven_categories", "search_polyhaven_assets",
+})
+# Lower runs first; reads default to 0 and writes to 1, so a cheap lookup
+# never waits behind an import or render another client queued earlier.
+COMMAND_PRIORITIES = {
+    "get_polyhaven_categories": 1,
+    "search_polyhaven_assets": 1,
+    "render_scene": 2,
+    "download_polyhaven_asset": 2,
+    "set_texture": 2,
+    "instance_objects": 2,
+    "scatter_on_surface": 2,
+}
+
+def command_priority(command):
+    """The command's own ``priority`` if it has one, else the default for its type."""
+    priority = command.get("priority")
+    if priority is None:
+        cmd_type = command.get("type")
+        priority = COMMAND_PRIORITIES.get(cmd_type, 0 if cmd_type in READ_COMMANDS else 1)
+    return int(priority)
+
+class QueuedCommand:
+    """A received command waiting for its turn on the main thread, or part way through it.
+
+    Handlers written as generators run in steps: each ``yield`` hands the
+    main thread back to the scheduler, and yielding a ``Future`` parks the
+    command until that background work (e.g. a download) completes.
+    """
+
+    __slots__ = ("client", "command", "recv_started_ns", "read", "steps", "waiting_on",
+                 "started_ns", "deadline", "handler_time")
+
+    def __init__(self, client, command, recv_started_ns):
+        self.client = client
+        self.command = command
+        self.recv_started_ns = recv_started_ns
+        self.read = command.get("type") in READ_COMMANDS
+        self.steps = None
+        self.waiting_on = None
+        self.started_ns = None
+        self.deadline = None
+        self.handler_time = 0.0
+
+# Object types whose bound_box describes real geometry; others are indexed as points.
+BOUNDED_TYPES = {'MESH', 'CURVE', 'CURVES', 'SURFACE', 'META', 'FONT', 'VOLUME', 'POINTCLOUD',
+                 'GPENCIL', 'GREASEPENCIL', 'LATTICE', 'ARMATURE'}
+
+def _split_data_path(path):
+    """Split ``a.b["key"]`` into the owner's path, the final attribute or key, and whether it is a key."""
+    if path.endswith("]"):
+        start = path.rindex("[")
+        return path[:start], ast.literal_eval(path[start + 1:-1]), True
+    depth = 0
+    for i in range(len(path) - 1, -1, -1):
+        if path[i] == "]":
+            depth += 1
+        elif path[i] == "[":
+            depth -= 1
+        elif path[i] == "." and depth == 0:
+            return path[:i], path[i + 1:], False
+    return "", path, False
+
+def _to_json(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bpy.types.ID):
+        return value.name
+    if isinstance(value, bpy.types.bpy_struct):
+        return f"<{value.rna_type.identifier}>"
+    try:
+        return [_to_json(item) for item in value]  # Vectors, colours, matrices, arrays
+    except TypeError:
+        return str(value)
+
+class PropertyCache:
+    """Resolved ``(datablock, data_path)`` targets for get/set_properties.
+
+    A path is resolved once to the struct owning its final property plus the
+    attribute name or key, so repeated reads and writes skip the datablock
+    lookup and path parsing. Entries for an ID are dropped whenever the
+    depsgraph reports it changed (other than an object moving), and all of
+    them on undo, redo or file load, since those can free the structs they
+    point to. The depsgraph never reports a removed ID, so every hit also
+    checks the name still refers to the cached datablock.
+    """
+
+    def __init__(self):
+        # (collection, name, path) -> (id block, owner struct, attribute or key, is key, id pointer)
+        self.entries = {}
+        # id pointer -> cache keys resolved through it
+        self.by_id = {}
+
+    def _on_depsgraph_update(self, scene, depsgraph):
+        for update in depsgraph.updates:
+            moved = update.is_updated_transform and not update.is_updated_geometry
+            if moved and isinstance(update.id, bpy.types.Object):
+                continue
+            self._drop(update.id.original.as_pointer())
+
+    def _on_reset(self, *args):
+        self.clear()
+
+    def _handlers(self):
+        return ((bpy.app.handlers.depsgraph_update_post, self._on_depsgraph_update),
+                (bpy.app.handlers.undo_post, self._on_reset),
+                (bpy.app.handlers.redo_post, self._on_reset),
+                (bpy.app.handlers.load_post, self._on_reset))
+
+    def clear(self):
+        self.entries.clear()
+        self.by_id.clear()
+
+    def close(self):
+        self.clear()
+        for handlers, handler in self._handlers():
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def resolve(self, collection, name, path):
+        if self._on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+            # First use, or a newly loaded file cleared our handlers.
+            self.clear()
+            for handlers, handler in self._handlers():
+                if handler not in handlers:
+                    handlers.append(handler)
+        key = (collection, name, path)
+        target = self.entries.get(key)
+        if target is not None:
+            # A removed datablock's name may now belong to a new one; never touch the freed struct.
+            current = getattr(bpy.data, collection).get(name)
+            if current is None or current.as_pointer() != target[4]:
+                self._drop(target[4])
+                target = None
+        if target is None:
+            id_block, owner, attr, is_key = self._resolve(collection, name, path)
+            pointer = id_block.as_pointer()
+            target = self.entries[key] = (id_block, owner, attr, is_key, pointer)
+            self.by_id.setdefault(pointer, set()).add(key)
+        return target[:4]
+
+    def _drop(self, pointer):
+        for key in self.by_id.pop(pointer, ()):
+            self.entries.pop(key, None)
+
+    def forget(self, collection, name, path):
+        self.entries.pop((collection, name, path), None)
+
+    @staticmethod
+    def _resolve(collection, name, path):
+        data = getattr(bpy.data, collection, None) if not collection.startswith("_") else None
+        if not isinstance(data, bpy.types.bpy_prop_collection):
+            raise ValueError(f"Unknown datablock type: {collection}")
+        id_block = data.get(name)
+        if id_block is None:
+            raise ValueError(f"Not found in {collection}: {name}")
+        parent, attr, is_key = _split_data_path(path)
+        try:
+            owner = id_block.path_resolve(parent, False) if parent else id_block
+        except ValueError:
+            raise ValueError(f"Cannot resolve {parent!r} on {collection}[{name!r}]")
+        # Keys may not exist yet: writing one creates a custom property.
+        if not is_key and not hasattr(owner, attr):
+            raise ValueError(f"Cannot resolve {path!r} on {collection}[{name!r}]")
+        return id_block, owner, attr, is_key
+
+# Columns get_objects_info can return: name -> getter(obj, round_vector)
+OBJECT_FIELDS = {
+    "type": lambda obj, vector: obj.type,
+    "location": lambda obj, vector: vector(obj.location),
+    "rotation": lambda obj, vector: vector(obj.rotation_euler),
+    "scale": lambda obj, vector: vector(obj.scale),
+    "world_location": lambda obj, vector: vector(obj.matrix_world.translation),
+    "dimensions": lambda obj, vector: vector(obj.dimensions),
+    "visible": lambda obj, vector: obj.visible_get(),
+    "parent": lambda obj, vector: obj.parent.name if obj.parent else None,
+    "collections": lambda obj, vector: [coll.name for coll in obj.users_collection],
+    "materials": lambda obj, vector: [slot.material.name for slot in obj.material_slots if slot.material],
+    "data": lambda obj, vector: obj.data.name if obj.data else None,
+    "mesh": None,
+    "bounds": None,
+}
+
+class SpatialIndex:
+    """World-space locations and bounds of a scene's objects, for spatial queries.
+
+    Entries are recomputed only for objects the depsgraph reports as changed,
+    and the KD-tree over their locations is rebuilt lazily: until enough
+    objects have changed to make a rebuild worthwhile, queries scan the
+    changed ones linearly alongside the tree. Objects much larger than
+    typical (floors, terrain) are kept out of the tree and always scanned,
+    so bounds queries don't have to widen their search radius for them.
+    """
+
+    def __init__(self):
+        self.scene_name = None
+        # name -> (type, location, bounds min, bounds max, reach from origin to farthest corner)
+        self.entries = {}
+        self.tree = None
+        self.tree_names = []
+        self.tree_reach = 0.0
+        self.large = []
+        # Reported by the depsgraph, not yet re-measured
+        self.dirty = set()
+        # Re-measured since the tree was built, so their tree positions are out of date
+        self.stale = set()
+        self.membership_changed = True
+
+    def _on_depsgraph_update(self, scene, depsgraph):
+        for update in depsgraph.updates:
+            data = update.id
+            if isinstance(data, bpy.types.Object):
+                if data.name not in self.entries:
+                    # New or renamed: diff names on the next sync so an old name is dropped too.
+                    self.membership_changed = True
+                if update.is_updated_transform or update.is_updated_geometry:
+                    self.dirty.add(data.name)
+            elif isinstance(data, (bpy.types.Collection, bpy.types.Scene)):
+                self.membership_changed = True
+
+    def close(self):
+        handlers = bpy.app.handlers.depsgraph_update_post
+        if self._on_depsgraph_update in handlers:
+            handlers.remove(self._on_depsgraph_update)
+
+    def sync(self, scene):
+        handlers = bpy.app.handlers.depsgraph_update_post
+        if self._on_depsgraph_update not in handlers or scene.name != self.scene_name:
+            # First query, a newly loaded file (which clears handlers) or another scene.
+            if self._on_depsgraph_update not in handlers:
+                handlers.append(self._on_depsgraph_update)
+            self.scene_name = scene.name
+            self.entries = {}
+            self.tree = None
+            self.dirty.clear()
+            self.membership_changed = True
+        # Evaluate pending edits so the handler hears about them before we answer.
+        bpy.context.view_layer.update()
+
+        objects = scene.objects
+        if self.membership_changed or len(objects) != len(self.entries):
+            names = set(objects.keys())
+            self.dirty |= names - self.entries.keys()
+            self.dirty |= self.entries.keys() - names
+            self.membership_changed = False
+        for name in self.dirty:
+            obj = objects.get(name)
+            if obj is None:
+                self.entries.pop(name, None)
+            else:
+                self.entries[name] = self._measure(obj)
+        self.stale |= self.dirty
+        self.dirty.clear()
+        if self.tree is None or len(self.stale) > max(256, len(self.entries) // 100):
+            self._rebuild()
+
+    @staticmethod
+    def _measure(obj):
+        matrix = obj.matrix_world
+        location = matrix.translation.copy()
+        if obj.type in BOUNDED_TYPES:
+            corners = [matrix @ Vector(corner) for corner in obj.bound_box]
+        else:
+            corners = [location]
+        low = Vector([min(axis) for axis in zip(*corners)])
+        high = Vector([max(axis) for axis in zip(*corners)])
+        reach = max((corner - location).length for corner in corners)
+        return obj.type, location, low, high, reach
+
+    def _rebuild(self):
+        reaches = sorted(entry[4] for entry in self.entries.values())
+        cutoff = max(1.0, 4 * reaches[int(len(reaches) * 0.9)]) if reaches else 1.0
+        self.large = [name for name, entry in self.entries.items() if entry[4] > cutoff]
+        self.tree_names = [name for name, entry in self.entries.items() if entry[4] <= cutoff]
+        tree = KDTree(len(self.tree_names))
+        for i, name in enumerate(self.tree_names):
+            tree.insert(self.entries[name][1], i)
+        tree.balance()
+        self.tree = tree
+        self.tree_reach = max((self.entries[name][4] for name in self.tree_names), default=0.0)
+        self.stale.clear()
+        log_debug("Rebuilt spatial index: %s objects, %s outside the tree", len(self.tree_names), len(self.large))
+
+    def _tree_hits(self, hits, types):
+        for _, index, distance in hits:
+            name = self.tree_names[index]
+            if name in self.stale:
+                continue
+            entry = self.entries.get(name)
+            if entry is not None and (not types or entry[0] in types):
+                yield name, entry, distance
+
+    def _scanned(self, types):
+        for name in set(self.large) | self.stale:
+            entry = self.entries.get(name)
+            if entry is not None and (not types or entry[0] in types):
+                yield name, entry
+
+    def nearest(self, point, count, types, exclude):
+        found = [((entry[1] - point).length, name) for name, entry in self._scanned(types)
+                 if name != exclude]
+        wanted = count + (exclude is not None)
+        k = wanted + len(self.stale)
+        while True:
+            hits = self.tree.find_n(point, k)
+            candidates = [(distance, name) for name, _, distance in self._tree_hits(hits, types)
+                          if name != exclude]
+            # Filtered-out hits may have crowded out real matches; widen and retry.
+            if len(candidates) >= count or len(hits) < k:
+                break
+            k *= 2
+        return sorted(found + candidates)[:count]
+
+    def within(self, point, radius, types, exclude):
+        found = [((entry[1] - point).length, name) for name, entry in self._scanned(types)
+                 if name != exclude]
+        found = [(distance, name) for distance, name in found if distance <= radius]
+        found += [(distance, name) for name, _, distance
+                  in self._tree_hits(self.tree.find_range(point, radius), types) if name != exclude]
+        return sorted(found)
+
+    def overlapping(self, low, high, types, contained):
+        center = (low + high) / 2
+        search = (high - center).length + self.tree_reach
+        candidates = [(name, entry) for name, entry, _ in self._tree_hits(self.tree.find_range(center, search), types)]
+        candidates += list(self._scanned(types))
+        found = []
+        for name, entry in candidates:
+            if contained:
+                inside = all(low[i] <= entry[2][i] and entry[3][i] <= high[i] for i in range(3))
+            else:
+                inside = all(entry[2][i] <= high[i] and low[i] <= entry[3][i] for i in range(3))
+            if inside:
+                found.append(((entry[1] - center).length, name))
+        return sorted(found)
+
 class BlenderMCPServer:
-    def __init__(self, host='localhost', port=9876):
+    def __init__(self, host='localhost', port=9876, socket_path=None):
         self.host = host
         self.port = port
+        # Listen on this Unix socket instead of TCP; only the owning user may connect.
+        self.socket_path = socket_path or None
         self.running = False
         self.socket = None
-        self.client = None
+        # client socket -> {"stream": wire codec, "recv_started_ns": ..., "heartbeat": interval}
+        self.clients = {}
+        self.max_clients = 16
+        # Heap of (priority, arrival sequence, QueuedCommand) ready to run
         self.command_queue = []
-        self.buffer = b''
+        # Entries parked until the Future their command yielded completes
+        self.blocked_commands = []
+        self.command_seq = 0
+        # A stepped write part way through; other writes wait for it, reads don't.
+        self.write_job = None
+        # Longest the main thread spends on queued commands per timer tick (seconds)
+        self.time_slice = 0.05
+        # Past this many queued commands new ones are refused with a retry-after hint.
+        self.max_queued = 64
+        # Commands each connection may have outstanding, granted in the hello reply.
+        self.client_credits = 8
+        # Moving average of seconds per finished command, for retry-after hints.
+        self.service_time = 0.05
+        # Runs network fetches for stepped handlers off the main thread; created on first use.
+        self.io_pool = None
+        self.recv_started_ns = None
+        # time.perf_counter() by which the running command's client stops waiting
+        self.command_deadline = None
+        # Commands running longer than this (seconds) get a sampled profile; 0 disables.
+        self.slow_command_threshold = 1.0
+        # Heartbeats and slow-command sampling for the running command, on one thread.
+        self.watchdog = CommandWatchdog()
+        # texture_id -> names of its map images in bpy.data.images
+        self.texture_index = {}
+        # image name -> mtime of its source file when last (re)loaded
+        self.texture_mtimes = {}
+        # quantized RGBA -> name of the shared material for that colour
+        self.color_materials = {}
+        self.spatial_index = SpatialIndex()
+        self.property_cache = PropertyCache()
 
     def start(self):
         self.running = True
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
         try:
-            self.socket.bind((self.host, self.port))
-            self.socket.listen(1)
-            self.socket.setblocking(False)
+            self._open_socket()
             bpy.app.timers.register(self._process_server, persistent=True)
-            print(f"BlenderMCP server started on {self.host}:{self.port}")
+            print(f"BlenderMCP server started on {self.address}")
+        except Exception as e:
+            print(f"Failed to start server: {str(e)}")
+            self.stop()
+
+    def serve_forever(self):
+        """Run a blocking event loop, for background mode where timers never fire."""
+        self.running = True
+        try:
+            self._open_socket()
         except Exception as e:
             print(f"Failed to start server: {str(e)}")
             self.stop()
+            return
+        print(f"BlenderMCP server started on {self.address} (background mode)")
+        try:
+            while self.running:
+                interval = self._process_server()
+                waiting_on = [s for s in [self.socket, *self.clients] if s]
+                if waiting_on and interval:
+                    select.select(waiting_on, [], [], interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    @property
+    def address(self):
+        return self.socket_path or f"{self.host}:{self.port}"
+
+    def _open_socket(self):
+        if self.socket_path:
+            if not hasattr(socket, "AF_UNIX"):
+                raise RuntimeError("Unix sockets are not supported on this platform")
+            self._remove_stale_socket(self.socket_path)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Create the socket file owner-only, rather than racing a chmod after bind.
+            old_umask = os.umask(0o177)
+            try:
+                sock.bind(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            finally:
+                os.umask(old_umask)
+            # Only set once bound, so stop() never removes a file this server didn't create.
+            self.socket = sock
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.socket.bind((self.host, self.port))
+        self.socket.listen(self.max_clients)
+        self.socket.setblocking(False)
+
+    @staticmethod
+    def _remove_stale_socket(path):
+        """Remove a socket file left behind by a previous session.
+
+        Refuses to touch anything that isn't a socket, or a socket another
+        server is still listening on.
+        """
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise RuntimeError(f"{path} exists and is not a socket")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(path)  # Nobody is listening; left behind by a previous session
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"Another server is already listening on {path}")
 
     def stop(self):
         self.running = False
+        self.spatial_index.close()
+        self.property_cache.close()
         if hasattr(bpy.app.timers, "unregister"):
             if bpy.app.timers.is_registered(self._process_server):
                 bpy.app.timers.unregister(self._process_server)
         if self.socket:
             self.socket.close()
-        if self.client:
-            self.client.close()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        for client in list(self.clients):
+            self._close_client(client)
+        for _, _, job in self.command_queue + self.blocked_commands:
+            if job.steps is not None:
+                job.steps.close()
+        self.command_queue, self.blocked_commands, self.write_job = [], [], None
+        self.watchdog.stop()
+        if self.io_pool is not None:
+            self.io_pool.shutdown(wait=False)
+            self.io_pool = None
         self.socket = None
-        self.client = None
         print("BlenderMCP server stopped")
 
+    def _close_client(self, client):
+        try:
+            client.close()
+        except Exception:
+            pass
+        self.clients.pop(client, None)
+
+    def _accept_clients(self):
+        while len(self.clients) < self.max_clients:
+            try:
+                client, address = self.socket.accept()
+            except BlockingIOError:
+                return
+            except Exception as e:
+                print(f"Error accepting connection: {str(e)}")
+                return
+            client.setblocking(False)
+            self.clients[client] = {"stream": JsonStream(), "recv_started_ns": None}
+            print(f"Connected to client: {address or self.socket_path}")
+
     def _process_server(self):
         if not self.running:
             return None
 
         try:
-            if not self.client and self.socket:
-                try:
-                    self.client, address = self.socket.accept()
-                    self.client.setblocking(False)
-                    print(f"Connected to client: {address}")
-                except BlockingIOError:
-                    pass
-                except Exception as e:
-                    print(f"Error accepting connection: {str(e)}")
+            if self.socket:
+                self._accept_clients()
 
-            if self.client:
+            for client, state in list(self.clients.items()):
                 try:
                     try:
-                        data = self.client.recv(8192)
-                        if data:
-                            self.buffer += data
-                            try:
-                                command = json.loads(self.buffer.decode('utf-8'))
-                                self.buffer = b''
-                                response = self.execute_command(command)
-                                response_json = json.dumps(response)
-                                self.client.sendall(response_json.encode('utf-8'))
-                            except json.JSONDecodeError:
-                                pass
-                        else:
-                            print("Client disconnected")
-                            self.client.close()
-                            self.client = None
-                            self.buffer = b''
+                        data = client.recv(8192)
                     except BlockingIOError:
-                        pass
-                    except Exception as e:
-                        print(f"Error receiving data: {str(e)}")
-                        self.client.close()
-                        self.client = None
-                        self.buffer = b''
-
+                        continue
+                    if not data:
+                        print("Client disconnected")
+                        self._close_client(client)
+                        continue
+                    if not state["stream"].pending:
+                        state["recv_started_ns"] = time.time_ns()
+                    for command in state["stream"].feed(data):
+                        if command.get("type") == "hello":
+                            # Answered in the current codec; everything after uses the chosen one.
+                            params = command.get("params", {})
+                            codec = self._choose_codec(params)
+                            compression = next((name for name in params.get("compression", [])
+                                                if name in COMPRESSORS), None)
+                            self._send(client, state["stream"].encode({
+                                "status": "success", "result": {"codec": codec, "compression": compression,
+                                                                "credits": self.client_credits}}))
+                            state["stream"] = make_stream(codec, compression,
+                                                          params.get("compress_threshold", 16 * 1024))
+                            continue
+                        if command.get("heartbeat"):
+                            state["heartbeat"] = max(0.1, float(command["heartbeat"]))
+                        self._enqueue(client, state, command)
+                    state["recv_started_ns"] = time.time_ns() if state["stream"].pending else None
                 except Exception as e:
                     print(f"Error with client: {str(e)}")
-                    if self.client:
-                        self.client.close()
-                        self.client = None
-                    self.buffer = b''
+                    self._close_client(client)
 
+            busy = self._run_queue()
+            self._beat_waiting_clients()
         except Exception as e:
             print(f"Server error: {str(e)}")
+            busy = False
+
+        # Come straight back while runnable commands remain; poll sooner while downloads finish.
+        if busy:
+            return 0.0
+        return 0.02 if self.blocked_commands else 0.1
+
+    def _enqueue(self, client, state, command):
+        depth = len(self.command_queue) + len(self.blocked_commands)
+        # An untagged command can't be answered out of turn, so it is only refused
+        # when nothing from its client is ahead of it.
+        if depth >= self.max_queued and ("id" in command or not state.get("queued")):
+            response = {"status": "error", "message": f"Blender is busy ({depth} commands queued)",
+                        "retry_after": round(max(0.5, depth * self.service_time), 1), "queued": depth}
+            if "id" in command:
+                response["id"] = command["id"]
+            self._send(client, state["stream"].encode(response))
+            return
+        priority = command_priority(command)
+        if "id" not in command:
+            # Untagged responses are matched up by order, so this command must not
+            # overtake one the same client sent before it.
+            if state.get("queued"):
+                priority = max(priority, state.get("tail_priority", priority))
+            state["tail_priority"] = priority
+        state["queued"] = state.get("queued", 0) + 1
+        self.command_seq += 1
+        job = QueuedCommand(client, command, state["recv_started_ns"])
+        heapq.heappush(self.command_queue, (priority, self.command_seq, job))
+
+    def _pop_runnable(self):
+        """Remove and return the most urgent entry that may run now, or None."""
+        deferred = []
+        found = None
+        while self.command_queue:
+            entry = heapq.heappop(self.command_queue)
+            job = entry[2]
+            if self.write_job is not None and job is not self.write_job and not job.read:
+                deferred.append(entry)
+                continue
+            found = entry
+            break
+        for entry in deferred:
+            heapq.heappush(self.command_queue, entry)
+        return found
+
+    def _run_queue(self):
+        """Run queued commands, most urgent first, for up to ``time_slice`` seconds.
+
+        Returns True if runnable commands are still waiting.
+        """
+        for entry in [entry for entry in self.blocked_commands if entry[2].waiting_on.done()]:
+            self.blocked_commands.remove(entry)
+            heapq.heappush(self.command_queue, entry)
+        started = time.perf_counter()
+        while time.perf_counter() - started < self.time_slice:
+            entry = self._pop_runnable()
+            if entry is None:
+                return False
+            self._run_entry(entry)
+        return any(self.write_job is None or job is self.write_job or job.read
+                   for _, _, job in self.command_queue)
+
+    def _run_entry(self, entry):
+        job = entry[2]
+        state = self.clients.get(job.client)
+        if state is None:
+            # The client went away; nobody is left to answer.
+            if job.steps is not None:
+                job.steps.close()
+            self._finish(job, None)
+            return
+        self.recv_started_ns = job.recv_started_ns
+        self.watchdog.begin_heartbeat(self.clients, job.command.get("type", ""))
+        try:
+            if job.steps is None:
+                response = self.execute_command(job.command)
+                if response.get("status") == "running":
+                    job.steps = response["steps"]
+                    job.started_ns = response["started_ns"]
+                    job.deadline = response["deadline"]
+                    job.handler_time = response["timing"]["handler"]
+            if job.steps is not None:
+                response = self._resume(job)
+        finally:
+            self.watchdog.end_heartbeat()
+        if response.get("status") == "running":
+            if not job.read:
+                self.write_job = job
+            if isinstance(job.waiting_on, Future) and not job.waiting_on.done():
+                self.blocked_commands.append(entry)
+            else:
+                heapq.heappush(self.command_queue, entry)
+            return
+        self._finish(job, state)
+        self.service_time += 0.2 * ((response.get("timing") or {}).get("handler", 0.0) - self.service_time)
+        response["queued"] = len(self.command_queue) + len(self.blocked_commands)
+        if "id" in job.command:
+            response["id"] = job.command["id"]
+        try:
+            self._send(job.client, state["stream"].encode(response))
+        except Exception as e:
+            print(f"Error with client: {str(e)}")
+            self._close_client(job.client)
+
+    def _finish(self, job, state):
+        if self.write_job is job:
+            self.write_job = None
+        if state is not None:
+            state["queued"] -= 1
+
+    def _resume(self, job):
+        """Run a stepped command up to its next ``yield``, or to completion."""
+        self.command_deadline = job.deadline
+        started = time.perf_counter()
+        try:
+            job.waiting_on = job.steps.send(None)
+            response = {"status": "running"}
+        except StopIteration as stop:
+            response = {"status": "success", "result": stop.value}
+        except Exception as e:
+            print(f"Error in handler: {str(e)}")
+            traceback.print_exc()
+            response = {"status": "error", "message": str(e)}
+        finally:
+            self.command_deadline = None
+            job.handler_time += time.perf_counter() - started
+        if response["status"] != "running":
+            if response["status"] == "success":
+                response["timing"] = {"handler": job.handler_time}
+            self._add_spans(job.command, response, job.recv_started_ns, job.started_ns)
+        return response
+
+    def _beat_waiting_clients(self):
+        """Heartbeat clients whose commands are queued or between steps, as the watchdog does while one runs."""
+        now = time.perf_counter()
+        for client, state in self.clients.items():
+            interval = state.get("heartbeat")
+            if not interval or not state.get("queued") or now - state.get("beat_at", 0.0) < interval:
+                continue
+            state["beat_at"] = now
+            try:
+                if select.select([], [client], [], 0)[1]:
+                    client.sendall(state["stream"].encode({"status": "heartbeat", "queued": state["queued"]}))
+            except Exception:
+                pass
 
-        return 0.1
+    def _send(self, client, data):
+        client.setblocking(True)
+        try:
+            client.sendall(data)
+        finally:
+            client.setblocking(False)
+
+    def _choose_codec(self, params):
+        """Pick the first offered codec this add-on speaks well enough."""
+        for codec in params.get("codecs", ["json"]):
+            if codec == "json":
+                return codec
+            # The pure-Python fallback is slower than json; only use it when asked to.
+            if codec == "msgpack" and (MSGPACK_NATIVE or not params.get("native_only")):
+                return codec
+        return "json"
 
     def execute_command(self, command):
+        started_ns = time.time_ns()
+        # Seconds the client will wait, counted from when the command arrived.
+        budget = command.get("deadline")
+        queued = (started_ns - (self.recv_started_ns or started_ns)) / 1e9
+        deadline = time.perf_counter() + budget - queued if budget else None
+        self.command_deadline = deadline
         try:
-            cmd_type = command.get("type")
-            params = command.get("params", {})
-            if cmd_type in ["create_object", "modify_object", "delete_object"]:
-                if not bpy.context.screen or not bpy.context.screen.areas:
-                    return {"status": "error", "message": "Suitable 'VIEW_3D' context not found for command execution."}
-
-                view_3d_areas = [area for area in bpy.context.screen.areas if area.type == 'VIEW_3D']
-                if not view_3d_areas:
-                    return {"status": "error", "message": "Suitable 'VIEW_3D' context not found for command execution."}
-
-                override = bpy.context.copy()
-                override['area'] = view_3d_areas[0]
-                with bpy.context.temp_override(**override):
-                    return self._execute_command_internal(command)
+            if budget and queued >= budget:
+                # The client has given up; running a stale write now would only surprise it.
+                response = {"status": "error",
+                            "message": f"Deadline of {budget:.1f}s passed before the command started"}
             else:
-                return self._execute_command_internal(command)
+                response = self._execute_command_internal(command)
         except Exception as e:
             print(f"Error executing command: {str(e)}")
             traceback.print_exc()
-            return {"status": "error", "message": str(e)}
+            response = {"status": "error", "message": str(e)}
+        finally:
+            self.command_deadline = None
+        if response.get("status") == "running":
+            # A stepped handler; the scheduler resumes it and adds spans when it ends.
+            response.update(started_ns=started_ns, deadline=deadline)
+        else:
+            self._add_spans(command, response, self.recv_started_ns, started_ns)
+        return response
+
+    def _add_spans(self, command, response, recv_started_ns, started_ns):
+        trace = command.get("trace")
+        if trace:
+            # Reported back so the server can attach them to the caller's trace.
+            response["spans"] = [
+                {"name": "addon.receive", "start_ns": recv_started_ns or started_ns, "end_ns": started_ns},
+                {"name": "addon.execute", "start_ns": started_ns, "end_ns": time.time_ns(),
+                 "attributes": {"command": command.get("type", ""), "status": response.get("status", "")}},
+            ]
 
     def _execute_command_internal(self, command):
         cmd_type = command.get("type")
@@ -147,9 +1216,19 @@ class BlenderMCPServer:
             "create_object": self.create_object,
             "modify_object": self.modify_object,
             "delete_object": self.delete_object,
+            "duplicate_object": self.duplicate_object,
+            "instance_objects": self.instance_objects,
+            "scatter_on_surface": self.scatter_on_surface,
             "get_object_info": self.get_object_info,
+            "get_objects_info": self.get_objects_info,
+            "get_properties": self.get_properties,
+            "set_properties": self.set_properties,
+            "query_nearest": self.query_nearest,
+            "query_radius": self.query_radius,
+            "query_bbox": self.query_bbox,
             "execute_code": self.execute_code,
             "set_material": self.set_material,
+            "set_materials": self.set_materials,
             "get_polyhaven_status": self.get_polyhaven_status,
             "render_scene": self.render_scene
         }
@@ -165,12 +1244,34 @@ class BlenderMCPServer:
 
         handler = handlers.get(cmd_type)
         if handler:
+            profile = command.get("profile")
+            sampling = bool(self.slow_command_threshold and not profile)
             try:
-                print(f"Executing handler for {cmd_type}")
-                result = handler(**params)
-                print(f"Handler execution complete")
-                return {"status": "success", "result": result}
+                log_debug("Executing handler for %s", cmd_type)
+                if sampling:
+                    self.watchdog.begin_sampling(self.slow_command_threshold)
+                started = time.perf_counter()
+                if profile:
+                    result = self._profile_handler(handler, params, profile)
+                else:
+                    result = handler(**params)
+                elapsed = time.perf_counter() - started
+                if inspect.isgenerator(result):
+                    if sampling:
+                        self.watchdog.end_sampling()
+                    return {"status": "running", "steps": result, "timing": {"handler": elapsed}}
+                log_debug("Handler execution complete")
+                response = {"status": "success", "result": result, "timing": {"handler": elapsed}}
+                slow_profile = self.watchdog.end_sampling() if sampling else None
+                sampling = False
+                if slow_profile:
+                    print(f"Slow command {cmd_type} took {elapsed:.2f}s; hottest: "
+                          f"{slow_profile['top'][0]['function'] if slow_profile['top'] else 'n/a'}")
+                    response["slow_profile"] = slow_profile
+                return response
             except Exception as e:
+                if sampling:
+                    self.watchdog.end_sampling()
                 print(f"Error in handler: {str(e)}")
                 traceback.print_exc()
                 return {"status": "error", "message": str(e)}
@@ -178,6 +1279,42 @@ class BlenderMCPServer:
             return {"status": "error", "message": f"Unknown command type: {cmd_type}"}
 
 
+    def _profile_handler(self, handler, params, options):
+        """Run a handler under cProfile and return its result with the hottest functions."""
+        profiler = cProfile.Profile()
+        result = profiler.runcall(handler, **params)
+        if inspect.isgenerator(result):
+            # Profiled commands run their steps back to back.
+            result = profiler.runcall(self._run_to_completion, result)
+        stats = pstats.Stats(profiler)
+        output = options.get("output")
+        if output:
+            output = bpy.path.abspath(output)
+            stats.dump_stats(output)
+        sort = options.get("sort", "cumulative")
+        sort_index = 2 if sort in ("tottime", "time") else 3
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][sort_index], reverse=True)
+        top = [{
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "total_time": round(tottime, 6),
+            "cumulative_time": round(cumtime, 6),
+        } for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:int(options.get("top", 20))]]
+        return {
+            "result": result,
+            "profile": {"sort": sort, "total_time": round(stats.total_tt, 6), "top": top, "output": output},
+        }
+
+    @staticmethod
+    def _run_to_completion(steps):
+        try:
+            while True:
+                waiting_on = next(steps)
+                if isinstance(waiting_on, Future):
+                    waiting_on.exception()  # Waits; the handler sees the outcome itself.
+        except StopIteration as stop:
+            return stop.value
+
     def get_simple_info(self):
         return {
             "blender_version": ".".join(str(v) for v in bpy.app.version),
@@ -187,7 +1324,7 @@ class BlenderMCPServer:
 
     def get_scene_info(self):
         try:
-            print("Getting scene info...")
+            log_debug("Getting scene info...")
             scene_info = {
                 "name": bpy.context.scene.name,
                 "object_count": len(bpy.context.scene.objects),
@@ -208,7 +1345,7 @@ class BlenderMCPServer:
                 }
                 scene_info["objects"].append(obj_info)
 
-            print(f"Scene info collected: {len(scene_info['objects'])} objects")
+            log_debug("Scene info collected: %s objects", len(scene_info['objects']))
             return scene_info
         except Exception as e:
             print(f"Error in get_scene_info: {str(e)}")
@@ -250,31 +1387,29 @@ class BlenderMCPServer:
             return {"error": str(e)}
 
     def create_object(self, type="CUBE", name=None, location=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
-        bpy.ops.object.select_all(action='DESELECT')
-        if type == "CUBE":
-            bpy.ops.mesh.primitive_cube_add(location=location, rotation=rotation, scale=scale)
-        elif type == "SPHERE":
-            bpy.ops.mesh.primitive_uv_sphere_add(location=location, rotation=rotation, scale=scale)
-        elif type == "CYLINDER":
-            bpy.ops.mesh.primitive_cylinder_add(location=location, rotation=rotation, scale=scale)
-        elif type == "PLANE":
-            bpy.ops.mesh.primitive_plane_add(location=location, rotation=rotation, scale=scale)
-        elif type == "CONE":
-            bpy.ops.mesh.primitive_cone_add(location=location, rotation=rotation, scale=scale)
-        elif type == "TORUS":
-            bpy.ops.mesh.primitive_torus_add(location=location, rotation=rotation, scale=scale)
+        # Built through bpy.data rather than bpy.ops so no screen/VIEW_3D context is needed.
+        if type in MESH_PRIMITIVES:
+            mesh = bpy.data.meshes.new(name or type.capitalize())
+            MESH_PRIMITIVES[type](mesh)
+            obj = bpy.data.objects.new(name or type.capitalize(), mesh)
         elif type == "EMPTY":
-            bpy.ops.object.empty_add(location=location, rotation=rotation)
+            obj = bpy.data.objects.new(name or "Empty", None)
         elif type == "CAMERA":
-            bpy.ops.object.camera_add(location=location, rotation=rotation)
+            obj = bpy.data.objects.new(name or "Camera", bpy.data.cameras.new(name or "Camera"))
         elif type == "LIGHT":
-            bpy.ops.object.light_add(type='POINT', location=location, rotation=rotation)
+            obj = bpy.data.objects.new(name or "Light", bpy.data.lights.new(name or "Light", type='POINT'))
         else:
             raise ValueError(f"Unsupported object type: {type}")
 
-        obj = bpy.context.active_object
-        if name:
-            obj.name = name
+        obj.location = location
+        obj.rotation_euler = rotation
+        if obj.type == 'MESH':
+            obj.scale = scale
+        bpy.context.collection.objects.link(obj)
+        for selected in bpy.context.selected_objects:
+            selected.select_set(False)
+        obj.select_set(True)
+        bpy.context.view_layer.objects.active = obj
 
         return {
             "name": obj.name,
@@ -314,12 +1449,120 @@ class BlenderMCPServer:
             raise ValueError(f"Object not found: {name}")
 
         obj_name = obj.name
-        bpy.ops.object.select_all(action='DESELECT')
-        obj.select_set(True)
-        bpy.ops.object.delete()
+        # Cached property targets may point into the object being freed.
+        self.property_cache.clear()
+        bpy.data.objects.remove(obj, do_unlink=True)
 
         return {"deleted": obj_name}
 
+    def _target_collection(self, collection, source, exclude=None):
+        """Collection to put new objects in; never ``exclude`` (the collection being instanced)."""
+        if collection:
+            coll = bpy.data.collections.get(collection)
+            if coll is None:
+                coll = bpy.data.collections.new(collection)
+                bpy.context.scene.collection.children.link(coll)
+            if coll == exclude:
+                raise ValueError(f"Cannot place instances of {collection} inside itself")
+            return coll
+        if source is not None:
+            for coll in source.users_collection:
+                if coll != exclude:
+                    return coll
+        if bpy.context.collection != exclude:
+            return bpy.context.collection
+        return bpy.context.scene.collection
+
+    @staticmethod
+    def _apply_transform(obj, transform):
+        """Set a transform given as a location list or a dict of location/rotation/scale."""
+        if isinstance(transform, dict):
+            if transform.get("location") is not None:
+                obj.location = transform["location"]
+            if transform.get("rotation") is not None:
+                obj.rotation_euler = transform["rotation"]
+            if transform.get("scale") is not None:
+                obj.scale = transform["scale"]
+        else:
+            obj.location = transform
+
+    def duplicate_object(self, name, location=None, rotation=None, scale=None, linked=True, new_name=None):
+        """Copy an object; linked copies share its mesh (or other) data instead of duplicating it."""
+        source = bpy.data.objects.get(name)
+        if not source:
+            raise ValueError(f"Object not found: {name}")
+        obj = source.copy()
+        if new_name:
+            obj.name = new_name
+        if not linked and source.data is not None:
+            obj.data = source.data.copy()
+        self._apply_transform(obj, {"location": location, "rotation": rotation, "scale": scale})
+        self._target_collection(None, source).objects.link(obj)
+        return {
+            "name": obj.name,
+            "data": obj.data.name if obj.data else None,
+            "linked": linked,
+            "location": [obj.location.x, obj.location.y, obj.location.z],
+        }
+
+    def instance_objects(self, source, transforms, mode="linked", collection=None):
+        """Place many copies of ``source`` that share its geometry.
+
+        ``linked`` mode creates linked duplicates of an object; ``collection``
+        mode creates empties instancing a collection (or, given an object, a
+        collection made to hold it). Either way memory stays flat as the count
+        grows, since no mesh data is copied. Large requests run in steps so
+        other clients' reads are answered in between.
+        """
+        if mode not in ("linked", "collection"):
+            raise ValueError(f"Unknown instance mode: {mode} (expected linked or collection)")
+        source_obj = bpy.data.objects.get(source)
+        source_coll = None
+        if mode == "collection":
+            source_coll = bpy.data.collections.get(source)
+            if source_coll is None:
+                if source_obj is None:
+                    raise ValueError(f"Object or collection not found: {source}")
+                source_coll = bpy.data.collections.get(f"{source}_instance_source")
+                # Pick where instances go before the source joins a new wrapper
+                # collection, which users_collection would list first.
+                target = self._target_collection(collection, source_obj, exclude=source_coll)
+                if source_coll is None:
+                    source_coll = bpy.data.collections.new(f"{source}_instance_source")
+                    source_coll.objects.link(source_obj)
+                    # Instances are placed relative to the source object's origin.
+                    source_coll.instance_offset = source_obj.matrix_world.translation
+            else:
+                target = self._target_collection(collection, source_obj, exclude=source_coll)
+        elif source_obj is None:
+            raise ValueError(f"Object not found: {source}")
+        else:
+            target = self._target_collection(collection, source_obj)
+
+        names = []
+        for index, transform in enumerate(transforms):
+            if index and not index % 256:
+                yield  # Let queued reads run between batches.
+            if source_coll is not None:
+                obj = bpy.data.objects.new(f"{source_coll.name}_instance", None)
+                obj.instance_type = 'COLLECTION'
+                obj.instance_collection = source_coll
+            else:
+                obj = source_obj.copy()
+            self._apply_transform(obj, transform)
+            target.objects.link(obj)
+            names.append(obj.name)
+
+        log_debug("Created %s %s instances of %s", len(names), mode, source)
+        return {
+            "created": len(names),
+            "mode": mode,
+            "source": source_coll.name if source_coll is not None else source_obj.name,
+            "data": source_obj.data.name if source_coll is None and source_obj.data else None,
+            "collection": target.name,
+            "names": names,
+        }
+
     def get_object_info(self, name):
         obj = bpy.data.objects.get(name)
         if not obj:
@@ -349,7 +1592,278 @@ class BlenderMCPServer:
 
         return obj_info
 
+    def _select_objects(self, names, types, collection, name_prefix):
+        if names is not None:
+            found = [bpy.data.objects.get(name) for name in names]
+            return [obj for obj in found if obj], [name for name, obj in zip(names, found) if not obj]
+        if collection:
+            coll = bpy.data.collections.get(collection)
+            if coll is None:
+                raise ValueError(f"Collection not found: {collection}")
+            objects = coll.all_objects
+        else:
+            objects = bpy.context.scene.objects
+        return [obj for obj in objects
+                if (not types or obj.type in types)
+                and (not name_prefix or obj.name.startswith(name_prefix))], []
+
+    def get_objects_info(self, names=None, types=None, collection=None, name_prefix=None,
+                         fields=("type", "location"), limit=1000, precision=4):
+        """Selected fields of many objects as one column per field.
+
+        Objects are given by ``names`` or matched by ``types``, ``collection``
+        and ``name_prefix``. Vector fields are ``[x, y, z]`` per object;
+        ``mesh`` adds ``vertices``, ``edges`` and ``polygons`` columns (null
+        for non-meshes); ``bounds`` is the world-space ``[min, max]`` box.
+        """
+        unknown = set(fields) - OBJECT_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} "
+                             f"(expected some of {', '.join(sorted(OBJECT_FIELDS))})")
+        objects, missing = self._select_objects(names, types, collection, name_prefix)
+        total = len(objects)
+        objects = objects[:int(limit)] if limit else objects
+
+        def vector(value):
+            return [round(v, precision) for v in value]
+
+        columns = {}
+        for field in fields:
+            if field == "mesh":
+                counts = [(len(obj.data.vertices), len(obj.data.edges), len(obj.data.polygons))
+                          if obj.type == 'MESH' and obj.data else (None, None, None) for obj in objects]
+                for i, column in enumerate(("vertices", "edges", "polygons")):
+                    columns[column] = [row[i] for row in counts]
+            elif field == "bounds":
+                self.spatial_index.sync(bpy.context.scene)
+                entries = self.spatial_index.entries
+                columns["bounds"] = [[vector(entries[obj.name][2]), vector(entries[obj.name][3])]
+                                     if obj.name in entries else None for obj in objects]
+            else:
+                getter = OBJECT_FIELDS[field]
+                columns[field] = [getter(obj, vector) for obj in objects]
+
+        return {
+            "count": len(objects),
+            "total": total,
+            "names": [obj.name for obj in objects],
+            "columns": columns,
+            "missing": missing,
+        }
+
+    def _query_point(self, location, object_name):
+        """Resolve a query centre given as coordinates or as an object's location."""
+        self.spatial_index.sync(bpy.context.scene)
+        if object_name is not None:
+            entry = self.spatial_index.entries.get(object_name)
+            if entry is None:
+                raise ValueError(f"Object not found: {object_name}")
+            return entry[1]
+        if location is None:
+            raise ValueError("Either location or object_name is required")
+        return Vector(location)
+
+    def _query_results(self, found, limit, bounds=False):
+        results = []
+        for distance, name in found[:limit]:
+            entry = self.spatial_index.entries[name]
+            result = {"name": name, "type": entry[0],
+                      "location": [round(v, 4) for v in entry[1]], "distance": round(distance, 4)}
+            if bounds:
+                result["bounds"] = [[round(v, 4) for v in entry[2]], [round(v, 4) for v in entry[3]]]
+            results.append(result)
+        return {"objects": results, "total": len(found)}
+
+    def query_nearest(self, location=None, object_name=None, count=1, types=None):
+        """The ``count`` objects whose origins are closest to a point or another object."""
+        point = self._query_point(location, object_name)
+        found = self.spatial_index.nearest(point, int(count), set(types or ()), object_name)
+        return self._query_results(found, int(count))
+
+    def query_radius(self, radius, location=None, object_name=None, types=None, limit=100):
+        """Objects whose origins lie within ``radius`` of a point or another object, nearest first."""
+        point = self._query_point(location, object_name)
+        found = self.spatial_index.within(point, float(radius), set(types or ()), object_name)
+        return self._query_results(found, int(limit))
+
+    def query_bbox(self, min, max, types=None, contained=False, limit=100):
+        """Objects whose world-space bounds overlap (or, with ``contained``, lie inside) a box."""
+        self.spatial_index.sync(bpy.context.scene)
+        found = self.spatial_index.overlapping(Vector(min), Vector(max), set(types or ()), contained)
+        return self._query_results(found, int(limit), bounds=True)
+
+    @staticmethod
+    def _node_socket(sockets, name, socket_type):
+        """Sockets like Random Value's "Min" exist once per data type; pick the one in use."""
+        return next(socket for socket in sockets if socket.name == name and socket.type == socket_type)
+
+    @staticmethod
+    def _new_geometry_group(name):
+        group = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+        if hasattr(group, "interface"):
+            group.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+            group.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+        else:  # Blender < 4.0
+            group.inputs.new('NodeSocketGeometry', "Geometry")
+            group.outputs.new('NodeSocketGeometry', "Geometry")
+        return group
+
+    def _build_scatter_group(self, name):
+        group = self._new_geometry_group(name)
+        nodes, links = group.nodes, group.links
+        group_in = nodes.new('NodeGroupInput')
+        group_out = nodes.new('NodeGroupOutput')
+        distribute = nodes.new('GeometryNodeDistributePointsOnFaces')
+        distribute.name = "Distribute"
+        instance = nodes.new('GeometryNodeInstanceOnPoints')
+        instance.name = "Instance"
+        object_info = nodes.new('GeometryNodeObjectInfo')
+        object_info.name = "Object Info"
+        object_info.transform_space = 'ORIGINAL'
+        collection_info = nodes.new('GeometryNodeCollectionInfo')
+        collection_info.name = "Collection Info"
+        collection_info.inputs["Separate Children"].default_value = True
+        collection_info.inputs["Reset Children"].default_value = True
+        scale = nodes.new('FunctionNodeRandomValue')
+        scale.name = "Scale"
+        scale.data_type = 'FLOAT'
+        yaw = nodes.new('FunctionNodeRandomValue')
+        yaw.name = "Yaw"
+        yaw.data_type = 'FLOAT_VECTOR'
+        self._node_socket(yaw.inputs, "Max", 'VECTOR').default_value = (0.0, 0.0, 2 * math.pi)
+        join = nodes.new('GeometryNodeJoinGeometry')
+
+        links.new(group_in.outputs["Geometry"], distribute.inputs["Mesh"])
+        links.new(distribute.outputs["Points"], instance.inputs["Points"])
+        links.new(self._node_socket(scale.outputs, "Value", 'VALUE'), instance.inputs["Scale"])
+        links.new(group_in.outputs["Geometry"], join.inputs["Geometry"])
+        links.new(instance.outputs["Instances"], join.inputs["Geometry"])
+        links.new(join.outputs["Geometry"], group_out.inputs["Geometry"])
+        return group
+
+    def scatter_on_surface(self, target, instance, density=10.0, seed=0, scale_min=1.0, scale_max=1.0,
+                           align_to_normal=False, name="MCP_Scatter"):
+        """Scatter instances of an object or collection over a mesh with a Geometry Nodes modifier.
+
+        Points are distributed and instanced natively when the modifier is
+        evaluated, so millions of instances cost one command rather than
+        millions of objects. Calling again with the same ``name`` updates the
+        existing modifier in place.
+        """
+        obj = bpy.data.objects.get(target)
+        if not obj or obj.type != 'MESH':
+            raise ValueError(f"Mesh object not found: {target}")
+        source_obj = bpy.data.objects.get(instance)
+        source_coll = None if source_obj else bpy.data.collections.get(instance)
+        if source_obj is None and source_coll is None:
+            raise ValueError(f"Object or collection not found: {instance}")
+        if source_obj == obj:
+            raise ValueError("An object cannot be scattered on itself")
+
+        modifier = obj.modifiers.get(name)
+        if modifier is None or modifier.type != 'NODES':
+            modifier = obj.modifiers.new(name, 'NODES')
+        if modifier.node_group is None:
+            modifier.node_group = self._build_scatter_group(f"{name}_{obj.name}")
+        nodes, links = modifier.node_group.nodes, modifier.node_group.links
+
+        distribute = nodes["Distribute"]
+        distribute.inputs["Density"].default_value = float(density)
+        distribute.inputs["Seed"].default_value = int(seed)
+        scale = nodes["Scale"]
+        self._node_socket(scale.inputs, "Min", 'VALUE').default_value = float(scale_min)
+        self._node_socket(scale.inputs, "Max", 'VALUE').default_value = float(scale_max)
+        scale.inputs["Seed"].default_value = int(seed)
+        nodes["Yaw"].inputs["Seed"].default_value = int(seed) + 1
+
+        instance_node = nodes["Instance"]
+        if source_obj is not None:
+            nodes["Object Info"].inputs["Object"].default_value = source_obj
+            links.new(nodes["Object Info"].outputs["Geometry"], instance_node.inputs["Instance"])
+        else:
+            nodes["Collection Info"].inputs["Collection"].default_value = source_coll
+            links.new(nodes["Collection Info"].outputs["Instances"], instance_node.inputs["Instance"])
+        instance_node.inputs["Pick Instance"].default_value = source_coll is not None
+        if align_to_normal:
+            links.new(distribute.outputs["Rotation"], instance_node.inputs["Rotation"])
+        else:
+            links.new(self._node_socket(nodes["Yaw"].outputs, "Value", 'VECTOR'), instance_node.inputs["Rotation"])
+
+        area = sum(polygon.area for polygon in obj.data.polygons)
+        return {
+            "target": obj.name,
+            "modifier": modifier.name,
+            "node_group": modifier.node_group.name,
+            "instance": instance,
+            "density": density,
+            "seed": seed,
+            "scale_range": [scale_min, scale_max],
+            # Density is per unit of the mesh's local area, before object scale.
+            "estimated_instances": int(area * density),
+        }
+
+    def _property_entry(self, entry):
+        """``(collection, name, path)`` for an entry; ``scene`` means the current scene."""
+        collection = entry.get("datablock", "objects")
+        name = entry.get("name")
+        if collection == "scene":
+            collection, name = "scenes", bpy.context.scene.name
+        if not name or not entry.get("path"):
+            raise ValueError("Each entry needs a datablock name and a path")
+        return collection, name, entry["path"]
+
+    def _access_property(self, entry, value=None, write=False):
+        collection, name, path = self._property_entry(entry)
+        for attempt in range(2):
+            _, owner, attr, is_key = self.property_cache.resolve(collection, name, path)
+            try:
+                if write:
+                    if is_key:
+                        owner[attr] = value
+                    else:
+                        setattr(owner, attr, value)
+                return owner[attr] if is_key else getattr(owner, attr)
+            except (KeyError, IndexError):
+                raise ValueError(f"Cannot resolve {path!r} on {collection}[{name!r}]")
+            except ReferenceError:
+                # The cached struct was freed (e.g. its datablock was removed); look it up again.
+                self.property_cache.forget(collection, name, path)
+                if attempt:
+                    raise
+
+    def get_properties(self, entries):
+        """Read many RNA properties, each given as ``{"datablock", "name", "path"}``.
+
+        ``datablock`` is a ``bpy.data`` collection such as ``lights`` or
+        ``cameras`` (default ``objects``), or ``scene`` for the current scene;
+        ``path`` is relative to it, e.g. ``energy``, ``render.resolution_x``
+        or ``modifiers["Subdivision"].levels``.
+        """
+        values = []
+        errors = []
+        for i, entry in enumerate(entries):
+            try:
+                values.append(_to_json(self._access_property(entry)))
+            except Exception as e:
+                values.append(None)
+                errors.append({"index": i, "path": entry.get("path"), "message": str(e)})
+        return {"values": values, "errors": errors}
+
+    def set_properties(self, entries):
+        """Write many RNA properties; entries are as for get_properties plus ``value``."""
+        updated = 0
+        errors = []
+        for i, entry in enumerate(entries):
+            try:
+                self._access_property(entry, entry.get("value"), write=True)
+                updated += 1
+            except Exception as e:
+                errors.append({"index": i, "path": entry.get("path"), "message": str(e)})
+        return {"updated": updated, "errors": errors}
+
     def execute_code(self, code):
+        # Arbitrary code can free structs the property cache points to.
+        self.property_cache.clear()
         try:
             namespace = {"bpy": bpy}
             exec(code, namespace)
@@ -366,46 +1880,11 @@ class BlenderMCPServer:
 
             if not hasattr(obj, 'data') or not hasattr(obj.data, 'materials'):
                 raise ValueError(f"Object {object_name} cannot accept materials")
-            if material_name:
-                mat = bpy.data.materials.get(material_name)
-                if not mat and create_if_missing:
-                    mat = bpy.data.materials.new(name=material_name)
-                    print(f"Created new material: {material_name}")
-            else:
-                mat_name = f"{object_name}_material"
-                mat = bpy.data.materials.get(mat_name)
-                if not mat:
-                    mat = bpy.data.materials.new(name=mat_name)
-                material_name = mat_name
-                print(f"Using material: {mat_name}")
-
-            if mat:
-                if not mat.use_nodes:
-                    mat.use_nodes = True
-                principled = mat.node_tree.nodes.get('Principled BSDF')
-                if not principled:
-                    principled = mat.node_tree.nodes.new('ShaderNodeBsdfPrincipled')
-                    output = mat.node_tree.nodes.get('Material Output')
-                    if not output:
-                        output = mat.node_tree.nodes.new('ShaderNodeOutputMaterial')
-                    if not principled.outputs[0].links:
-                         mat.node_tree.links.new(principled.outputs[0], output.inputs[0])
-
-                if color and len(color) >= 3:
-                    principled.inputs['Base Color'].default_value = (
-                        color[0],
-                        color[1],
-                        color[2],
-                        1.0 if len(color) < 4 else color[3]
-                    )
-                    print(f"Set material color to {color}")
-
+            mat = self._resolve_material(object_name, material_name, create_if_missing, color)
             if mat:
-                if not obj.data.materials:
-                    obj.data.materials.append(mat)
-                else:
-                    obj.data.materials[0] = mat
-                print(f"Assigned material {mat.name} to object {object_name}")
+                material_name = mat.name
+                self._assign_material(obj, mat)
+                log_debug("Assigned material %s to object %s", mat.name, object_name)
                 return {
                     "status": "success",
                     "object": object_name,
@@ -423,13 +1902,112 @@ class BlenderMCPServer:
                 "object": object_name,
                 "material": material_name if 'material_name' in locals() else None
             }
+
+    def set_materials(self, assignments, create_if_missing=True):
+        """Assign materials to many objects in one pass.
+
+        Each assignment is a dict with ``object_name`` and optionally
+        ``material_name`` and/or ``color``. Colour-only assignments share one
+        cached material per quantized colour.
+        """
+        assigned = 0
+        materials = {}
+        errors = []
+        for assignment in assignments:
+            object_name = assignment.get("object_name")
+            try:
+                obj = bpy.data.objects.get(object_name)
+                if not obj:
+                    raise ValueError(f"Object not found: {object_name}")
+                if not hasattr(obj, 'data') or not hasattr(obj.data, 'materials'):
+                    raise ValueError(f"Object {object_name} cannot accept materials")
+                mat = self._resolve_material(object_name, assignment.get("material_name"),
+                                             create_if_missing, assignment.get("color"))
+                if not mat:
+                    raise ValueError(f"Failed to create or find material: {assignment.get('material_name')}")
+                self._assign_material(obj, mat)
+                materials[mat.name] = materials.get(mat.name, 0) + 1
+                assigned += 1
+            except Exception as e:
+                errors.append({"object": object_name, "message": str(e)})
+
+        log_debug("Assigned %s materials to %s objects", len(materials), assigned)
+        return {
+            "assigned": assigned,
+            "materials": materials,
+            "errors": errors,
+        }
+
+    def _resolve_material(self, object_name, material_name, create_if_missing, color):
+        """Find or create the material for a set_material(s) request."""
+        if material_name:
+            mat = bpy.data.materials.get(material_name)
+            if not mat and create_if_missing:
+                mat = bpy.data.materials.new(name=material_name)
+                log_debug("Created new material: %s", material_name)
+            if mat and color and len(color) >= 3:
+                self._set_base_color(mat, color)
+            return mat
+        if color and len(color) >= 3:
+            return self._get_color_material(color)
+        mat_name = f"{object_name}_material"
+        mat = bpy.data.materials.get(mat_name)
+        if not mat:
+            mat = bpy.data.materials.new(name=mat_name)
+            self._ensure_principled(mat)
+        return mat
+
+    def _get_color_material(self, color):
+        """Return the shared material for a colour quantized to 8 bits per channel."""
+        rgba = (color[0], color[1], color[2], 1.0 if len(color) < 4 else color[3])
+        key = tuple(max(0, min(255, int(round(c * 255)))) for c in rgba)
+        mat = bpy.data.materials.get(self.color_materials.get(key, ""))
+        if mat:
+            return mat
+        mat_name = "MCP_Color_" + "".join(f"{c:02x}" for c in key)
+        mat = bpy.data.materials.get(mat_name)
+        if not mat:
+            mat = bpy.data.materials.new(name=mat_name)
+            self._set_base_color(mat, [c / 255 for c in key])
+            log_debug("Created shared color material: %s", mat_name)
+        self.color_materials[key] = mat.name
+        return mat
+
+    def _ensure_principled(self, mat):
+        if not mat.use_nodes:
+            mat.use_nodes = True
+        principled = mat.node_tree.nodes.get('Principled BSDF')
+        if not principled:
+            principled = mat.node_tree.nodes.new('ShaderNodeBsdfPrincipled')
+            output = mat.node_tree.nodes.get('Material Output')
+            if not output:
+                output = mat.node_tree.nodes.new('ShaderNodeOutputMaterial')
+            if not principled.outputs[0].links:
+                mat.node_tree.links.new(principled.outputs[0], output.inputs[0])
+        return principled
+
+    def _set_base_color(self, mat, color):
+        principled = self._ensure_principled(mat)
+        value = (color[0], color[1], color[2], 1.0 if len(color) < 4 else color[3])
+        socket_input = principled.inputs['Base Color']
+        # Writing an unchanged value still triggers a shader recompile.
+        if any(abs(a - b) > 1e-6 for a, b in zip(socket_input.default_value, value)):
+            socket_input.default_value = value
+            log_debug("Set material color to %s", color)
+
+    def _assign_material(self, obj, mat):
+        if not obj.data.materials:
+            obj.data.materials.append(mat)
+        elif obj.data.materials[0] != mat:
+            obj.data.materials[0] = mat
+
     def get_polyhaven_categories(self, asset_type):
         """Get categories for a specific asset type from Polyhaven"""
         try:
             if asset_type not in ["hdris", "textures", "models", "all"]:
                 return {"error": f"Invalid asset type: {asset_type}. Must be one of: hdris, textures, models, all"}
 
-            response = requests.get(f"https://api.polyhaven.com/categories/{asset_type}")
+            response = yield from self._fetch(f"https://api.polyhaven.com/categories/{asset_type}")
             if response.status_code == 200:
                 return {"categories": response.json()}
             else:
@@ -451,7 +2029,7 @@ class BlenderMCPServer:
             if categories:
                 params["categories"] = categories
 
-            response = requests.get(url, params=params)
+            response = yield from self._fetch(url, params=params)
             if response.status_code == 200:
                 assets = response.json()
                 limited_assets = {}
@@ -469,7 +2047,7 @@ class BlenderMCPServer:
     def download_polyhaven_asset(self, asset_id, asset_type, resolution="1k", file_format=None):
         """Downloads and imports a PolyHaven asset."""
         try:
-            files_response = requests.get(f"https://api.polyhaven.com/files/{asset_id}")
+            files_response = yield from self._fetch(f"https://api.polyhaven.com/files/{asset_id}")
             if files_response.status_code != 200:
                 return {"error": f"Failed to get asset files: {files_response.status_code}"}
 
@@ -483,7 +2061,7 @@ class BlenderMCPServer:
                     file_url = file_info["url"]
 
                     with tempfile.NamedTemporaryFile(suffix=f".{file_format}", delete=False) as tmp_file:
-                        response = requests.get(file_url)
+                        response = yield from self._fetch(file_url)
                         if response.status_code != 200:
                             return {"error": f"Failed to download HDRI: {response.status_code}"}
                         tmp_file.write(response.content)
@@ -552,7 +2130,7 @@ class BlenderMCPServer:
                                 file_url = file_info["url"]
 
                                 with tempfile.NamedTemporaryFile(suffix=f".{file_format}", delete=False) as tmp_file:
-                                    response = requests.get(file_url)
+                                    response = yield from self._fetch(file_url)
                                     if response.status_code == 200:
                                         tmp_file.write(response.content)
                                         tmp_path = tmp_file.name
@@ -570,6 +2148,7 @@ class BlenderMCPServer:
                                             except:
                                                 pass
                                         downloaded_maps[map_type] = image
+                                        self._index_texture_image(asset_id, image)
                                         try:
                                             os.unlink(tmp_path)
                                         except:
@@ -651,7 +2230,7 @@ class BlenderMCPServer:
                     try:
                         main_file_name = file_url.split("/")[-1]
                         main_file_path = os.path.join(temp_dir, main_file_name)
-                        response = requests.get(file_url)
+                        response = yield from self._fetch(file_url)
                         if response.status_code != 200:
                             return {"error": f"Failed to download model: {response.status_code}"}
                         with open(main_file_path, "wb") as f:
@@ -661,7 +2240,7 @@ class BlenderMCPServer:
                                 include_url = include_info["url"]
                                 include_file_path = os.path.join(temp_dir, include_path)
                                 os.makedirs(os.path.dirname(include_file_path), exist_ok=True)
-                                include_response = requests.get(include_url)
+                                include_response = yield from self._fetch(include_url)
                                 if include_response.status_code == 200:
                                     with open(include_file_path, "wb") as f:
                                         f.write(include_response.content)
@@ -702,6 +2281,61 @@ class BlenderMCPServer:
         except Exception as e:
             return {"error": f"Failed to download asset: {str(e)}"}
 
+    def _index_texture_image(self, texture_id, image):
+        """Record a downloaded map image under its texture ID."""
+        names = self.texture_index.setdefault(texture_id, [])
+        if image.name not in names:
+            names.append(image.name)
+        self.texture_mtimes[image.name] = self._image_source_mtime(image)
+
+    def _image_source_mtime(self, image):
+        path = bpy.path.abspath(image.filepath) if image.filepath else ""
+        try:
+            return os.path.getmtime(path) if path else None
+        except OSError:
+            return None
+
+    def _get_texture_images(self, texture_id):
+        """Resolve the map images of a texture, reloading only those changed on disk."""
+        names = self.texture_index.get(texture_id)
+        if names is None:
+            # Not downloaded in this session: scan once, then serve from the index.
+            prefix = texture_id + "_"
+            for img in bpy.data.images:
+                if img.name.startswith(prefix):
+                    self._index_texture_image(texture_id, img)
+            names = self.texture_index.get(texture_id, [])
+
+        texture_images = {}
+        for name in list(names):
+            img = bpy.data.images.get(name)
+            if img is None:
+                names.remove(name)
+                self.texture_mtimes.pop(name, None)
+                continue
+            map_type = name.split('_')[-1].split('.')[0]
+            mtime = self._image_source_mtime(img)
+            if mtime is not None and mtime != self.texture_mtimes.get(name):
+                img.reload()
+                self.texture_mtimes[name] = mtime
+                log_debug("Reloaded changed texture image: %s", name)
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                colorspace = 'sRGB'
+            else:
+                colorspace = 'Non-Color'
+            if img.colorspace_settings.name != colorspace:
+                try:
+                    img.colorspace_settings.name = colorspace
+                except:
+                    pass
+            if not img.packed_file:
+                img.pack()
+            texture_images[map_type] = img
+
+        if not names:
+            self.texture_index.pop(texture_id, None)
+        return texture_images
+
     def set_texture(self, object_name, texture_id):
         """Apply a previously downloaded Polyhaven texture."""
         try:
@@ -711,182 +2345,22 @@ class BlenderMCPServer:
             if not hasattr(obj, 'data') or not hasattr(obj.data, 'materials'):
                 return {"error": f"Object {object_name} cannot accept materials"}
 
-            texture_images = {}
-            for img in bpy.data.images:
-                if img.name.startswith(texture_id + "_"):
-                    map_type = img.name.split('_')[-1].split('.')[0]
-                    img.reload()
-                    if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                        try:
-                            img.colorspace_settings.name = 'sRGB'
-                        except:
-                            pass
-                    else:
-                        try:
-                            img.colorspace_settings.name = 'Non-Color'
-                        except:
-                            pass
-                    if not img.packed_file:
-                        img.pack()
-                    texture_images[map_type] = img
-                    print(f"Loaded: {map_type} - {img.name}")
-                    print(f"Size: {img.size[0]}x{img.size[1]}")
-                    print(f"Colorspace: {img.colorspace_settings.name}")
-                    print(f"Format: {img.file_format}")
-                    print(f"Packed: {bool(img.packed_file)}")
-
+            texture_images = self._get_texture_images(texture_id)
             if not texture_images:
                 return {"error": f"No images found for: {texture_id}."}
 
-            new_mat_name = f"{texture_id}_material_{object_name}"
-            existing_mat = bpy.data.materials.get(new_mat_name)
-            if existing_mat:
-                bpy.data.materials.remove(existing_mat)
-
-            new_mat = bpy.data.materials.new(name=new_mat_name)
-            new_mat.use_nodes = True
-            nodes = new_mat.node_tree.nodes
-            links = new_mat.node_tree.links
-            nodes.clear()
-            output = nodes.new(type='ShaderNodeOutputMaterial')
-            output.location = (600, 0)
-            principled = nodes.new(type='ShaderNodeBsdfPrincipled')
-            principled.location = (300, 0)
-            links.new(principled.outputs[0], output.inputs[0])
-            tex_coord = nodes.new(type='ShaderNodeTexCoord')
-            tex_coord.location = (-800, 0)
-            mapping = nodes.new(type='ShaderNodeMapping')
-            mapping.location = (-600, 0)
-            mapping.vector_type = 'TEXTURE'
-            links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
-            x_pos = -400
-            y_pos = 300
-
-            for map_type, image in texture_images.items():
-                tex_node = nodes.new(type='ShaderNodeTexImage')
-                tex_node.location = (x_pos, y_pos)
-                tex_node.image = image
-
-                if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                    try:
-                        tex_node.image.colorspace_settings.name = 'sRGB'
-                    except:
-                        pass
-                else:
-                    try:
-                        tex_node.image.colorspace_settings.name = 'Non-Color'
-                    except:
-                        pass
-                links.new(mapping.outputs['Vector'], tex_node.inputs['Vector'])
-                if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                    links.new(tex_node.outputs['Color'], principled.inputs['Base Color'])
-                elif map_type.lower() in ['roughness', 'rough']:
-                    links.new(tex_node.outputs['Color'], principled.inputs['Roughness'])
-                elif map_type.lower() in ['metallic', 'metalness', 'metal']:
-                    links.new(tex_node.outputs['Color'], principled.inputs['Metallic'])
-                elif map_type.lower() in ['normal', 'nor', 'dx', 'gl']:
-                    normal_map = nodes.new(type='ShaderNodeNormalMap')
-                    normal_map.location = (x_pos + 200, y_pos)
-                    links.new(tex_node.outputs['Color'], normal_map.inputs['Color'])
-                    links.new(normal_map.outputs['Normal'], principled.inputs['Normal'])
-                elif map_type.lower() in ['displacement', 'disp', 'height']:
-                    disp_node = nodes.new(type='ShaderNodeDisplacement')
-                    disp_node.location = (x_pos + 200, y_pos - 200)
-                    disp_node.inputs['Scale'].default_value = 0.1
-                    links.new(tex_node.outputs['Color'], disp_node.inputs['Height'])
-                    links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
-
-                y_pos -= 250
-
-            texture_nodes = {}
-            for node in nodes:
-                if node.type == 'TEX_IMAGE' and node.image:
-                    for map_type, image in texture_images.items():
-                        if node.image == image:
-                            texture_nodes[map_type] = node
-                            break
-            for map_name in ['color', 'diffuse', 'albedo']:
-                if map_name in texture_nodes:
-                    links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Base Color'])
-                    print(f"Connected {map_name} to Base Color")
-                    break
-            for map_name in ['roughness', 'rough']:
-                if map_name in texture_nodes:
-                    links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Roughness'])
-                    print(f"Connected {map_name} to Roughness")
-                    break
-
-            for map_name in ['metallic', 'metalness', 'metal']:
-                if map_name in texture_nodes:
-                    links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Metallic'])
-                    print(f"Connected {map_name} to Metallic")
-                    break
-            for map_name in ['gl', 'dx', 'nor']:
-                if map_name in texture_nodes:
-                    normal_map_node = nodes.new(type='ShaderNodeNormalMap')
-                    normal_map_node.location = (100, 100)
-                    links.new(texture_nodes[map_name].outputs['Color'], normal_map_node.inputs['Color'])
-                    links.new(normal_map_node.outputs['Normal'], principled.inputs['Normal'])
-                    print(f"Connected {map_name} to Normal")
-                    break
-            for map_name in ['displacement', 'disp', 'height']:
-                if map_name in texture_nodes:
-                    disp_node = nodes.new(type='ShaderNodeDisplacement')
-                    disp_node.location = (300, -200)
-                    disp_node.inputs['Scale'].default_value = 0.1
-                    links.new(texture_nodes[map_name].outputs['Color'], disp_node.inputs['Height'])
-                    links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
-                    print(f"Connected {map_name} to Displacement")
-                    break
-            if 'arm' in texture_nodes:
-                separate_rgb = nodes.new(type='ShaderNodeSeparateRGB')
-                separate_rgb.location = (-200, -100)
-                links.new(texture_nodes['arm'].outputs['Color'], separate_rgb.inputs['Image'])
-                if not any(map_name in texture_nodes for map_name in ['roughness', 'rough']):
-                    links.new(separate_rgb.outputs['G'], principled.inputs['Roughness'])
-                    print("Connected ARM.G to Roughness")
-                if not any(map_name in texture_nodes for map_name in ['metallic', 'metalness', 'metal']):
-                    links.new(separate_rgb.outputs['B'], principled.inputs['Metallic'])
-                    print("Connected ARM.B to Metallic")
-                base_color_node = None
-                for map_name in ['color', 'diffuse', 'albedo']:
-                    if map_name in texture_nodes:
-                        base_color_node = texture_nodes[map_name]
-                        break
-                if base_color_node:
-                    mix_node = nodes.new(type='ShaderNodeMixRGB')
-                    mix_node.location = (100, 200)
-                    mix_node.blend_type = 'MULTIPLY'
-                    mix_node.inputs['Fac'].default_value = 0.8
-                    for link in base_color_node.outputs['Color'].links:
-                        if link.to_socket == principled.inputs['Base Color']:
-                            links.remove(link)
-                    links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
-                    links.new(separate_rgb.outputs['R'], mix_node.inputs[2])
-                    links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
-                    print("Connected ARM.R to AO mix with Base Color")
-
-            if 'ao' in texture_nodes:
-                base_color_node = None
-                for map_name in ['color', 'diffuse', 'albedo']:
-                    if map_name in texture_nodes:
-                        base_color_node = texture_nodes[map_name]
-                        break
-
-                if base_color_node:
-                    mix_node = nodes.new(type='ShaderNodeMixRGB')
-                    mix_node.location = (100, 200)
-                    mix_node.blend_type = 'MULTIPLY'
-                    mix_node.inputs['Fac'].default_value = 0.8
-
-                    for link in base_color_node.outputs['Color'].links:
-                        if link.to_socket == principled.inputs['Base Color']:
-                            links.remove(link)
-
-                    links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
-                    links.new(texture_nodes['ao'].outputs['Color'], mix_node.inputs[2])
-                    links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
-                    print("Connected AO to mix with Base Color")
+            # Objects sharing a texture share one material, rebuilt only when its maps change.
+            # It is rebuilt in place so the other objects using it keep their material.
+            new_mat_name = f"{texture_id}_material"
+            new_mat = bpy.data.materials.get(new_mat_name)
+            if new_mat and self._material_images(new_mat) == sorted(img.name for img in texture_images.values()):
+                log_debug("Reusing material: %s", new_mat_name)
+                reused = True
+            else:
+                if new_mat is None:
+                    new_mat = bpy.data.materials.new(name=new_mat_name)
+                self._build_texture_material(new_mat, texture_images)
+                reused = False
 
             while len(obj.data.materials) > 0:
                 obj.data.materials.pop(index=0)
@@ -920,7 +2394,8 @@ class BlenderMCPServer:
 
             return {
                 "success": True,
-                "message": f"Created new material and applied texture {texture_id} to {object_name}",
+                "message": (f"{'Reused' if reused else 'Created new'} material and applied "
+                            f"texture {texture_id} to {object_name}"),
                 "material": new_mat.name,
                 "maps": texture_maps,
                 "material_info": material_info
@@ -931,6 +2406,178 @@ class BlenderMCPServer:
             traceback.print_exc()
             return {"error": f"Failed to apply texture: {str(e)}"}
 
+    def _material_images(self, mat):
+        """Sorted names of the images in a material's texture nodes."""
+        if not mat.use_nodes or not mat.node_tree:
+            return []
+        return sorted(node.image.name for node in mat.node_tree.nodes
+                      if node.type == 'TEX_IMAGE' and node.image)
+
+    def _build_texture_material(self, new_mat, texture_images):
+        """(Re)build a material's PBR node graph for a set of texture map images."""
+        new_mat.use_nodes = True
+        nodes = new_mat.node_tree.nodes
+        links = new_mat.node_tree.links
+        nodes.clear()
+        output = nodes.new(type='ShaderNodeOutputMaterial')
+        output.location = (600, 0)
+        principled = nodes.new(type='ShaderNodeBsdfPrincipled')
+        principled.location = (300, 0)
+        links.new(principled.outputs[0], output.inputs[0])
+        tex_coord = nodes.new(type='ShaderNodeTexCoord')
+        tex_coord.location = (-800, 0)
+        mapping = nodes.new(type='ShaderNodeMapping')
+        mapping.location = (-600, 0)
+        mapping.vector_type = 'TEXTURE'
+        links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
+        x_pos = -400
+        y_pos = 300
+
+        for map_type, image in texture_images.items():
+            tex_node = nodes.new(type='ShaderNodeTexImage')
+            tex_node.location = (x_pos, y_pos)
+            tex_node.image = image
+
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                try:
+                    tex_node.image.colorspace_settings.name = 'sRGB'
+                except:
+                    pass
+            else:
+                try:
+                    tex_node.image.colorspace_settings.name = 'Non-Color'
+                except:
+                    pass
+            links.new(mapping.outputs['Vector'], tex_node.inputs['Vector'])
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Base Color'])
+            elif map_type.lower() in ['roughness', 'rough']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Roughness'])
+            elif map_type.lower() in ['metallic', 'metalness', 'metal']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Metallic'])
+            elif map_type.lower() in ['normal', 'nor', 'dx', 'gl']:
+                normal_map = nodes.new(type='ShaderNodeNormalMap')
+                normal_map.location = (x_pos + 200, y_pos)
+                links.new(tex_node.outputs['Color'], normal_map.inputs['Color'])
+                links.new(normal_map.outputs['Normal'], principled.inputs['Normal'])
+            elif map_type.lower() in ['displacement', 'disp', 'height']:
+                disp_node = nodes.new(type='ShaderNodeDisplacement')
+                disp_node.location = (x_pos + 200, y_pos - 200)
+                disp_node.inputs['Scale'].default_value = 0.1
+                links.new(tex_node.outputs['Color'], disp_node.inputs['Height'])
+                links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
+
+            y_pos -= 250
+
+        texture_nodes = {}
+        for node in nodes:
+            if node.type == 'TEX_IMAGE' and node.image:
+                for map_type, image in texture_images.items():
+                    if node.image == image:
+                        texture_nodes[map_type] = node
+                        break
+        for map_name in ['color', 'diffuse', 'albedo']:
+            if map_name in texture_nodes:
+                links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Base Color'])
+                log_debug("Connected %s to Base Color", map_name)
+                break
+        for map_name in ['roughness', 'rough']:
+            if map_name in texture_nodes:
+                links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Roughness'])
+                log_debug("Connected %s to Roughness", map_name)
+                break
+
+        for map_name in ['metallic', 'metalness', 'metal']:
+            if map_name in texture_nodes:
+                links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Metallic'])
+                log_debug("Connected %s to Metallic", map_name)
+                break
+        for map_name in ['gl', 'dx', 'nor']:
+            if map_name in texture_nodes:
+                normal_map_node = nodes.new(type='ShaderNodeNormalMap')
+                normal_map_node.location = (100, 100)
+                links.new(texture_nodes[map_name].outputs['Color'], normal_map_node.inputs['Color'])
+                links.new(normal_map_node.outputs['Normal'], principled.inputs['Normal'])
+                log_debug("Connected %s to Normal", map_name)
+                break
+        for map_name in ['displacement', 'disp', 'height']:
+            if map_name in texture_nodes:
+                disp_node = nodes.new(type='ShaderNodeDisplacement')
+                disp_node.location = (300, -200)
+                disp_node.inputs['Scale'].default_value = 0.1
+                links.new(texture_nodes[map_name].outputs['Color'], disp_node.inputs['Height'])
+                links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
+                log_debug("Connected %s to Displacement", map_name)
+                break
+        if 'arm' in texture_nodes:
+            separate_rgb = nodes.new(type='ShaderNodeSeparateRGB')
+            separate_rgb.location = (-200, -100)
+            links.new(texture_nodes['arm'].outputs['Color'], separate_rgb.inputs['Image'])
+            if not any(map_name in texture_nodes for map_name in ['roughness', 'rough']):
+                links.new(separate_rgb.outputs['G'], principled.inputs['Roughness'])
+                log_debug("Connected ARM.G to Roughness")
+            if not any(map_name in texture_nodes for map_name in ['metallic', 'metalness', 'metal']):
+                links.new(separate_rgb.outputs['B'], principled.inputs['Metallic'])
+                log_debug("Connected ARM.B to Metallic")
+            base_color_node = None
+            for map_name in ['color', 'diffuse', 'albedo']:
+                if map_name in texture_nodes:
+                    base_color_node = texture_nodes[map_name]
+                    break
+            if base_color_node:
+                mix_node = nodes.new(type='ShaderNodeMixRGB')
+                mix_node.location = (100, 200)
+                mix_node.blend_type = 'MULTIPLY'
+                mix_node.inputs['Fac'].default_value = 0.8
+                for link in base_color_node.outputs['Color'].links:
+                    if link.to_socket == principled.inputs['Base Color']:
+                        links.remove(link)
+                links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
+                links.new(separate_rgb.outputs['R'], mix_node.inputs[2])
+                links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
+                log_debug("Connected ARM.R to AO mix with Base Color")
+
+        if 'ao' in texture_nodes:
+            base_color_node = None
+            for map_name in ['color', 'diffuse', 'albedo']:
+                if map_name in texture_nodes:
+                    base_color_node = texture_nodes[map_name]
+                    break
+
+            if base_color_node:
+                mix_node = nodes.new(type='ShaderNodeMixRGB')
+                mix_node.location = (100, 200)
+                mix_node.blend_type = 'MULTIPLY'
+                mix_node.inputs['Fac'].default_value = 0.8
+
+                for link in base_color_node.outputs['Color'].links:
+                    if link.to_socket == principled.inputs['Base Color']:
+                        links.remove(link)
+
+                links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
+                links.new(texture_nodes['ao'].outputs['Color'], mix_node.inputs[2])
+                links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
+                log_debug("Connected AO to mix with Base Color")
+
+        return new_mat
+
+    def _request_timeout(self, default=30.0):
+        """HTTP timeout for the running command: what is left of its deadline, if any."""
+        if self.command_deadline is None:
+            return default
+        return max(1.0, self.command_deadline - time.perf_counter())
+
+    def _fetch(self, url, **kwargs):
+        """GET ``url`` on the I/O pool, yielding to the scheduler until the response is in.
+
+        Use with ``yield from`` inside a handler, which makes it a stepped one.
+        """
+        if self.io_pool is None:
+            self.io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="blendermcp-io")
+        future = self.io_pool.submit(requests.get, url, timeout=self._request_timeout(), **kwargs)
+        yield future
+        return future.result()
+
     def get_polyhaven_status(self):
         enabled = bpy.context.scene.blendermcp_use_polyhaven
         if enabled:
@@ -956,13 +2603,17 @@ class BLENDERMCP_PT_Panel(bpy.types.Panel):
         scene = context.scene
 
         layout.prop(scene, "blendermcp_port")
+        layout.prop(scene, "blendermcp_socket_path")
         layout.prop(scene, "blendermcp_use_polyhaven", text="Use assets from Poly Haven")
 
         if not scene.blendermcp_server_running:
             layout.operator("blendermcp.start_server", text="Start MCP Server")
         else:
             layout.operator("blendermcp.stop_server", text="Stop MCP Server")
-            layout.label(text=f"Running on port {scene.blendermcp_port}")
+            if scene.blendermcp_socket_path:
+                layout.label(text=f"Running on {scene.blendermcp_socket_path}")
+            else:
+                layout.label(text=f"Running on port {scene.blendermcp_port}")
 
 class BLENDERMCP_OT_StartServer(bpy.types.Operator):
     bl_idname = "blendermcp.start_server"
@@ -972,7 +2623,9 @@ class BLENDERMCP_OT_StartServer(bpy.types.Operator):
     def execute(self, context):
         scene = context.scene
         if not hasattr(bpy.types, "blendermcp_server") or not bpy.types.blendermcp_server:
-            bpy.types.blendermcp_server = BlenderMCPServer(port=scene.blendermcp_port)
+            socket_path = scene.blendermcp_socket_path
+            bpy.types.blendermcp_server = BlenderMCPServer(
+                port=scene.blendermcp_port, socket_path=bpy.path.abspath(socket_path) if socket_path else None)
         bpy.types.blendermcp_server.start()
         scene.blendermcp_server_running = True
         return {'FINISHED'}
@@ -998,6 +2651,12 @@ def register():
         min=1024,
         max=65535
     )
+    bpy.types.Scene.blendermcp_socket_path = StringProperty(
+        name="Socket Path",
+        description="Listen on this Unix socket instead of the TCP port (same-host servers only)",
+        default="",
+        subtype='FILE_PATH'
+    )
     bpy.types.Scene.blendermcp_server_running = bpy.props.BoolProperty(
         name="Server Running",
         default=False
@@ -1021,9 +2680,45 @@ def unregister():
     bpy.utils.unregister_class(BLENDERMCP_OT_StartServer)
     bpy.utils.unregister_class(BLENDERMCP_OT_StopServer)
     del bpy.types.Scene.blendermcp_port
+    del bpy.types.Scene.blendermcp_socket_path
     del bpy.types.Scene.blendermcp_server_running
     del bpy.types.Scene.blendermcp_use_polyhaven
     print("BlenderMCP addon unregistered")
 
+def main():
+    """Run the addon server headlessly: blender -b --python addon.py -- --port N"""
+    global VERBOSE
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="blender -b --python addon.py --",
+                                     description="Headless BlenderMCP addon server")
+    parser.add_argument("--host", type=str, default="localhost",
+                        help="Host for the addon socket server")
+    parser.add_argument("--port", type=int, default=9876,
+                        help="Port for the addon socket server")
+    parser.add_argument("--socket-path", type=str, default="",
+                        help="Listen on this Unix socket instead of the TCP port")
+    parser.add_argument("--polyhaven", action="store_true",
+                        help="Enable Poly Haven asset commands")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print a trace line for every command")
+    parser.add_argument("--slow-threshold", type=float, default=1.0,
+                        help="Sample a profile of commands slower than this many seconds (0 disables)")
+    args = parser.parse_args(argv)
+    VERBOSE = VERBOSE or args.verbose
+
+    register()
+    scene = bpy.context.scene
+    scene.blendermcp_port = args.port
+    scene.blendermcp_socket_path = args.socket_path
+    scene.blendermcp_use_polyhaven = args.polyhaven
+    bpy.types.blendermcp_server = BlenderMCPServer(host=args.host, port=args.port,
+                                                     socket_path=args.socket_path)
+    bpy.types.blendermcp_server.slow_command_threshold = args.slow_threshold
+    scene.blendermcp_server_running = True
+    bpy.types.blendermcp_server.serve_forever()
+
 if __name__ == "__main__":
-    register()
\ No newline at end of file
+    if bpy.app.background:
+        main()
+    else:
+        register()
\ No newline at end of file
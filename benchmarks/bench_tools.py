@@ -0,0 +1,223 @@
+"""End-to-end latency/throughput benchmarks for the MCP tools.
+
+Drives the tool functions in ``blender_open_mcp.server`` against the
+in-process Blender simulator and a stub Ollama HTTP server, and writes
+p50/p95/p99 latency, requests per second and allocation counts as JSON::
+
+    python benchmarks/bench_tools.py --iterations 500 --output bench.json
+    python benchmarks/bench_tools.py --only create_object,get_scene_info --latency-ms 1
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from blender_open_mcp import server  # noqa: E402
+from blender_open_mcp.simulator import BlenderSimulator, SimulatorConfig  # noqa: E402
+from stub_ollama import StubOllama  # noqa: E402
+
+
+class BenchContext:
+    """Minimal stand-in for the MCP Context handed to tools."""
+
+    session = None
+
+    def __init__(self):
+        self.images: List[Any] = []
+
+    def add_image(self, image) -> None:
+        # Keep memory flat across iterations.
+        self.images[:] = [image]
+
+
+def build_cases(ctx: BenchContext, render_path: str) -> Dict[str, Callable[[int], Any]]:
+    """Map benchmark names to callables taking the iteration number."""
+    return {
+        "create_object": lambda i: server.create_object(ctx, "CUBE", f"bench_{i}", [i % 10, 0, 0]),
+        "get_scene_info": lambda i: server.get_scene_info(ctx),
+        "get_object_info": lambda i: server.get_object_info(ctx, "bench_0"),
+        "modify_object": lambda i: server.modify_object(ctx, "bench_0", location=[0, 0, i % 5]),
+        "set_material": lambda i: server.set_material(ctx, "bench_0", color=[(i % 4) / 4, 0.5, 0.5]),
+        "execute_blender_code": lambda i: server.execute_blender_code(
+            ctx, "import bpy\nfor obj in bpy.data.objects:\n    obj.location.z += 0.1\n"),
+        "render_image": lambda i: server.render_image(ctx, render_path),
+        "get_polyhaven_categories": lambda i: server.get_polyhaven_categories(ctx, "textures"),
+        "search_polyhaven_assets": lambda i: server.search_polyhaven_assets(ctx, "textures"),
+        "download_polyhaven_asset": lambda i: server.download_polyhaven_asset(ctx, "bench_tex", "textures"),
+        "set_texture": lambda i: server.set_texture(ctx, "bench_0", "bench_tex"),
+        "query_ollama": lambda i: server.query_ollama(f"benchmark prompt {i}"),
+    }
+
+
+async def _call(fn: Callable[[int], Any], i: int) -> Any:
+    result = fn(i)
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+async def run_case(name: str, fn: Callable[[int], Any], iterations: int, warmup: int) -> Dict[str, Any]:
+    for i in range(warmup):
+        await _call(fn, i)
+
+    errors = 0
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter_ns()
+        result = await _call(fn, i)
+        latencies.append((time.perf_counter_ns() - t0) / 1e6)
+        if isinstance(result, str) and result.startswith("Error"):
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    # Allocation accounting runs as a separate pass so tracing doesn't skew latency.
+    alloc_iterations = max(1, iterations // 10)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(alloc_iterations):
+        await _call(fn, i)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    allocated_blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+    allocated_bytes = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "max_ms": round(latencies[-1], 4),
+        "mean_ms": round(sum(latencies) / len(latencies), 4),
+        "rps": round(iterations / elapsed, 2) if elapsed else 0.0,
+        "alloc_blocks_per_call": round(allocated_blocks / alloc_iterations, 2),
+        "alloc_bytes_per_call": round(allocated_bytes / alloc_iterations, 2),
+        "alloc_peak_kib": round(peak / 1024, 2),
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    simulator = BlenderSimulator(port=0, config=SimulatorConfig(
+        latency=args.latency_ms / 1000.0,
+        jitter=args.jitter_ms / 1000.0,
+        response_padding=args.response_padding,
+        seed=0,
+    )).start_in_thread()
+    ollama = StubOllama(latency=args.ollama_latency_ms / 1000.0).start()
+
+    server._blender_host = simulator.host
+    server._blender_port = simulator.port
+    server._connection_manager = None
+    server._ollama_backends.set_urls([ollama.url])
+    server._ollama_model = "stub"
+
+    ctx = BenchContext()
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = build_cases(ctx, os.path.join(tmp, "render.png"))
+        if args.only:
+            selected = args.only.split(",")
+            unknown = set(selected) - set(cases)
+            if unknown:
+                raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+            cases = {name: cases[name] for name in selected}
+        # Object-targeting tools need bench_0 to exist.
+        await server.create_object(ctx, "CUBE", "bench_0")
+
+        results = {}
+        try:
+            for name, fn in cases.items():
+                results[name] = await run_case(name, fn, args.iterations, args.warmup)
+                print(f"{name:28s} p50={results[name]['p50_ms']:.3f}ms "
+                      f"p99={results[name]['p99_ms']:.3f}ms rps={results[name]['rps']:.0f}",
+                      file=sys.stderr)
+        finally:
+            if server._connection_manager:
+                server._connection_manager.disconnect()
+                server._connection_manager = None
+            simulator.stop()
+            ollama.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "simulator_latency_ms": args.latency_ms,
+            "simulator_jitter_ms": args.jitter_ms,
+            "response_padding": args.response_padding,
+            "ollama_latency_ms": args.ollama_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MCP tool latency and throughput")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="Timed calls per tool")
+    parser.add_argument("--warmup", type=int, default=20,
+                        help="Untimed calls per tool before measuring")
+    parser.add_argument("--only", type=str, default=None,
+                        help="Comma-separated list of benchmarks to run")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Simulated Blender latency per command")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="Simulated Blender random extra latency per command")
+    parser.add_argument("--response-padding", type=int, default=0,
+                        help="Bytes of filler in every simulated Blender response")
+    parser.add_argument("--ollama-latency-ms", type=float, default=0.0,
+                        help="Stub Ollama generation latency")
+    parser.add_argument("--log-level", type=str, default="WARNING",
+                        help="Level for the server's loggers while benchmarking")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+    for name in ("BlenderMCPServer", "httpx"):
+        logging.getLogger(name).setLevel(args.log_level.upper())
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
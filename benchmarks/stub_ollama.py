@@ -0,0 +1,88 @@
+"""Stub Ollama HTTP server for benchmarks.
+
+Answers ``/api/generate``, ``/api/tags``, ``/api/ps`` and ``/api/show`` with canned
+payloads after a configurable delay, so ``query_ollama`` can be measured
+without a model loaded.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes on a kept-alive connection;
+    # with Nagle on, delayed ACKs add ~40 ms to every response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._reply({"models": [{"name": name} for name in self.server.models]})
+        elif self.path == "/api/ps":
+            self._reply({"models": [{"name": name} for name in sorted(self.server.loaded)]})
+        else:
+            self._reply({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/generate":
+            time.sleep(self.server.latency)
+            self.server.loaded.add(request.get("model", ""))
+            self._reply({
+                "model": request.get("model", ""),
+                "response": self.server.response_text,
+                "done": True,
+                "eval_count": self.server.eval_count,
+                "eval_duration": int(self.server.latency * 1e9),
+            })
+        elif self.path == "/api/show":
+            if request.get("name") in self.server.models:
+                self._reply({"modelfile": ""})
+            else:
+                self._reply({"error": "model not found"}, status=404)
+        else:
+            self._reply({"error": "not found"}, status=404)
+
+
+class StubOllama:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 response_text: str = '{"tool": "get_scene_info"}', eval_count: int = 16,
+                 models: Optional[list] = None):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.response_text = response_text
+        self.httpd.eval_count = eval_count
+        self.httpd.models = models or ["stub"]
+        self.httpd.loaded = set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubOllama":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
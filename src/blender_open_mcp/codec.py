@@ -0,0 +1,344 @@
+"""Wire codecs for the server <-> addon socket protocol.
+
+Connections start out speaking unframed JSON, the protocol every addon
+understands. ``BlenderConnection`` then offers MessagePack in a ``hello``
+command; an addon that accepts answers in JSON and both sides switch to
+length-prefixed MessagePack frames. The ``msgpack`` package is used when
+installed, otherwise a pure-Python implementation of the same format, so
+either end can talk to the other regardless of what Blender bundles.
+
+The same handshake can turn on zlib (or zstd, with ``zstandard``)
+compression for frames above a size threshold, for remote Blender hosts
+where bandwidth matters more than CPU.
+"""
+import codecs
+import json
+import struct
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Whether MessagePack is backed by the C extension (faster than json) or the fallback below.
+MSGPACK_NATIVE = msgpack is not None
+
+_FRAME = struct.Struct(">I")
+_COMPRESSED_FRAME = struct.Struct(">IB")
+
+
+def _pack(obj: Any, out: List[bytes]) -> None:
+    if obj is None:
+        out.append(b"\xc0")
+    elif obj is True:
+        out.append(b"\xc3")
+    elif obj is False:
+        out.append(b"\xc2")
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(bytes((obj,)))
+        elif -32 <= obj < 0:
+            out.append(bytes((obj & 0xff,)))
+        elif obj >= 0:
+            if obj <= 0xff:
+                out.append(b"\xcc" + struct.pack(">B", obj))
+            elif obj <= 0xffff:
+                out.append(b"\xcd" + struct.pack(">H", obj))
+            elif obj <= 0xffffffff:
+                out.append(b"\xce" + struct.pack(">I", obj))
+            else:
+                out.append(b"\xcf" + struct.pack(">Q", obj))
+        elif obj >= -0x80:
+            out.append(b"\xd0" + struct.pack(">b", obj))
+        elif obj >= -0x8000:
+            out.append(b"\xd1" + struct.pack(">h", obj))
+        elif obj >= -0x80000000:
+            out.append(b"\xd2" + struct.pack(">i", obj))
+        else:
+            out.append(b"\xd3" + struct.pack(">q", obj))
+    elif isinstance(obj, float):
+        out.append(b"\xcb" + struct.pack(">d", obj))
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(bytes((0xa0 | n,)))
+        elif n <= 0xff:
+            out.append(b"\xd9" + struct.pack(">B", n))
+        elif n <= 0xffff:
+            out.append(b"\xda" + struct.pack(">H", n))
+        else:
+            out.append(b"\xdb" + struct.pack(">I", n))
+        out.append(data)
+    elif isinstance(obj, (bytes, bytearray)):
+        n = len(obj)
+        if n <= 0xff:
+            out.append(b"\xc4" + struct.pack(">B", n))
+        elif n <= 0xffff:
+            out.append(b"\xc5" + struct.pack(">H", n))
+        else:
+            out.append(b"\xc6" + struct.pack(">I", n))
+        out.append(bytes(obj))
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(bytes((0x90 | n,)))
+        elif n <= 0xffff:
+            out.append(b"\xdc" + struct.pack(">H", n))
+        else:
+            out.append(b"\xdd" + struct.pack(">I", n))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(bytes((0x80 | n,)))
+        elif n <= 0xffff:
+            out.append(b"\xde" + struct.pack(">H", n))
+        else:
+            out.append(b"\xdf" + struct.pack(">I", n))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f"Cannot serialize {type(obj).__name__} with MessagePack")
+
+
+# Fixed-size headers: type byte -> (struct format, size)
+_SIZED = {
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+    0xca: ">f", 0xcb: ">d",
+}
+_LENGTHS = {
+    0xc4: ">B", 0xc5: ">H", 0xc6: ">I",   # bin
+    0xd9: ">B", 0xda: ">H", 0xdb: ">I",   # str
+    0xdc: ">H", 0xdd: ">I",               # array
+    0xde: ">H", 0xdf: ">I",               # map
+}
+
+
+def _unpack(data: bytes, pos: int):
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if 0xa0 <= code <= 0xbf:
+        end = pos + (code & 0x1f)
+        return data[pos:end].decode("utf-8"), end
+    if 0x90 <= code <= 0x9f:
+        return _unpack_array(data, pos, code & 0x0f)
+    if 0x80 <= code <= 0x8f:
+        return _unpack_map(data, pos, code & 0x0f)
+    if code == 0xc0:
+        return None, pos
+    if code == 0xc2:
+        return False, pos
+    if code == 0xc3:
+        return True, pos
+    fmt = _SIZED.get(code)
+    if fmt is not None:
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    fmt = _LENGTHS.get(code)
+    if fmt is None:
+        raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+    n = struct.unpack_from(fmt, data, pos)[0]
+    pos += struct.calcsize(fmt)
+    if code <= 0xc6:
+        return bytes(data[pos:pos + n]), pos + n
+    if code <= 0xdb:
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    if code <= 0xdd:
+        return _unpack_array(data, pos, n)
+    return _unpack_map(data, pos, n)
+
+
+def _unpack_array(data: bytes, pos: int, n: int):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, n: int):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(data, pos)
+        value, pos = _unpack(data, pos)
+        result[key] = value
+    return result, pos
+
+
+def packb(obj: Any) -> bytes:
+    """Serialize ``obj`` to MessagePack, natively when possible."""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out: List[bytes] = []
+    _pack(obj, out)
+    return b"".join(out)
+
+
+def unpackb(data: bytes) -> Any:
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    value, end = _unpack(data, 0)
+    if end != len(data):
+        raise ValueError(f"{len(data) - end} trailing bytes after MessagePack value")
+    return value
+
+
+class JsonStream:
+    """Unframed JSON: messages are concatenated JSON objects."""
+
+    name = "json"
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return json.dumps(message).encode("utf-8")
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Add received bytes; returns every message completed by them."""
+        self._buffer += self._utf8.decode(data)
+        messages = []
+        while self._buffer:
+            try:
+                message, end = self._decoder.raw_decode(self._buffer)
+            except json.JSONDecodeError:
+                break
+            self._buffer = self._buffer[end:].lstrip()
+            messages.append(message)
+        return messages
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+
+SERIALIZERS = {
+    "json": (lambda message: json.dumps(message).encode("utf-8"), json.loads),
+    "msgpack": (packb, unpackb),
+}
+
+# Compressed frames go over the wire in this format; decompressors are incremental.
+COMPRESSORS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[], Any]]] = {
+    "zlib": (lambda data: zlib.compress(data, 1), zlib.decompressobj),
+}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+                           lambda: zstandard.ZstdDecompressor().decompressobj())
+
+# Payloads smaller than this are sent uncompressed even when compression is on.
+COMPRESS_THRESHOLD = 16 * 1024
+
+
+class FramedStream:
+    """Length-prefixed frames: a 4-byte big-endian length, then the payload.
+
+    With compression negotiated, a flag byte after the length says whether
+    the payload is compressed. Compressed frames are decompressed chunk by
+    chunk as they arrive, so a large response never sits in memory both
+    compressed and decompressed.
+    """
+
+    def __init__(self, codec: str = "msgpack", compression: Optional[str] = None,
+                 threshold: int = COMPRESS_THRESHOLD):
+        self.name = f"{codec}+{compression}" if compression else codec
+        self._dumps, self._loads = SERIALIZERS[codec]
+        self._compress, self._decompressor = COMPRESSORS[compression] if compression else (None, None)
+        self._header = _COMPRESSED_FRAME if compression else _FRAME
+        self._threshold = threshold
+        self._buffer = bytearray()
+        self._payload: Optional[bytearray] = None
+        self._remaining = 0
+        self._inflate: Any = None
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        payload = self._dumps(message)
+        if self._compress is None:
+            return _FRAME.pack(len(payload)) + payload
+        compressed = len(payload) >= self._threshold
+        if compressed:
+            payload = self._compress(payload)
+        return _COMPRESSED_FRAME.pack(len(payload), compressed) + payload
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        messages = []
+        view = memoryview(data)
+        while view:
+            if self._payload is None:
+                # Collect the header, then start a frame.
+                take = self._header.size - len(self._buffer)
+                self._buffer += view[:take]
+                view = view[take:]
+                if len(self._buffer) < self._header.size:
+                    break
+                header = self._header.unpack(self._buffer)
+                self._buffer.clear()
+                self._remaining = header[0]
+                self._inflate = self._decompressor() if len(header) > 1 and header[1] else None
+                self._payload = bytearray()
+            chunk = view[:self._remaining]
+            view = view[len(chunk):]
+            self._remaining -= len(chunk)
+            self._payload += self._inflate.decompress(chunk) if self._inflate else chunk
+            if not self._remaining:
+                if self._inflate:
+                    self._payload += self._inflate.flush()
+                messages.append(self._loads(self._payload))
+                self._payload = self._inflate = None
+        return messages
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer) + (len(self._payload) + 1 if self._payload is not None else 0)
+
+
+def make_stream(codec: str = "json", compression: Optional[str] = None,
+                threshold: int = COMPRESS_THRESHOLD) -> Any:
+    """Stream for a negotiated codec; plain JSON stays unframed for older peers."""
+    if codec == "json" and not compression:
+        return JsonStream()
+    return FramedStream(codec, compression, threshold)
+
+
+def offered_codecs(preference: str = "auto") -> List[str]:
+    """Codecs to offer the addon, best first.
+
+    ``auto`` only offers MessagePack when the C extension is installed here,
+    since the pure-Python fallback is slower than the stdlib json module.
+    """
+    if preference == "json":
+        return ["json"]
+    if preference == "msgpack" or MSGPACK_NATIVE:
+        return ["msgpack", "json"]
+    return ["json"]
+
+
+def offered_compression(preference: str, host: str) -> List[str]:
+    """Compression formats to offer, best first.
+
+    ``auto`` compresses only when Blender is on another machine.
+    """
+    if preference == "off" or (preference == "auto" and _is_local(host)):
+        return []
+    if preference in COMPRESSORS:
+        return [preference]
+    return [name for name in ("zstd", "zlib") if name in COMPRESSORS]
+
+
+def _is_local(host: str) -> bool:
+    return host in ("localhost", "::1") or host.startswith("127.")
@@ -0,0 +1,200 @@
+"""Sharing connections to one Blender addon between concurrent MCP sessions."""
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .metrics import COMMAND_QUEUE_DEPTH, COMMANDS_IN_FLIGHT, COMMANDS_REJECTED
+
+logger = logging.getLogger("BlenderMCPServer.Connection")
+
+MODES = ("pool", "multiplex")
+
+
+class BlenderBusyError(Exception):
+    """Too many commands are already queued for Blender; this one was not sent.
+
+    ``retry_after`` suggests how many seconds to wait before trying again.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(f"{message}; retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class _OrderedLock:
+    """A lock granted in arrival order, so a session's commands run as submitted."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        # Commands holding or about to wait for the lock; guarded by the manager's lock.
+        self.users = 0
+
+    @property
+    def waiting(self) -> int:
+        return self._next_ticket - self._serving
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._serving += 1
+                self._cond.notify_all()
+
+
+class ManagedSession:
+    """Connection-like handle for one MCP session's commands."""
+
+    def __init__(self, manager: "ConnectionManager", session_id: Optional[str]):
+        self.manager = manager
+        self.session_id = session_id
+
+    def send_command(self, command_type: str, params: Optional[Dict[str, Any]] = None,
+                     **options: Any) -> Dict[str, Any]:
+        return self.manager.send_command(self.session_id, command_type, params, **options)
+
+    def disconnect(self) -> None:
+        self.manager.forget_session(self.session_id)
+
+
+class ConnectionManager:
+    """Routes commands from many sessions over shared connections to one addon.
+
+    ``pool`` mode keeps ``size`` connections that each carry one command at
+    a time; ``multiplex`` mode sends everything over a single connection
+    that tags commands with request ids. In both modes a session's commands
+    run one at a time in submission order, at most ``max_in_flight``
+    commands are outstanding in total, and a failed connection only fails
+    the commands that were using it. Beyond ``max_queued`` commands waiting
+    for a slot, new ones fail straight away with ``BlenderBusyError``
+    rather than queueing until they time out.
+    """
+
+    def __init__(self, connection_factory: Callable[[str, int], Any], host: str, port: int,
+                 mode: str = "pool", size: int = 4, max_in_flight: int = 16, max_queued: int = 64):
+        if mode not in MODES:
+            raise ValueError(f"Unknown connection mode: {mode} (expected one of {', '.join(MODES)})")
+        if size < 1 or max_in_flight < 1 or max_queued < 1:
+            raise ValueError("Connection pool size, in-flight and queue limits must be at least 1")
+        self.mode = mode
+        self.host = host
+        self.port = port
+        self.max_in_flight = max_in_flight if mode == "multiplex" else min(max_in_flight, size)
+        self.max_queued = max_queued
+        self.connections: List[Any] = [connection_factory(host, port)
+                                       for _ in range(1 if mode == "multiplex" else size)]
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        for connection in self.connections:
+            self._idle.put(connection)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._sessions: Dict[Optional[str], _OrderedLock] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        # Moving average of seconds per command, for retry-after hints.
+        self._service_time = 0.1
+
+    def session(self, session_id: Optional[str] = None) -> ManagedSession:
+        return ManagedSession(self, session_id)
+
+    def forget_session(self, session_id: Optional[str]) -> None:
+        with self._lock:
+            order = self._sessions.get(session_id)
+            if order is not None and not order.users:
+                del self._sessions[session_id]
+
+    @contextmanager
+    def _session_order(self, session_id: Optional[str]) -> Iterator[None]:
+        """Hold the session's ordering lock; dropped again once no command uses it."""
+        with self._lock:
+            order = self._sessions.get(session_id)
+            if order is None:
+                order = self._sessions[session_id] = _OrderedLock()
+            order.users += 1
+        try:
+            with order.hold():
+                yield
+        finally:
+            with self._lock:
+                order.users -= 1
+                if not order.users and self._sessions.get(session_id) is order:
+                    del self._sessions[session_id]
+
+    @contextmanager
+    def _connection(self) -> Iterator[Any]:
+        if self.mode == "multiplex":
+            yield self.connections[0]
+            return
+        # LIFO hands out the most recently used, already connected socket first.
+        connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def send_command(self, session_id: Optional[str], command_type: str,
+                     params: Optional[Dict[str, Any]] = None, **options: Any) -> Dict[str, Any]:
+        self._admit()
+        queued = True
+        try:
+            with self._session_order(session_id):
+                with self._slots:
+                    self._dequeue()
+                    queued = False
+                    COMMANDS_IN_FLIGHT.inc()
+                    started = time.perf_counter()
+                    try:
+                        with self._connection() as connection:
+                            return connection.send_command(command_type, params, **options)
+                    finally:
+                        COMMANDS_IN_FLIGHT.dec()
+                        with self._lock:
+                            self._service_time += 0.2 * (time.perf_counter() - started - self._service_time)
+        finally:
+            if queued:
+                self._dequeue()
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._queued >= self.max_queued:
+                COMMANDS_REJECTED.inc(where="server")
+                raise BlenderBusyError(f"{self._queued} Blender commands already queued", self.retry_after())
+            self._queued += 1
+            COMMAND_QUEUE_DEPTH.set(self._queued, where="server")
+
+    def _dequeue(self) -> None:
+        with self._lock:
+            self._queued -= 1
+            COMMAND_QUEUE_DEPTH.set(self._queued, where="server")
+
+    def retry_after(self) -> float:
+        """Rough seconds until the current queue drains."""
+        return max(0.5, self._queued * self._service_time / self.max_in_flight)
+
+    def disconnect(self) -> None:
+        for connection in self.connections:
+            connection.disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = len(self._sessions)
+        return {
+            "mode": self.mode,
+            "connections": len(self.connections),
+            "connected": sum(1 for c in self.connections if c.sock),
+            "idle": self._idle.qsize() if self.mode == "pool" else None,
+            "max_in_flight": self.max_in_flight,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "sessions": sessions,
+        }
@@ -0,0 +1,122 @@
+"""Low-overhead logging setup for the command hot path.
+
+Hot-path call sites log with %-style arguments so nothing is formatted
+unless a handler will emit the record, wrap large values in ``truncated``
+so they are cut down only when rendered, and can be sampled per logger.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Any, Dict, Optional
+
+ROOT_LOGGER = "BlenderMCPServer"
+SUBSYSTEMS = ("Connection", "Ollama", "Pool", "Metrics", "Simulator", "Tracing")
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class truncated:
+    """Defers ``repr`` of a value to format time and caps its length."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = 200):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = repr(self.value)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... ({len(text)} chars)"
+        return text
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """Passes a fraction of records below ``WARNING``; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are, so even the message is formatted on the listener thread.
+
+    The stock ``prepare`` renders the message on the caller's thread so the
+    record can be pickled, which an in-process queue doesn't need. Logged
+    arguments are rendered later, so they should not be mutated afterwards.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra={"fields": {...}}``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse ``"Connection=DEBUG,Pool=WARNING"`` into subsystem levels."""
+    levels: Dict[str, str] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        if not level:
+            raise ValueError(f"Invalid log level setting: {item!r} (expected NAME=LEVEL)")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: str = "INFO", subsystem_levels: Optional[Dict[str, str]] = None,
+                      sample_rate: float = 1.0, use_queue: bool = False,
+                      fmt: str = "text") -> None:
+    """Configure the root handler, per-subsystem levels, sampling and queueing.
+
+    Names in ``SUBSYSTEMS`` are children of ``BlenderMCPServer``; any other
+    name is used as given, so third-party loggers like ``httpx`` can be tuned too.
+    """
+    global _listener
+    handler: logging.Handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if use_queue:
+        # Formatting and I/O happen on the listener thread instead of the caller's.
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        handler = DeferredQueueHandler(log_queue)
+    if sample_rate < 1.0:
+        # On the outermost handler, so dropped records are never queued or formatted.
+        handler.addFilter(SamplingFilter(sample_rate))
+
+    logging.basicConfig(level=level.upper(), handlers=[handler], force=True)
+    for name, subsystem_level in (subsystem_levels or {}).items():
+        if name in SUBSYSTEMS:
+            name = f"{ROOT_LOGGER}.{name}"
+        logging.getLogger(name).setLevel(subsystem_level)
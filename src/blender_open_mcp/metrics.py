@@ -0,0 +1,260 @@
+"""Latency histograms and counters with Prometheus text exposition."""
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("BlenderMCPServer.Metrics")
+
+# Seconds; spans sub-millisecond socket phases up to long renders and generations.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = dict(self._series)
+        return self.header() + [f"{self.name}{_format_labels(self.label_names, k)} {v}"
+                                for k, v in sorted(series.items())]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {",".join(k) or "total": v for k, v in sorted(self._series.items())}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        lines = self.header()
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        """Estimate a quantile by linear interpolation within its bucket."""
+        target = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            if bucket_count and cumulative + bucket_count >= target:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (target - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        return lower
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        return {",".join(key) or "total": {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": self._quantile(counts, count, 0.50),
+            "p95": self._quantile(counts, count, 0.95),
+            "p99": self._quantile(counts, count, 0.99),
+        } for key, (counts, total, count) in sorted(series.items())}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = MetricsRegistry()
+
+COMMAND_PHASE_SECONDS = REGISTRY.histogram(
+    "blender_command_phase_seconds",
+    "Time spent in each phase of a Blender socket command",
+    ("command", "phase"))
+COMMAND_SECONDS = REGISTRY.histogram(
+    "blender_command_seconds",
+    "End-to-end Blender socket command latency",
+    ("command", "status"))
+ADDON_HANDLER_SECONDS = REGISTRY.histogram(
+    "blender_addon_handler_seconds",
+    "Handler execution time reported by the Blender addon",
+    ("command",))
+COMMANDS_IN_FLIGHT = REGISTRY.gauge(
+    "blender_commands_in_flight",
+    "Blender commands currently sent and awaiting a response")
+COMMAND_QUEUE_DEPTH = REGISTRY.gauge(
+    "blender_command_queue_depth",
+    "Blender commands waiting for a connection (server) or for their turn to run (addon)",
+    ("where",))
+COMMANDS_REJECTED = REGISTRY.counter(
+    "blender_commands_rejected_total",
+    "Commands turned away because the server's or addon's queue was full",
+    ("where",))
+COMMAND_RETRIES = REGISTRY.counter(
+    "blender_command_retries_total",
+    "Commands resent after a failed connection",
+    ("command",))
+SLOW_COMMANDS = REGISTRY.counter(
+    "blender_slow_commands_total",
+    "Commands that exceeded the addon's slow-command threshold",
+    ("command",))
+OLLAMA_PHASE_SECONDS = REGISTRY.histogram(
+    "ollama_request_phase_seconds",
+    "Ollama request latency by phase (queue, ttfb, total)",
+    ("phase",))
+OLLAMA_QUEUE_DEPTH = REGISTRY.gauge(
+    "ollama_queued_generations",
+    "Ollama generations waiting for a concurrency slot")
+OLLAMA_GENERATIONS_RUNNING = REGISTRY.gauge(
+    "ollama_generations_running",
+    "Ollama generations currently running")
+OLLAMA_COALESCED = REGISTRY.counter(
+    "ollama_coalesced_requests_total",
+    "Ollama requests answered by an identical generation already in flight")
+OLLAMA_BACKEND_OUTSTANDING = REGISTRY.gauge(
+    "ollama_backend_outstanding_requests",
+    "Generations in flight on each Ollama host",
+    ("backend",))
+OLLAMA_BACKEND_HEALTHY = REGISTRY.gauge(
+    "ollama_backend_healthy",
+    "Whether each Ollama host passed its last health check (1) or not (0)",
+    ("backend",))
+OLLAMA_BACKEND_FAILURES = REGISTRY.counter(
+    "ollama_backend_failures_total",
+    "Failed requests and health checks per Ollama host",
+    ("backend",))
+OLLAMA_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "ollama_tokens_per_second",
+    "Generation speed reported by Ollama",
+    (), buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400))
+OLLAMA_REQUESTS = REGISTRY.counter(
+    "ollama_requests_total",
+    "Ollama generation requests by outcome",
+    ("status",))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(host: str, port: int,
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread."""
+    httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+    httpd.daemon_threads = True
+    httpd.registry = registry or REGISTRY
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics available at http://{host}:{httpd.server_address[1]}/metrics")
+    return httpd
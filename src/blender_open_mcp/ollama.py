@@ -0,0 +1,328 @@
+"""Admission control and routing for Ollama generations.
+
+A generation keeps the model busy for seconds, and running many at once on
+one Ollama host thrashes GPU/CPU memory and slows every one of them.
+``GenerationLimiter`` caps how many run concurrently, queues the rest
+round-robin across sessions so one busy session can't starve the others,
+and lets identical requests that are already in flight share a single
+generation. ``OllamaBackendPool`` spreads the generations that run over
+several Ollama hosts.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Collection, Deque, Dict, Iterator, List, Optional, Set
+
+import httpx
+
+from .metrics import (OLLAMA_BACKEND_FAILURES, OLLAMA_BACKEND_HEALTHY, OLLAMA_BACKEND_OUTSTANDING,
+                      OLLAMA_COALESCED, OLLAMA_GENERATIONS_RUNNING, OLLAMA_QUEUE_DEPTH)
+
+logger = logging.getLogger("BlenderMCPServer.Ollama")
+
+
+def request_key(payload: Dict[str, Any]) -> str:
+    """Identity of a generation request: the same model, prompt, context and images."""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_name(name: str) -> str:
+    """``llama3.2`` and ``llama3.2:latest`` name the same model."""
+    return name if ":" in name or not name else f"{name}:latest"
+
+
+@dataclass
+class OllamaBackend:
+    url: str
+    healthy: bool = True
+    # Installed models (from /api/tags); None until the first successful probe.
+    models: Optional[Set[str]] = None
+    # Models currently in memory (from /api/ps, or that this server last ran here).
+    loaded: Set[str] = field(default_factory=set)
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    checked_at: float = 0.0
+
+    def rank(self, model: str) -> tuple:
+        """Sort key: healthy hosts with the model already loaded and the fewest requests in flight first."""
+        missing = bool(model) and self.models is not None and model not in self.models
+        cold = bool(model) and model not in self.loaded
+        return (not self.healthy, missing, cold, self.outstanding, self.requests)
+
+
+class OllamaBackendPool:
+    """Ollama hosts to spread generations over.
+
+    ``choose`` prefers healthy hosts that have the model loaded, then the
+    least-outstanding one. A background task probes ``/api/tags`` (and
+    ``/api/ps`` for loaded models) every ``probe_interval`` seconds. A host
+    that fails a request is marked down until a probe succeeds; until then
+    it is only tried once every healthy host has been.
+    """
+
+    def __init__(self, urls: Collection[str], probe_interval: float = 10.0):
+        self.backends: List[OllamaBackend] = []
+        self.probe_interval = probe_interval
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.set_urls(urls)
+
+    def set_urls(self, urls: Collection[str]) -> None:
+        """Replace the host list, keeping what is known about hosts that stay."""
+        if not urls:
+            raise ValueError("At least one Ollama URL is required")
+        known = {backend.url: backend for backend in self.backends}
+        self.backends = [known.get(url.rstrip("/")) or OllamaBackend(url.rstrip("/")) for url in urls]
+        for backend in self.backends:
+            OLLAMA_BACKEND_HEALTHY.set(int(backend.healthy), backend=backend.url)
+
+    @property
+    def urls(self) -> List[str]:
+        return [backend.url for backend in self.backends]
+
+    @property
+    def healthy_count(self) -> int:
+        return sum(1 for backend in self.backends if backend.healthy)
+
+    def choose(self, model: str, exclude: Collection[str] = ()) -> Optional[OllamaBackend]:
+        """The best host for ``model`` not in ``exclude`` (URLs already tried), or None."""
+        model = model_name(model)
+        candidates = [backend for backend in self.backends if backend.url not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda backend: backend.rank(model))
+
+    @contextmanager
+    def lease(self, backend: OllamaBackend) -> Iterator[OllamaBackend]:
+        """Count a request against ``backend`` while it is outstanding."""
+        backend.outstanding += 1
+        backend.requests += 1
+        OLLAMA_BACKEND_OUTSTANDING.set(backend.outstanding, backend=backend.url)
+        try:
+            yield backend
+        finally:
+            backend.outstanding -= 1
+            OLLAMA_BACKEND_OUTSTANDING.set(backend.outstanding, backend=backend.url)
+
+    def mark_served(self, backend: OllamaBackend, model: str) -> None:
+        backend.loaded.add(model_name(model))
+        if not backend.healthy:
+            self._set_health(backend, True)
+
+    def mark_missing(self, backend: OllamaBackend, model: str) -> None:
+        """The host answered that it doesn't have ``model``."""
+        if backend.models is not None:
+            backend.models.discard(model_name(model))
+        backend.loaded.discard(model_name(model))
+
+    def mark_down(self, backend: OllamaBackend, error: Any) -> None:
+        backend.failures += 1
+        OLLAMA_BACKEND_FAILURES.inc(backend=backend.url)
+        if backend.healthy:
+            logger.warning("Ollama backend %s marked down: %s", backend.url, error)
+            self._set_health(backend, False)
+
+    def _set_health(self, backend: OllamaBackend, healthy: bool) -> None:
+        backend.healthy = healthy
+        OLLAMA_BACKEND_HEALTHY.set(int(healthy), backend=backend.url)
+        if healthy:
+            logger.info("Ollama backend %s is up", backend.url)
+
+    async def probe(self) -> None:
+        """Check every host now."""
+        async with httpx.AsyncClient() as client:
+            await asyncio.gather(*(self._probe(client, backend) for backend in self.backends))
+
+    async def _probe(self, client: httpx.AsyncClient, backend: OllamaBackend) -> None:
+        try:
+            response = await client.get(f"{backend.url}/api/tags", timeout=5.0)
+            response.raise_for_status()
+            backend.models = {model_name(model["name"]) for model in response.json().get("models", [])}
+        except Exception as e:
+            self.mark_down(backend, e)
+            return
+        finally:
+            backend.checked_at = time.time()
+        try:
+            response = await client.get(f"{backend.url}/api/ps", timeout=5.0)
+            if response.status_code == 200:
+                backend.loaded = {model_name(model["name"]) for model in response.json().get("models", [])}
+        except Exception:
+            pass  # Older Ollama versions have no /api/ps; keep what we have seen served.
+        if not backend.healthy:
+            self._set_health(backend, True)
+
+    def start(self) -> None:
+        """Probe in the background on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._probe_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe_loop(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Ollama health probe failed: {e!s}")
+            await asyncio.sleep(self.probe_interval)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [{
+            "url": backend.url,
+            "healthy": backend.healthy,
+            "outstanding": backend.outstanding,
+            "requests": backend.requests,
+            "failures": backend.failures,
+            "models": sorted(backend.models) if backend.models is not None else None,
+            "loaded": sorted(backend.loaded),
+        } for backend in self.backends]
+
+
+class _Flight:
+    """One running generation and the number of callers still waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class GenerationLimiter:
+    """At most ``max_concurrent`` generations per backend, queued fairly, duplicates shared.
+
+    ``backends`` returns how many Ollama hosts are serving, so capacity
+    follows the pool as hosts fail and recover. Waiters are plain futures
+    created on the running loop, so one limiter works from whichever event
+    loop calls it.
+    """
+
+    def __init__(self, max_concurrent: int = 2, backends: Callable[[], int] = lambda: 1):
+        if max_concurrent < 1:
+            raise ValueError("Ollama concurrency limit must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.backends = backends
+        self.running = 0
+        self.coalesced = 0
+        # session -> its waiters in arrival order; sessions take turns.
+        self._queues: "OrderedDict[Optional[str], Deque[asyncio.Future]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+
+    @property
+    def limit(self) -> int:
+        return self.max_concurrent * max(1, self.backends())
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._queues.values())
+
+    async def run(self, key: str, generate: Callable[[], Awaitable[Any]],
+                  session: Optional[str] = None) -> Any:
+        """Return ``await generate()``, run under the limit or shared with an identical call.
+
+        The generation is cancelled only once every caller waiting for it
+        has been cancelled.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(self._admitted(generate, session))
+            flight = self._flights[key] = _Flight(task)
+            task.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.coalesced += 1
+            OLLAMA_COALESCED.inc()
+            logger.debug("Sharing an in-flight generation with %d other caller(s)", flight.waiters)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _land(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._flights.get(key) is not None and self._flights[key].task is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller has gone.
+
+    async def _admitted(self, generate: Callable[[], Awaitable[Any]], session: Optional[str]) -> Any:
+        await self._acquire(session)
+        try:
+            return await generate()
+        finally:
+            self._release()
+
+    async def _acquire(self, session: Optional[str]) -> None:
+        if self.running < self.limit and not self._queues:
+            self._set_running(self.running + 1)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(session, deque()).append(waiter)
+        OLLAMA_QUEUE_DEPTH.set(self.queued)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self._forget(session, waiter)
+            else:
+                # Granted a slot in the same instant as being cancelled; pass it on.
+                self._release()
+            raise
+
+    def _forget(self, session: Optional[str], waiter: "asyncio.Future") -> None:
+        waiters = self._queues.get(session)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._queues[session]
+        OLLAMA_QUEUE_DEPTH.set(self.queued)
+
+    def _release(self) -> None:
+        self._set_running(self.running - 1)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting sessions in turn."""
+        while self._queues and self.running < self.limit:
+            session, waiters = next(iter(self._queues.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._queues.move_to_end(session)
+            else:
+                del self._queues[session]
+            if not waiter.done():
+                waiter.set_result(None)
+                self._set_running(self.running + 1)
+        OLLAMA_QUEUE_DEPTH.set(self.queued)
+
+    def _set_running(self, running: int) -> None:
+        self.running = running
+        OLLAMA_GENERATIONS_RUNNING.set(running)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "limit": self.limit,
+            "running": self.running,
+            "queued": self.queued,
+            "sessions_waiting": len(self._queues),
+            "in_flight_requests": len(self._flights),
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,240 @@
+"""Pool of headless Blender worker processes behind one MCP server."""
+import logging
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger("BlenderMCPServer.Pool")
+
+# Commands that do not depend on a session's scene state and can run on any worker.
+# Renders and downloads stay on the session's worker: a render reads its scene,
+# and a download loads images that a later set_texture must find there.
+STATELESS_COMMANDS = {
+    "get_polyhaven_categories",
+    "search_polyhaven_assets",
+}
+
+DEFAULT_ADDON_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "addon.py"))
+
+
+@dataclass
+class BlenderWorker:
+    index: int
+    port: int
+    process: Optional[subprocess.Popen] = None
+    connection: Any = None
+    in_flight: int = 0
+    failures: int = 0
+    restarts: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def send_command(self, command_type: str, params: Optional[Dict[str, Any]] = None,
+                     **options: Any) -> Dict[str, Any]:
+        # A worker's socket carries one request/response at a time.
+        with self.lock:
+            return self.connection.send_command(command_type, params, **options)
+
+
+class WorkerSession:
+    """Connection-like handle that routes one MCP session's commands through the pool."""
+
+    def __init__(self, pool: "BlenderWorkerPool", session_id: Optional[str]):
+        self.pool = pool
+        self.session_id = session_id
+
+    def send_command(self, command_type: str, params: Optional[Dict[str, Any]] = None,
+                     **options: Any) -> Dict[str, Any]:
+        worker = self.pool.acquire(self.session_id, command_type)
+        try:
+            result = worker.send_command(command_type, params, **options)
+        except self.pool.transport_errors:
+            # Errors the addon reports itself (bad arguments, busy) say nothing about the worker.
+            worker.failures += 1
+            raise
+        else:
+            worker.failures = 0
+            return result
+        finally:
+            self.pool.release(worker)
+
+    def disconnect(self) -> None:
+        self.pool.forget_session(self.session_id)
+
+
+class BlenderWorkerPool:
+    """Spawns ``blender -b`` workers running the addon and routes commands to them.
+
+    Session commands stick to one worker so scene state stays consistent;
+    commands in ``STATELESS_COMMANDS`` go to the least-loaded worker. A
+    background thread restarts workers that exit or fail health checks.
+    Only ``transport_errors`` (the connection failing or timing out) count
+    towards a worker's ``max_failures``.
+    """
+
+    def __init__(self, size: int, connection_factory: Callable[[str, int], Any],
+                 blender_executable: str = "blender", addon_path: str = DEFAULT_ADDON_PATH,
+                 base_port: int = 9900, host: str = "localhost",
+                 health_interval: float = 5.0, max_failures: int = 3,
+                 startup_timeout: float = 60.0, polyhaven: bool = False,
+                 transport_errors: Tuple[Type[BaseException], ...] = (OSError,)):
+        if size < 1:
+            raise ValueError("Worker pool size must be at least 1")
+        self.size = size
+        self.connection_factory = connection_factory
+        self.blender_executable = blender_executable
+        self.addon_path = addon_path
+        self.host = host
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self.startup_timeout = startup_timeout
+        self.polyhaven = polyhaven
+        self.transport_errors = transport_errors
+        self.workers: List[BlenderWorker] = [
+            BlenderWorker(index=i, port=base_port + i) for i in range(size)]
+        self.sessions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        for worker in self.workers:
+            self._spawn(worker)
+        self._stop.clear()
+        self._health_thread = threading.Thread(
+            target=self._health_loop, name="blender-worker-health", daemon=True)
+        self._health_thread.start()
+        logger.info(f"Started {self.size} Blender workers on ports "
+                    f"{self.workers[0].port}-{self.workers[-1].port}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._health_thread:
+            self._health_thread.join(timeout=self.health_interval + 1)
+            self._health_thread = None
+        for worker in self.workers:
+            self._terminate(worker)
+        self.sessions.clear()
+        logger.info("Blender worker pool stopped")
+
+    def session(self, session_id: Optional[str] = None) -> WorkerSession:
+        return WorkerSession(self, session_id)
+
+    def acquire(self, session_id: Optional[str], command_type: str) -> BlenderWorker:
+        with self._lock:
+            live = [w for w in self.workers if w.alive and w.connection is not None]
+            if not live:
+                raise ConnectionError("No Blender workers available")
+            worker = None
+            if session_id is not None and command_type not in STATELESS_COMMANDS:
+                index = self.sessions.get(session_id)
+                if index is not None and self.workers[index] in live:
+                    worker = self.workers[index]
+                else:
+                    worker = self._least_loaded(live, by_sessions=True)
+                    if index is not None:
+                        logger.warning(f"Session {session_id} moved to worker {worker.index}; "
+                                       f"scene state from worker {index} is lost")
+                    self.sessions[session_id] = worker.index
+            if worker is None:
+                worker = self._least_loaded(live)
+            worker.in_flight += 1
+            return worker
+
+    def release(self, worker: BlenderWorker) -> None:
+        with self._lock:
+            worker.in_flight -= 1
+
+    def forget_session(self, session_id: Optional[str]) -> None:
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{
+                "index": w.index,
+                "port": w.port,
+                "alive": w.alive,
+                "in_flight": w.in_flight,
+                "sessions": sum(1 for i in self.sessions.values() if i == w.index),
+                "restarts": w.restarts,
+            } for w in self.workers]
+
+    def _least_loaded(self, live: List[BlenderWorker], by_sessions: bool = False) -> BlenderWorker:
+        if by_sessions:
+            counts = {w.index: 0 for w in live}
+            for index in self.sessions.values():
+                if index in counts:
+                    counts[index] += 1
+            return min(live, key=lambda w: (counts[w.index], w.in_flight))
+        return min(live, key=lambda w: w.in_flight)
+
+    def _spawn(self, worker: BlenderWorker) -> None:
+        cmd = [self.blender_executable, "-b", "--factory-startup",
+               "--python", self.addon_path, "--", "--port", str(worker.port)]
+        if self.polyhaven:
+            cmd.append("--polyhaven")
+        logger.info(f"Spawning Blender worker {worker.index}: {' '.join(cmd)}")
+        worker.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        worker.failures = 0
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline and worker.alive:
+            connection = self.connection_factory(self.host, worker.port)
+            if connection.connect():
+                worker.connection = connection
+                return
+            time.sleep(0.5)
+        logger.error(f"Blender worker {worker.index} did not come up on port {worker.port}")
+
+    def _terminate(self, worker: BlenderWorker) -> None:
+        if worker.connection is not None:
+            worker.connection.disconnect()
+            worker.connection = None
+        if worker.process is not None:
+            if worker.process.poll() is None:
+                worker.process.terminate()
+                try:
+                    worker.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    worker.process.kill()
+            worker.process = None
+
+    def _restart(self, worker: BlenderWorker) -> None:
+        logger.warning(f"Restarting Blender worker {worker.index} on port {worker.port}")
+        with worker.lock:
+            self._terminate(worker)
+            self._spawn(worker)
+        worker.restarts += 1
+
+    def _check(self, worker: BlenderWorker) -> bool:
+        if not worker.alive or worker.connection is None:
+            return False
+        if worker.failures >= self.max_failures:
+            return False
+        # Don't queue a probe behind a long-running command; in-flight work proves liveness.
+        if not worker.lock.acquire(blocking=False):
+            return True
+        try:
+            worker.connection.send_command("get_polyhaven_status")
+            worker.failures = 0
+        except Exception as e:
+            worker.failures += 1
+            logger.warning(f"Health check failed for worker {worker.index}: {e!s}")
+        finally:
+            worker.lock.release()
+        return worker.failures < self.max_failures
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            for worker in self.workers:
+                if self._stop.is_set():
+                    return
+                if not self._check(worker):
+                    self._restart(worker)
@@ -3,28 +3,102 @@ from mcp.server.fastmcp import FastMCP, Context, Image
 import socket
 import json
 import asyncio
+import itertools
 import logging
+import threading
+from collections import deque
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import httpx
 from io import BytesIO
 import base64
+import functools
 import argparse
 import os
+import random
+import time
+import weakref
 from urllib.parse import urlparse
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from .log import TEXT_FORMAT, configure_logging, parse_levels, truncated
+from .metrics import (REGISTRY, COMMAND_PHASE_SECONDS, COMMAND_SECONDS, ADDON_HANDLER_SECONDS,
+                      OLLAMA_PHASE_SECONDS, OLLAMA_TOKENS_PER_SECOND, OLLAMA_REQUESTS, SLOW_COMMANDS,
+                      COMMAND_RETRIES, COMMAND_QUEUE_DEPTH, COMMANDS_REJECTED, start_metrics_server)
+from .codec import COMPRESS_THRESHOLD, JsonStream, make_stream, offered_codecs, offered_compression
+from .connections import BlenderBusyError, ConnectionManager
+from .ollama import GenerationLimiter, OllamaBackend, OllamaBackendPool, request_key
+from .pool import BlenderWorkerPool, DEFAULT_ADDON_PATH
+from .timeouts import TIMEOUTS, AdaptiveTimeouts, parse_budgets
+from .tracing import TRACER, KIND_CLIENT, KIND_SERVER, Span, configure_tracing, traced
+
+# Configure logging (main() reconfigures from the command line)
+logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT)
 logger = logging.getLogger("BlenderMCPServer")
+conn_logger = logging.getLogger("BlenderMCPServer.Connection")
+ollama_logger = logging.getLogger("BlenderMCPServer.Ollama")
+
+# Read-only commands that are safe to resend after the connection drops mid-command.
+IDEMPOTENT_COMMANDS = frozenset({
+    "get_polyhaven_status",
+    "get_scene_info",
+    "get_object_info",
+    "get_objects_info",
+    "get_properties",
+    "query_nearest",
+    "query_radius",
+    "query_bbox",
+    "get_polyhaven_categories",
+    "search_polyhaven_assets",
+})
+
+# Longest gap between heartbeats requested from the addon while a command runs.
+HEARTBEAT_INTERVAL = 2.0
+
+class BlenderCommandError(Exception):
+    """The addon ran a command and reported an error."""
+
+class BlenderConnectionError(Exception):
+    """The connection to the addon failed.
+
+    ``sent`` is False when the command never left the server, so it is safe
+    to retry whatever it does. ``retry_after`` is set while reconnects are
+    backing off: the seconds until the next attempt.
+    """
+
+    def __init__(self, message: str, sent: bool = True, retry_after: Optional[float] = None):
+        if retry_after is not None:
+            message = f"{message}; retry after {retry_after:.1f}s"
+        super().__init__(message)
+        self.sent = sent
+        self.retry_after = retry_after
+
+class BlenderTimeoutError(BlenderConnectionError):
+    """The addon did not answer in time; the command may still be running."""
 
 @dataclass
 class BlenderConnection:
     host: str
     port: int
     sock: Optional[socket.socket] = None
+    # Unix domain socket to use instead of TCP when Blender runs on this host.
+    socket_path: Optional[str] = None
     timeout: float = 15.0  # Added timeout as a property
+    # Reconnect attempts back off exponentially with full jitter, capped at reconnect_max.
+    reconnect_base: float = 0.25
+    reconnect_max: float = 10.0
+    max_retries: int = 3
+    timeouts: AdaptiveTimeouts = field(default_factory=lambda: TIMEOUTS, repr=False)
+    # "auto" uses MessagePack when the C extension is installed, else JSON.
+    codec: str = "auto"
+    # "auto" compresses large frames only when Blender is on another host.
+    compression: str = "auto"
+    compress_threshold: int = COMPRESS_THRESHOLD
+    stream: Any = field(default_factory=JsonStream, init=False, repr=False)
+    # Commands the addon lets this connection have outstanding, if it set a limit.
+    credits: Optional[int] = field(default=None, init=False, repr=False)
+    _failures: int = field(default=0, init=False, repr=False)
+    _next_attempt: float = field(default=0.0, init=False, repr=False)
 
     def __post_init__(self):
          if not isinstance(self.host, str):
@@ -32,17 +106,37 @@ class BlenderConnection:
          if not isinstance(self.port, int):
              raise ValueError("Port must be an int")
 
+    @property
+    def address(self) -> str:
+        return self.socket_path or f"{self.host}:{self.port}"
+
     def connect(self) -> bool:
         if self.sock:
             return True
+        if time.monotonic() < self._next_attempt:
+            # Still backing off from the last failure; don't hammer a restarting Blender.
+            return False
         try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.connect((self.host, self.port))
-            logger.info(f"Connected to Blender at {self.host}:{self.port}")
+            if self.socket_path:
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.sock.connect(self.socket_path)
+            else:
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.sock.connect((self.host, self.port))
+            conn_logger.info(f"Connected to Blender at {self.address}")
             self.sock.settimeout(self.timeout) # Set timeout on socket
+            self.stream = JsonStream()
+            self._negotiate()
+            self._failures = 0
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to Blender: {e!s}")
+            if self.sock:
+                self.sock.close()
+            self._failures += 1
+            delay = random.uniform(0, min(self.reconnect_max, self.reconnect_base * 2 ** self._failures))
+            self._next_attempt = time.monotonic() + delay
+            conn_logger.error(f"Failed to connect to Blender: {e!s} "
+                              f"(attempt {self._failures}, next in {delay:.2f}s)")
             self.sock = None
             return False
 
@@ -51,124 +145,380 @@ class BlenderConnection:
             try:
                 self.sock.close()
             except Exception as e:
-                logger.error(f"Error disconnecting: {e!s}")
+                conn_logger.error(f"Error disconnecting: {e!s}")
             finally:
                 self.sock = None
 
-    def _receive_full_response(self, buffer_size: int = 8192) -> bytes:
-        """Receive data with timeout using a loop."""
-        chunks: List[bytes] = []
-        timed_out = False
+    def _receive_full_response(self, buffer_size: int = 8192, idle: Optional[float] = None,
+                               deadline: Optional[float] = None) -> Tuple[Dict[str, Any], int]:
+        """Receive one response with timeout using a loop; returns it and its size in bytes.
+
+        Heartbeats from the addon are skipped; each one restarts the ``idle``
+        timer, but never past the ``deadline`` (a ``time.perf_counter`` value).
+        """
+        received_bytes = 0
+        self._first_byte_at = None
         try:
             while True:
                 try:
+                    if deadline is not None:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            raise socket.timeout("Command deadline passed")
+                        self.sock.settimeout(min(idle or remaining, remaining))
                     chunk = self.sock.recv(buffer_size)
+                    if self._first_byte_at is None:
+                        self._first_byte_at = time.perf_counter()
                     if not chunk:
-                        if not chunks:
+                        if not self.stream.pending:
                             # Requirement 1b
                             raise Exception("Connection closed by Blender before any data was sent in this response")
                         else:
                             # Requirement 1a
-                            raise Exception("Connection closed by Blender mid-stream with incomplete JSON data")
-                    chunks.append(chunk)
-                    try:
-                        data = b''.join(chunks)
-                        json.loads(data.decode('utf-8'))  # Check if it is valid json
-                        logger.debug(f"Received response ({len(data)} bytes)")
-                        return data # Complete JSON received
-                    except json.JSONDecodeError:
-                        # Incomplete JSON, continue receiving
-                        continue
+                            raise Exception(f"Connection closed by Blender mid-stream with incomplete {self.stream.name} data")
+                    received_bytes += len(chunk)
+                    self._received_at = time.perf_counter()
+                    for message in self.stream.feed(chunk):
+                        if message.get("status") != "heartbeat":
+                            conn_logger.debug("Received response (%d bytes)", received_bytes)
+                            return message, received_bytes
+                        # Blender is busy but alive; keep waiting for the real response.
+                        self._first_byte_at = None
                 except socket.timeout:
-                    logger.warning("Socket timeout during receive")
-                    timed_out = True # Set flag
-                    break # Stop listening to socket
+                    conn_logger.warning("Socket timeout during receive")
+                    if self.stream.pending:
+                        # Requirement 2a
+                        raise socket.timeout(f"Incomplete {self.stream.name} data received before timeout "
+                                             f"({self.stream.pending} pending)")
+                    # Requirement 2b
+                    raise socket.timeout("Timeout waiting for response, no data received.")
                 except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
-                    logger.error(f"Socket connection error: {e!s}")
+                    conn_logger.error(f"Socket connection error: {e!s}")
                     self.sock = None
                     raise # re-raise to outer error handler
-            
-            # This part is reached if loop is broken by 'break' (only timeout case now)
-            if timed_out:
-                if chunks:
-                    data = b''.join(chunks)
-                    # Check if the partial data is valid JSON (it shouldn't be if timeout happened mid-stream)
-                    try:
-                        json.loads(data.decode('utf-8'))
-                        # This case should ideally not be hit if JSON was incomplete,
-                        # but if it's somehow valid, return it.
-                        logger.warning("Timeout occurred, but received data forms valid JSON.")
-                        return data
-                    except json.JSONDecodeError:
-                        # Requirement 2a
-                        raise Exception(f"Incomplete JSON data received before timeout. Received: {data[:200]}")
-                else:
-                    # Requirement 2b
-                    raise Exception("Timeout waiting for response, no data received.")
-            
-            # Fallback if loop exited for a reason not covered by explicit raises inside or by timeout logic
-            # This should ideally not be reached with the current logic.
-            if chunks: # Should have been handled by "Connection closed by Blender mid-stream..."
-                data = b''.join(chunks)
-                logger.warning(f"Exited receive loop unexpectedly with data: {data[:200]}")
-                raise Exception("Receive loop ended unexpectedly with partial data.")
-            else: # Should have been handled by "Connection closed by Blender before any data..." or timeout
-                logger.warning("Exited receive loop unexpectedly with no data.")
-                raise Exception("Receive loop ended unexpectedly with no data.")
 
         except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
             # This handles connection errors raised from within the loop or if self.sock.recv fails
-            logger.error(f"Connection error during receive: {e!s}")
+            conn_logger.error(f"Connection error during receive: {e!s}")
             self.sock = None # Ensure socket is reset
             # Re-raise with a more specific message if needed, or just re-raise
             raise Exception(f"Connection to Blender lost during receive: {e!s}")
         except Exception as e: 
             # Catch other exceptions, including our custom ones, and log them
-            logger.error(f"Error during _receive_full_response: {e!s}")
+            conn_logger.error(f"Error during _receive_full_response: {e!s}")
             # If it's not one of the specific connection errors, it might be one of our custom messages
             # or another unexpected issue. Re-raise to be handled by send_command.
             raise
 
+    def _negotiate(self) -> None:
+        """Agree on a wire codec and compression with the addon; older addons simply stay on JSON."""
+        offered = offered_codecs(self.codec)
+        compression = offered_compression(self.compression, "localhost" if self.socket_path else self.host)
+        if offered == ["json"] and not compression:
+            return
+        self.sock.sendall(self.stream.encode({"type": "hello", "params": {
+            "codecs": offered, "native_only": self.codec == "auto",
+            "compression": compression, "compress_threshold": self.compress_threshold}}))
+        try:
+            response, _ = self._receive_full_response()
+        except Exception as e:
+            raise ConnectionError(f"Codec negotiation failed: {e!s}")
+        result = response.get("result") or {}
+        codec = result.get("codec", "json")
+        chosen = result.get("compression")
+        if response.get("status") == "success" and codec in offered and chosen in compression + [None]:
+            self.stream = make_stream(codec, chosen, self.compress_threshold)
+            self.credits = result.get("credits")
+        conn_logger.info(f"Using {self.stream.name} codec with Blender at {self.address}")
+
+    def _reset(self, error: Exception) -> None:
+         """Drop the socket after a failed exchange; the next command reconnects."""
+         self.sock = None
+
+    def _exchange(self, command: Dict[str, Any], idle: float,
+                  deadline: float) -> Tuple[Dict[str, Any], int, float, float, float, float]:
+         """Send one command and wait for its response.
+
+         Returns the response, its size in bytes, and the perf_counter times at
+         which the request was sent, the first response byte arrived, the
+         response was complete and it was parsed.
+         """
+         self.sock.settimeout(idle)
+         self.sock.sendall(self.stream.encode(command))
+         sent = time.perf_counter()
+         response, size = self._receive_full_response(idle=idle, deadline=deadline)
+         # Decoding is incremental, so "parse" covers the final chunk only.
+         received = self._received_at
+         return response, size, sent, self._first_byte_at or received, received, time.perf_counter()
+
+    def send_command(self, command_type: str, params: Optional[Dict[str, Any]] = None,
+                     profile: Optional[Dict[str, Any]] = None,
+                     timeout: Optional[float] = None, priority: Optional[int] = None) -> Dict[str, Any]:
+         """Send a command and return its result.
 
-    def send_command(self, command_type: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+         ``profile`` (``top``, ``sort``, ``output``) runs the addon handler under
+         cProfile; the result is then ``{"result": ..., "profile": ...}``.
+         ``timeout`` replaces the command's adaptive timeout and budget.
+         ``priority`` overrides the addon's scheduling priority for it (lower runs first).
+         """
+         with TRACER.span(f"blender.{command_type}", KIND_CLIENT, command=command_type) as span:
+              for attempt in itertools.count(1):
+                   try:
+                        return self._send_command(command_type, params, span, profile, timeout, priority)
+                   except BlenderConnectionError as e:
+                        # Resend only what can't have run twice: unsent commands and reads.
+                        retryable = not e.sent or (command_type in IDEMPOTENT_COMMANDS
+                                                   and not isinstance(e, BlenderTimeoutError))
+                        if not retryable or attempt > self.max_retries:
+                             raise
+                        # Fail fast while backing off rather than hold the connection
+                        # slot (and everything queued behind it) asleep.
+                        delay = self._next_attempt - time.monotonic()
+                        if delay > 0:
+                             raise BlenderConnectionError(
+                                 f"Blender at {self.address} is unavailable", e.sent, delay) from e
+                        COMMAND_RETRIES.inc(command=command_type)
+                        conn_logger.warning("Retrying %s (attempt %d): %s", command_type, attempt, e)
+
+    def _send_command(self, command_type: str, params: Optional[Dict[str, Any]], span: Optional[Span],
+                      profile: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None, priority: Optional[int] = None) -> Dict[str, Any]:
          if not self.sock and not self.connect():
-            raise ConnectionError("Not connected")
-         command = {"type": command_type, "params": params or {}}
+            raise BlenderConnectionError(f"Not connected to Blender at {self.address}", sent=False)
+         budget = timeout or self.timeouts.budget(command_type)
+         idle = timeout or self.timeouts.idle_timeout(command_type)
+         # The addon refuses commands that sat queued past their budget, and sends
+         # heartbeats while a long one runs so the idle timer doesn't expire.
+         command = {"type": command_type, "params": params or {}, "deadline": budget,
+                    "heartbeat": min(HEARTBEAT_INTERVAL, idle / 2)}
+         if span is not None:
+              command["trace"] = span.context()
+         if profile is not None:
+              command["profile"] = profile
+         if priority is not None:
+              command["priority"] = priority
+         started = time.perf_counter()
+         started_ns = time.time_ns()
+         status = "error"
          try:
-              logger.info(f"Sending command: {command_type} with params: {params}")
-              self.sock.sendall(json.dumps(command).encode('utf-8'))
-              logger.info(f"Command sent, waiting for response...")
-              response_data = self._receive_full_response()
-              logger.debug(f"Received response ({len(response_data)} bytes)")
-              response = json.loads(response_data.decode('utf-8'))
-              logger.info(f"Response status: {response.get('status', 'unknown')}")
+              conn_logger.debug("Sending command: %s with params: %s", command_type, truncated(params))
+              response, size, sent, first_byte, received, parsed = self._exchange(command, idle, started + budget)
+              COMMAND_PHASE_SECONDS.observe(sent - started, command=command_type, phase="send")
+              COMMAND_PHASE_SECONDS.observe(first_byte - sent, command=command_type, phase="wait")
+              COMMAND_PHASE_SECONDS.observe(received - first_byte, command=command_type, phase="receive")
+              COMMAND_PHASE_SECONDS.observe(parsed - received, command=command_type, phase="parse")
+              handler_time = (response.get("timing") or {}).get("handler")
+              if handler_time is not None:
+                  ADDON_HANDLER_SECONDS.observe(handler_time, command=command_type)
+              slow_profile = response.get("slow_profile")
+              if slow_profile:
+                  SLOW_COMMANDS.inc(command=command_type)
+                  _slow_profiles.append({"command": command_type, "handler_time": handler_time, **slow_profile})
+                  conn_logger.warning("Slow Blender command %s (%.2fs); hottest: %s", command_type,
+                                      handler_time or 0.0, truncated(slow_profile.get("top", [])[:3], 300))
+              if span is not None:
+                  to_ns = lambda t: started_ns + int((t - started) * 1e9)
+                  for phase, begin, end in (("send", started, sent), ("wait", sent, first_byte),
+                                            ("receive", first_byte, received), ("parse", received, parsed)):
+                      TRACER.record(f"socket.{phase}", to_ns(begin), to_ns(end), span)
+                  for remote in response.get("spans", ()):
+                      TRACER.record(remote["name"], remote["start_ns"], remote["end_ns"], span,
+                                    KIND_SERVER, **remote.get("attributes", {}))
+              conn_logger.debug("Response status for %s: %s (%d bytes)", command_type,
+                                response.get('status', 'unknown'), size)
+              if "queued" in response:
+                  COMMAND_QUEUE_DEPTH.set(response["queued"], where="addon")
+              if response.get("status") == "error" and "retry_after" in response:
+                  # Refused before it ran, so trying again later is always safe.
+                  COMMANDS_REJECTED.inc(where="addon")
+                  raise BlenderBusyError(response.get("message", "Blender is busy"), response["retry_after"])
               if response.get("status") == "error":
-                 logger.error(f"Blender error: {response.get('message')}")
-                 raise Exception(response.get("message", "Unknown Blender error"))
+                 conn_logger.error(f"Blender error: {response.get('message')}")
+                 raise BlenderCommandError(response.get("message", "Unknown Blender error"))
+              status = "success"
+              self.timeouts.observe(command_type, parsed - started)
               return response.get("result", {})
 
-         except socket.timeout:
-             logger.error("Socket timeout from Blender")
-             self.sock = None # reset socket connection
-             raise Exception("Timeout waiting for Blender - simplify request")
+         except (BlenderCommandError, BlenderBusyError):
+             # The addon answered; the connection itself is still good.
+             raise
+
+         except socket.timeout as e:
+             conn_logger.error("Socket timeout from Blender")
+             self._reset(e)
+             raise BlenderTimeoutError("Timeout waiting for Blender - simplify request")
          except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
-             logger.error(f"Socket connection error: {e!s}")
-             self.sock = None # reset socket connection
-             raise Exception(f"Connection to Blender lost: {e!s}")
+             conn_logger.error(f"Socket connection error: {e!s}")
+             self._reset(e)
+             raise BlenderConnectionError(f"Connection to Blender lost: {e!s}")
          except json.JSONDecodeError as e:
-             logger.error(f"Invalid JSON response: {e!s}")
-             if 'response_data' in locals() and response_data:
-                logger.error(f"Raw (first 200): {response_data[:200]}")
+             conn_logger.error(f"Invalid JSON response: {e!s}")
              raise Exception(f"Invalid response from Blender: {e!s}")
          except Exception as e:
-              logger.error(f"Error communicating with Blender: {e!s}")
-              self.sock = None # reset socket connection
-              raise Exception(f"Communication error: {e!s}")
+              conn_logger.error(f"Error communicating with Blender: {e!s}")
+              self._reset(e)
+              raise BlenderConnectionError(f"Communication error: {e!s}")
+         finally:
+              COMMAND_SECONDS.observe(time.perf_counter() - started, command=command_type, status=status)
+
+
+class _PendingResponse:
+    __slots__ = ("event", "response", "size", "first_byte", "received", "parsed", "error",
+                 "idle", "idle_until")
+
+    def __init__(self, idle: float):
+        self.event = threading.Event()
+        self.error: Optional[Exception] = None
+        self.idle = idle
+        self.idle_until = time.perf_counter() + idle
+
+
+class MultiplexedBlenderConnection(BlenderConnection):
+    """One socket carrying many concurrent commands, matched to responses by ``id``.
+
+    A reader thread decodes responses as they arrive and wakes the caller
+    waiting on each id, so a slow command does not hold the socket and a
+    timed-out command does not tear it down for everyone else.
+    """
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, _PendingResponse] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Signalled whenever a request stops being outstanding, returning its credit.
+        self._credit = threading.Condition(self._lock)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def connect(self) -> bool:
+        with self._lock:
+            if self.sock:
+                return True
+            if not super().connect():
+                return False
+            sock = self.sock
+            # Waiters enforce per-command timeouts; the reader blocks indefinitely.
+            sock.settimeout(None)
+        threading.Thread(target=self._read_loop, args=(sock, self.stream), name="blender-mux-reader",
+                         daemon=True).start()
+        return True
+
+    def disconnect(self) -> None:
+        with self._lock:
+            sock, self.sock = self.sock, None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _reset(self, error: Exception) -> None:
+        # Other commands share the socket, so only drop it when the transport failed.
+        if isinstance(error, OSError) and not isinstance(error, socket.timeout):
+            self.disconnect()
+
+    def _exchange(self, command: Dict[str, Any], idle: float,
+                  deadline: float) -> Tuple[Dict[str, Any], int, float, float, float, float]:
+         request_id = next(self._ids)
+         command["id"] = request_id
+         waiter = _PendingResponse(idle)
+         stream = self.stream
+         data = stream.encode(command)
+         with self._lock:
+              # Never have more outstanding than the addon granted credits for.
+              while self.credits and len(self._pending) >= self.credits:
+                   if not self._credit.wait(deadline - time.perf_counter()):
+                        COMMANDS_REJECTED.inc(where="server")
+                        raise BlenderBusyError(f"No credit from Blender for request {request_id}", idle)
+              sock = self.sock
+              if sock is None:
+                   raise ConnectionError("Not connected")
+              if self.stream is not stream:
+                   # A (re)connect negotiated a different codec since this was encoded.
+                   data = self.stream.encode(command)
+              self._pending[request_id] = waiter
+         try:
+              with self._write_lock:
+                   sock.sendall(data)
+         except OSError:
+              self._release(request_id)
+              raise
+         sent = time.perf_counter()
+         # Heartbeats push idle_until forward; the deadline is fixed.
+         while not waiter.event.wait(max(0.0, min(waiter.idle_until, deadline) - time.perf_counter())):
+              if time.perf_counter() >= min(waiter.idle_until, deadline):
+                   self._release(request_id)
+                   raise socket.timeout(f"No response to request {request_id}")
+         if waiter.error is not None:
+              raise waiter.error
+         return waiter.response, waiter.size, sent, waiter.first_byte, waiter.received, waiter.parsed
+
+    def _release(self, request_id: Any) -> Optional[_PendingResponse]:
+        with self._lock:
+            waiter = self._pending.pop(request_id, None)
+            if waiter is not None:
+                self._credit.notify()
+            return waiter
+
+    def _read_loop(self, sock: socket.socket, stream: Any) -> None:
+        first_byte = 0.0
+        size = 0
+        error: Exception = ConnectionError("Connection closed by Blender")
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                received = time.perf_counter()
+                if not stream.pending:
+                    first_byte = received
+                size += len(chunk)
+                for response in stream.feed(chunk):
+                    self._deliver(response, size, first_byte, received)
+                    first_byte, size = received, 0
+        except (OSError, ValueError) as e:
+            error = ConnectionError(f"Connection to Blender lost: {e!s}")
+        finally:
+            with self._lock:
+                if self.sock is sock:
+                    self.sock = None
+                pending, self._pending = self._pending, {}
+                self._credit.notify_all()
+            sock.close()
+            for waiter in pending.values():
+                waiter.error = error
+                waiter.event.set()
+            conn_logger.info("Multiplexed connection closed (%d requests failed)", len(pending))
+
+    def _deliver(self, response: Dict[str, Any], size: int, first_byte: float, received: float) -> None:
+        if response.get("status") == "heartbeat":
+            # The addon is alive, so every command queued behind it gets more time.
+            for pending in list(self._pending.values()):
+                pending.idle_until = received + pending.idle
+            return
+        waiter = self._release(response.get("id"))
+        if waiter is None:
+            conn_logger.warning("Discarding response to unknown or timed-out request %s", response.get("id"))
+            return
+        waiter.response = response
+        waiter.size = size
+        waiter.first_byte = first_byte
+        waiter.received = received
+        waiter.parsed = time.perf_counter()
+        waiter.event.set()
 
 
 @asynccontextmanager
 async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
     logger.info("BlenderMCP server starting up")
+    _ollama_backends.start()
+    if _worker_pool:
+        await asyncio.to_thread(_worker_pool.start)
     try:
         blender = get_blender_connection()
         logger.info("Connected to Blender on startup")
@@ -176,13 +526,23 @@ async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
         logger.warning(f"Could not connect to Blender on startup: {e!s}")
         logger.warning("Ensure Blender addon is running before using resources")
     yield {}
-    global _blender_connection
-    if _blender_connection:
+    global _connection_manager
+    if _connection_manager:
         logger.info("Disconnecting from Blender on shutdown")
-        _blender_connection.disconnect()
-        _blender_connection = None
+        _connection_manager.disconnect()
+        _connection_manager = None
+    if _worker_pool:
+        await asyncio.to_thread(_worker_pool.stop)
+    await _ollama_backends.stop()
     logger.info("BlenderMCP server shut down")
 
+def run_in_thread(fn):
+    """Run a blocking tool on a worker thread so concurrent sessions don't queue on the event loop."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
+
 # Initialize MCP server instance globally
 mcp = FastMCP(
     "BlenderOpenMCP",
@@ -190,39 +550,113 @@ mcp = FastMCP(
     lifespan=server_lifespan
 )
 
-_blender_connection = None
+_connection_manager: Optional[ConnectionManager] = None
+_connection_manager_lock = threading.Lock()
+_worker_pool: Optional[BlenderWorkerPool] = None
+# Most recent automatically captured profiles of slow addon commands
+_slow_profiles: deque = deque(maxlen=20)
 _polyhaven_enabled = False
+# When the add-on's PolyHaven status was last fetched; tools re-check it at most this often,
+# so a saturated Blender isn't sent a status ping ahead of every command.
+_polyhaven_checked_at = 0.0
+POLYHAVEN_STATUS_TTL = 5.0
 # Default values (will be overridden by command-line arguments)
 _ollama_model = ""
-_ollama_url = "http://localhost:11434"
+_ollama_backends = OllamaBackendPool(["http://localhost:11434"])
+_ollama_limiter = GenerationLimiter(max_concurrent=2, backends=lambda: _ollama_backends.healthy_count)
+_blender_host = "localhost"
+_blender_port = 9876
+_blender_socket: Optional[str] = None
+_blender_connections = 4
+_blender_max_in_flight = 16
+_blender_max_queued = 64
+_blender_multiplex = False
+_blender_codec = "auto"
+_blender_compression = "auto"
+_blender_compress_threshold = COMPRESS_THRESHOLD
 
-def get_blender_connection() -> BlenderConnection:
-    global _blender_connection, _polyhaven_enabled
-    if _blender_connection:
-        try:
-            result = _blender_connection.send_command("get_polyhaven_status")
-            _polyhaven_enabled = result.get("enabled", False)
-            return _blender_connection
-        except Exception as e:
-            logger.warning(f"Existing connection invalid: {e!s}")
-            try:
-                _blender_connection.disconnect()
-            except:
-                pass
-            _blender_connection = None
-    if _blender_connection is None:
-        _blender_connection = BlenderConnection(host="localhost", port=9876)
-        if not _blender_connection.connect():
-            logger.error("Failed to connect to Blender")
-            _blender_connection = None
-            raise Exception("Could not connect to Blender. Addon running?")
-        logger.info("Created new persistent connection to Blender")
-    return _blender_connection
+# Session keys with a finalizer registered, and keys of sessions since collected.
+_tracked_sessions: set = set()
+_closed_sessions: deque = deque()
+_sessions_lock = threading.Lock()
+
+def _session_id(ctx: Optional[Context]) -> Optional[str]:
+    """Key identifying the MCP session a tool call belongs to.
+
+    Keys are object ids, so state kept per key (a worker assignment) is
+    dropped once the session object is collected, before its id can be
+    reused by a new session.
+    """
+    if ctx is None:
+        return None
+    try:
+        session = ctx.session
+    except Exception:
+        return None
+    key = str(id(session))
+    with _sessions_lock:
+        _forget_closed_sessions()
+        if key not in _tracked_sessions:
+            _tracked_sessions.add(key)
+            # Finalizers run wherever the collector does, so they only note the key.
+            weakref.finalize(session, _closed_sessions.append, key)
+    return key
+
+def _forget_closed_sessions() -> None:
+    while _closed_sessions:
+        key = _closed_sessions.popleft()
+        _tracked_sessions.discard(key)
+        if _worker_pool:
+            _worker_pool.forget_session(key)
+
+def _connection_factory(host: str, port: int, socket_path: Optional[str] = None) -> BlenderConnection:
+    if _blender_multiplex:
+        return MultiplexedBlenderConnection(host=host, port=port, socket_path=socket_path,
+                                            codec=_blender_codec,
+                                            compression=_blender_compression,
+                                            compress_threshold=_blender_compress_threshold)
+    return BlenderConnection(host=host, port=port, socket_path=socket_path, codec=_blender_codec,
+                             compression=_blender_compression,
+                             compress_threshold=_blender_compress_threshold)
 
+def get_blender_connection(ctx: Optional[Context] = None):
+    global _connection_manager, _polyhaven_enabled, _polyhaven_checked_at
+    if _worker_pool:
+        # Workers are health-checked by the pool; route by session instead of pinging.
+        _polyhaven_enabled = _worker_pool.polyhaven
+        return _worker_pool.session(_session_id(ctx))
+    with _connection_manager_lock:
+        if _connection_manager is None:
+            _connection_manager = ConnectionManager(
+                functools.partial(_connection_factory, socket_path=_blender_socket),
+                _blender_host, _blender_port,
+                mode="multiplex" if _blender_multiplex else "pool",
+                size=_blender_connections, max_in_flight=_blender_max_in_flight,
+                max_queued=_blender_max_queued)
+            logger.info(f"Sharing {len(_connection_manager.connections)} {_connection_manager.mode} "
+                        f"connection(s) to Blender at {_blender_socket or f'{_blender_host}:{_blender_port}'}")
+    blender = _connection_manager.session(_session_id(ctx))
+    if time.monotonic() - _polyhaven_checked_at < POLYHAVEN_STATUS_TTL:
+        return blender
+    try:
+        result = blender.send_command("get_polyhaven_status")
+    except (BlenderBusyError, BlenderConnectionError):
+        # Busy, or backing off after a lost connection: keep the message and retry-after hint.
+        raise
+    except Exception as e:
+        logger.error(f"Failed to connect to Blender: {e!s}")
+        raise Exception("Could not connect to Blender. Addon running?")
+    _polyhaven_enabled = result.get("enabled", False)
+    _polyhaven_checked_at = time.monotonic()
+    return blender
 
-async def query_ollama(prompt: str, context: Optional[List[Dict]] = None, image: Optional[Image] = None) -> str:
-    global _ollama_model, _ollama_url
+async def query_ollama(prompt: str, context: Optional[List[Dict]] = None, image: Optional[Image] = None,
+                       session: Optional[str] = None) -> str:
+    """Generate a response, waiting for a free slot and sharing identical in-flight requests.
 
+    ``session`` identifies the caller, so queued sessions take turns.
+    """
+    queued_at = time.perf_counter()
     payload = {"prompt": prompt, "model": _ollama_model, "format": "json", "stream": False}
     if context:
         payload["context"] = context
@@ -235,61 +669,268 @@ async def query_ollama(prompt: str, context: Optional[List[Dict]] = None, image:
                     encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
                 payload["images"] = [encoded_string]
             except FileNotFoundError:
-                logger.error(f"Image file not found: {image.path}")
+                ollama_logger.error(f"Image file not found: {image.path}")
                 return "Error: Image file not found."
         else:
-            logger.warning("Image without data or path. Ignoring.")
+            ollama_logger.warning("Image without data or path. Ignoring.")
 
+    return await _ollama_limiter.run(request_key(payload), lambda: _generate(payload, queued_at), session)
+
+async def _generate(payload: Dict[str, Any], queued_at: float) -> str:
+    """Run one generation on the best Ollama backend, failing over to the others."""
+    status = "error"
+    tried: List[str] = []
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.post(f"{_ollama_url}/api/generate", json=payload, timeout=60.0)
+            OLLAMA_PHASE_SECONDS.observe(time.perf_counter() - queued_at, phase="queue")
+            response = None
+            while True:
+                backend = _ollama_backends.choose(payload["model"], exclude=tried)
+                if backend is None:
+                    break  # Every backend failed; report the last failure.
+                tried.append(backend.url)
+                try:
+                    response = await _post_generate(client, backend, payload)
+                except httpx.RequestError as e:
+                    ollama_logger.error(f"Ollama API request to {backend.url} failed: {e}")
+                    _ollama_backends.mark_down(backend, e)
+                    response = None
+                    continue
+                if response.status_code == 404:
+                    # This host doesn't have the model; another one might.
+                    _ollama_backends.mark_missing(backend, payload["model"])
+                    continue
+                if response.status_code >= 500:
+                    _ollama_backends.mark_down(backend, f"HTTP {response.status_code}")
+                    continue
+                break
+            if response is None:
+                raise httpx.ConnectError("No Ollama backend is reachable")
             response.raise_for_status()  # Raise HTTPStatusError for bad status
+            _ollama_backends.mark_served(backend, payload["model"])
             response_data = response.json()
-            logger.debug(f"Raw Ollama response: {response_data}")
+            ollama_logger.debug("Raw Ollama response: %s", truncated(response_data, 500))
+            eval_count, eval_duration = response_data.get("eval_count"), response_data.get("eval_duration")
+            if eval_count and eval_duration:
+                OLLAMA_TOKENS_PER_SECOND.observe(eval_count / (eval_duration / 1e9))
             if "response" in response_data:
+                status = "success"
                 return response_data["response"]
             else:
-                logger.error(f"Unexpected response format: {response_data}")
+                ollama_logger.error(f"Unexpected response format: {response_data}")
                 return "Error: Unexpected response format from Ollama."
 
     except httpx.HTTPStatusError as e:
-        logger.error(f"Ollama API error: {e.response.status_code} - {e.response.text}")
+        ollama_logger.error(f"Ollama API error: {e.response.status_code} - {e.response.text}")
         return f"Error: Ollama API returned: {e.response.status_code}"
     except httpx.RequestError as e:
-        logger.error(f"Ollama API request failed: {e}")
+        ollama_logger.error(f"Ollama API request failed: {e}")
         return "Error: Failed to connect to Ollama API."
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {e!s}")
+        ollama_logger.error(f"An unexpected error occurred: {e!s}")
         return f"Error: An unexpected error occurred: {e!s}"
+    finally:
+        OLLAMA_PHASE_SECONDS.observe(time.perf_counter() - queued_at, phase="total")
+        OLLAMA_REQUESTS.inc(status=status)
+
+async def _post_generate(client: httpx.AsyncClient, backend: OllamaBackend,
+                         payload: Dict[str, Any]) -> httpx.Response:
+    with _ollama_backends.lease(backend):
+        request_start = time.perf_counter()
+        with TRACER.span("ollama.generate", KIND_CLIENT, model=payload["model"], url=backend.url) as span:
+            async with client.stream("POST", f"{backend.url}/api/generate", json=payload, timeout=60.0) as response:
+                ttfb = time.perf_counter() - request_start
+                OLLAMA_PHASE_SECONDS.observe(ttfb, phase="ttfb")
+                await response.aread()
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("ttfb_ms", round(ttfb * 1000, 3))
+    return response
 
 @mcp.prompt()
+@traced
 async def base_prompt(context: Context, user_message: str) -> str:
     system_message = f"""You are a helpful assistant that controls Blender.
     You can use the following tools. Respond in well-formatted, valid JSON:
     {mcp.tools_schema()}"""
     full_prompt = f"{system_message}\n\n{user_message}"
-    response = await query_ollama(full_prompt, context.history(), context.get_image())
+    response = await query_ollama(full_prompt, context.history(), context.get_image(),
+                                  session=_session_id(context))
     return response
 
 @mcp.tool()
+@traced
+@run_in_thread
 def get_scene_info(ctx: Context) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         result = blender.send_command("get_scene_info")
         return json.dumps(result, indent=2)  # Return as a formatted string
     except Exception as e:
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def get_object_info(ctx: Context, object_name: str) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         result = blender.send_command("get_object_info", {"name": object_name})
         return json.dumps(result, indent=2)  # Return as a formatted string
     except Exception as e:
         return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def get_objects_info(
+    ctx: Context,
+    names: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    collection: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: int = 1000
+) -> str:
+    """Fetch fields of many objects in one call, as one array per field.
+
+    Select objects by ``names``, or filter by ``types``, ``collection`` and
+    ``name_prefix``. ``fields`` defaults to type and location; also available:
+    rotation, scale, world_location, dimensions, visible, parent, collections,
+    materials, data, mesh (vertex/edge/polygon counts) and bounds.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        params: Dict[str, Any] = {"limit": limit}
+        if names is not None: params["names"] = names
+        if types: params["types"] = types
+        if collection: params["collection"] = collection
+        if name_prefix: params["name_prefix"] = name_prefix
+        if fields: params["fields"] = fields
+        result = blender.send_command("get_objects_info", params)
+        return json.dumps(result)
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def get_properties(ctx: Context, entries: List[Dict[str, Any]]) -> str:
+    """Read many Blender properties by data path in one call.
+
+    Each entry has ``datablock`` (a ``bpy.data`` collection such as ``objects``,
+    ``lights``, ``cameras`` or ``materials``, or ``scene`` for the current scene),
+    ``name`` and ``path``, e.g. ``{"datablock": "lights", "name": "Key", "path": "energy"}``
+    or ``{"datablock": "scene", "path": "cycles.samples"}``. Values come back
+    in entry order, null where an entry failed.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        result = blender.send_command("get_properties", {"entries": entries})
+        return json.dumps(result)
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def set_properties(ctx: Context, entries: List[Dict[str, Any]]) -> str:
+    """Set many Blender properties by data path in one call.
+
+    Entries are as for ``get_properties`` plus ``value``, e.g.
+    ``{"datablock": "cameras", "name": "Camera", "path": "lens", "value": 85}``.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        result = blender.send_command("set_properties", {"entries": entries})
+        output = f"Set {result.get('updated', 0)} of {len(entries)} properties."
+        errors = result.get("errors", [])
+        if errors:
+            output += "\n" + "".join(f"- {err['path']}: {err['message']}\n" for err in errors)
+        return output
+    except Exception as e:
+        return f"Error: {e!s}"
+
+def _query_center(location: Optional[List[float]], object_name: Optional[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    if location is not None: params["location"] = location
+    if object_name is not None: params["object_name"] = object_name
+    return params
+
+@mcp.tool()
+@traced
+@run_in_thread
+def query_nearest(
+    ctx: Context,
+    location: Optional[List[float]] = None,
+    object_name: Optional[str] = None,
+    count: int = 1,
+    types: Optional[List[str]] = None
+) -> str:
+    """Find the objects closest to a point, or to another object (which is excluded).
+
+    ``types`` restricts matches to Blender object types, e.g. ``["LIGHT"]``.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        params = _query_center(location, object_name)
+        params["count"] = count
+        if types: params["types"] = types
+        result = blender.send_command("query_nearest", params)
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def query_radius(
+    ctx: Context,
+    radius: float,
+    location: Optional[List[float]] = None,
+    object_name: Optional[str] = None,
+    types: Optional[List[str]] = None,
+    limit: int = 100
+) -> str:
+    """Find objects whose origins are within ``radius`` of a point or another object, nearest first."""
+    try:
+        blender = get_blender_connection(ctx)
+        params = _query_center(location, object_name)
+        params.update({"radius": radius, "limit": limit})
+        if types: params["types"] = types
+        result = blender.send_command("query_radius", params)
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def query_bbox(
+    ctx: Context,
+    min: List[float],
+    max: List[float],
+    types: Optional[List[str]] = None,
+    contained: bool = False,
+    limit: int = 100
+) -> str:
+    """Find objects whose world-space bounds overlap an axis-aligned box.
+
+    With ``contained`` only objects entirely inside the box match. An empty
+    result means the box is free, e.g. when looking for room on a floor.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        params = {"min": min, "max": max, "contained": contained, "limit": limit}
+        if types: params["types"] = types
+        result = blender.send_command("query_bbox", params)
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error: {e!s}"
     
 @mcp.tool()
+@traced
+@run_in_thread
 def create_object(
     ctx: Context,
     type: str = "CUBE",
@@ -299,7 +940,7 @@ def create_object(
     scale: Optional[List[float]] = None
 ) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         loc, rot, sc = location or [0, 0, 0], rotation or [0, 0, 0], scale or [1, 1, 1]
         params = {"type": type, "location": loc, "rotation": rot, "scale": sc}
         if name: params["name"] = name
@@ -309,6 +950,8 @@ def create_object(
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def modify_object(
     ctx: Context,
     name: str,
@@ -318,7 +961,7 @@ def modify_object(
     visible: Optional[bool] = None
 ) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         params = {"name": name}
         if location is not None: params["location"] = location
         if rotation is not None: params["rotation"] = rotation
@@ -330,15 +973,106 @@ def modify_object(
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def delete_object(ctx: Context, name: str) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         blender.send_command("delete_object", {"name": name})
         return f"Deleted object: {name}"
     except Exception as e:
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
+def duplicate_object(
+    ctx: Context,
+    name: str,
+    location: Optional[List[float]] = None,
+    rotation: Optional[List[float]] = None,
+    scale: Optional[List[float]] = None,
+    linked: bool = True,
+    new_name: Optional[str] = None
+) -> str:
+    """Copy an object. Linked copies share the source's mesh data; set ``linked`` false for an independent copy."""
+    try:
+        blender = get_blender_connection(ctx)
+        params: Dict[str, Any] = {"name": name, "linked": linked}
+        if location is not None: params["location"] = location
+        if rotation is not None: params["rotation"] = rotation
+        if scale is not None: params["scale"] = scale
+        if new_name: params["new_name"] = new_name
+        result = blender.send_command("duplicate_object", params)
+        shared = f" (sharing {result['data']})" if linked and result.get("data") else ""
+        return f"Duplicated {name} as {result['name']}{shared}"
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def instance_objects(
+    ctx: Context,
+    source: str,
+    transforms: List[Any],
+    mode: str = "linked",
+    collection: Optional[str] = None
+) -> str:
+    """Place many copies of an object that share its geometry, in one call.
+
+    Each transform is a location ``[x, y, z]`` or a dict with ``location``,
+    ``rotation`` and ``scale``. ``mode`` is ``linked`` (linked duplicates of
+    an object) or ``collection`` (empties instancing a collection, or the
+    source object wrapped in one). New objects go into ``collection`` if given.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        params: Dict[str, Any] = {"source": source, "transforms": transforms, "mode": mode}
+        if collection: params["collection"] = collection
+        result = blender.send_command("instance_objects", params)
+        names = result.get("names", [])
+        result["names"] = names[:20] + ([f"... and {len(names) - 20} more"] if len(names) > 20 else [])
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def scatter_on_surface(
+    ctx: Context,
+    target: str,
+    instance: str,
+    density: float = 10.0,
+    seed: int = 0,
+    scale_min: float = 1.0,
+    scale_max: float = 1.0,
+    align_to_normal: bool = False,
+    name: str = "MCP_Scatter"
+) -> str:
+    """Scatter an object or collection over a mesh surface (grass, rocks, props).
+
+    Adds a Geometry Nodes modifier to ``target`` that distributes ``density``
+    points per unit area and instances ``instance`` on them with a random
+    scale between ``scale_min`` and ``scale_max`` and a random turn about Z
+    (or aligned to the surface normal). Call again with the same ``name`` to
+    adjust it.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        result = blender.send_command("scatter_on_surface", {
+            "target": target, "instance": instance, "density": density, "seed": seed,
+            "scale_min": scale_min, "scale_max": scale_max,
+            "align_to_normal": align_to_normal, "name": name})
+        return (f"Scattered {instance} on {target} via modifier {result['modifier']} "
+                f"(about {result['estimated_instances']} instances)")
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
 def set_material(
     ctx: Context,
     object_name: str,
@@ -346,28 +1080,54 @@ def set_material(
     color: Optional[List[float]] = None
 ) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         params = {"object_name": object_name}
         if material_name: params["material_name"] = material_name
         if color: params["color"] = color
         result = blender.send_command("set_material", params)
-        return f"Applied material to {object_name}: {result.get('material_name', 'unknown')}"
+        return f"Applied material to {object_name}: {result.get('material', 'unknown')}"
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+@run_in_thread
+def set_materials(ctx: Context, assignments: List[Dict[str, Any]]) -> str:
+    """Assign materials to many objects in one call.
+
+    Each assignment has ``object_name`` and optionally ``material_name`` and/or
+    ``color``; objects given the same colour share a single material.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        result = blender.send_command("set_materials", {"assignments": assignments})
+        output = (f"Assigned materials to {result.get('assigned', 0)} objects "
+                  f"using {len(result.get('materials', {}))} materials.")
+        errors = result.get("errors", [])
+        if errors:
+            output += f"\n{len(errors)} failed:\n" + "".join(
+                f"- {err['object']}: {err['message']}\n" for err in errors)
+        return output
     except Exception as e:
         return f"Error: {e!s}"
     
 @mcp.tool()
-def execute_blender_code(ctx: Context, code: str) -> str:
+@traced
+@run_in_thread
+def execute_blender_code(ctx: Context, code: str, timeout: Optional[float] = None) -> str:
     try:
-        blender = get_blender_connection()
-        result = blender.send_command("execute_code", {"code": code})
+        blender = get_blender_connection(ctx)
+        result = blender.send_command("execute_code", {"code": code}, timeout=timeout)
         return f"Code executed: {result.get('result', '')}"
     except Exception as e:
         return f"Error: {e!s}"
     
 @mcp.tool()
+@traced
+@run_in_thread
 def get_polyhaven_categories(ctx: Context, asset_type: str = "hdris") -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         if not _polyhaven_enabled: return "PolyHaven disabled."
         result = blender.send_command("get_polyhaven_categories", {"asset_type": asset_type})
         if "error" in result: return f"Error: {result['error']}"
@@ -380,9 +1140,11 @@ def get_polyhaven_categories(ctx: Context, asset_type: str = "hdris") -> str:
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def search_polyhaven_assets(ctx: Context, asset_type: str = "all", categories: Optional[str] = None) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         result = blender.send_command("search_polyhaven_assets",
                 {"asset_type": asset_type, "categories": categories})
         if "error" in result: return f"Error: {result['error']}"
@@ -401,13 +1163,16 @@ def search_polyhaven_assets(ctx: Context, asset_type: str = "all", categories: O
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def download_polyhaven_asset(ctx: Context, asset_id: str, asset_type: str,
-                             resolution: str = "1k", file_format: Optional[str] = None) -> str:
+                             resolution: str = "1k", file_format: Optional[str] = None,
+                             timeout: Optional[float] = None) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         result = blender.send_command("download_polyhaven_asset", {
             "asset_id": asset_id, "asset_type": asset_type,
-            "resolution": resolution, "file_format": file_format})
+            "resolution": resolution, "file_format": file_format}, timeout=timeout)
         if "error" in result: return f"Error: {result['error']}"
         if result.get("success"):
             message = result.get("message", "Success")
@@ -422,9 +1187,11 @@ def download_polyhaven_asset(ctx: Context, asset_id: str, asset_type: str,
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def set_texture(ctx: Context, object_name: str, texture_id: str) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         result = blender.send_command("set_texture",
                                      {"object_name": object_name, "texture_id": texture_id})
         if "error" in result: return f"Error: {result['error']}"
@@ -445,20 +1212,70 @@ def set_texture(ctx: Context, object_name: str, texture_id: str) -> str:
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
 def get_polyhaven_status(ctx: Context) -> str:
     try:
-        blender = get_blender_connection()
+        blender = get_blender_connection(ctx)
         result = blender.send_command("get_polyhaven_status")
         return result.get("message", "")  # Return the message directly
     except Exception as e:
         return f"Error: {e!s}"
 
 @mcp.tool()
+@traced
+@run_in_thread
+def profile_command(
+    ctx: Context,
+    command_type: str,
+    params: Optional[Dict[str, Any]] = None,
+    top: int = 20,
+    sort: str = "cumulative",
+    output_path: Optional[str] = None
+) -> str:
+    """Run an addon command under cProfile and list its hottest functions.
+
+    ``sort`` is ``cumulative`` or ``tottime``; ``output_path`` also saves the
+    full pstats file on the Blender side.
+    """
+    try:
+        blender = get_blender_connection(ctx)
+        result = blender.send_command(command_type, params or {},
+                                      profile={"top": top, "sort": sort, "output": output_path})
+        report = result.get("profile", {})
+        output = (f"Profiled {command_type}: {report.get('total_time', 0):.4f}s total "
+                  f"(sorted by {report.get('sort', sort)})\n")
+        output += "".join(
+            f"- {row['function']}: {row['calls']} calls, "
+            f"{row['total_time']:.4f}s self, {row['cumulative_time']:.4f}s cumulative\n"
+            for row in report.get("top", []))
+        if report.get("output"):
+            output += f"Full stats written to {report['output']}\n"
+        return output
+    except Exception as e:
+        return f"Error: {e!s}"
+
+@mcp.tool()
+@traced
+def get_server_stats(ctx: Context) -> str:
+    """Latency histogram summaries for Blender commands and Ollama requests."""
+    stats: Dict[str, Any] = {"metrics": REGISTRY.snapshot(), "slow_profiles": list(_slow_profiles)}
+    if _worker_pool:
+        stats["workers"] = _worker_pool.stats()
+    elif _connection_manager:
+        stats["connections"] = _connection_manager.stats()
+    stats["timeouts"] = TIMEOUTS.snapshot()
+    stats["ollama"] = {**_ollama_limiter.stats(), "backends": _ollama_backends.stats()}
+    return json.dumps(stats, indent=2)
+
+@mcp.tool()
+@traced
 async def set_ollama_model(ctx: Context, model_name: str) -> str:
     global _ollama_model
     try:
+        backend = _ollama_backends.choose(model_name)
         async with httpx.AsyncClient() as client:
-            response = await client.post(f"{_ollama_url}/api/show",
+            response = await client.post(f"{backend.url}/api/show",
                                          json={"name": model_name}, timeout=10.0)
             if response.status_code == 200:
                 _ollama_model = model_name
@@ -468,36 +1285,35 @@ async def set_ollama_model(ctx: Context, model_name: str) -> str:
         return f"Error: Failed to communicate: {e!s}"
 
 @mcp.tool()
+@traced
 async def set_ollama_url(ctx: Context, url: str) -> str:
-    global _ollama_url
-    if not (url.startswith("http://") or url.startswith("https://")):
+    """Point the server at one Ollama host, or several separated by commas."""
+    urls = [part.strip() for part in url.split(",") if part.strip()]
+    if not urls or not all(u.startswith("http://") or u.startswith("https://") for u in urls):
         return "Error: Invalid URL format. Must start with http:// or https://."
-    _ollama_url = url
-    return f"Ollama URL set to: {_ollama_url}"
+    _ollama_backends.set_urls(urls)
+    return f"Ollama URL set to: {', '.join(_ollama_backends.urls)}"
 
 @mcp.tool()
+@traced
 async def get_ollama_models(ctx: Context) -> str:
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{_ollama_url}/api/tags", timeout=10.0)
-            response.raise_for_status()
-            models_data = response.json()
-            if "models" in models_data:
-                model_list = [model["name"] for model in models_data["models"]]
-                return "Available Ollama models:\n" + "\n".join(model_list)
-            else: return "Error: Unexpected response from Ollama /api/tags."
-    except httpx.HTTPStatusError as e:
-        return f"Error: Ollama API error: {e.response.status_code}"
-    except httpx.RequestError as e:
-        return "Error: Failed to connect to Ollama API."
+        await _ollama_backends.probe()
+        reachable = [b for b in _ollama_backends.backends if b.healthy and b.models is not None]
+        if not reachable:
+            return "Error: Failed to connect to Ollama API."
+        model_list = sorted(set().union(*(backend.models for backend in reachable)))
+        return "Available Ollama models:\n" + "\n".join(model_list)
     except Exception as e:
         return f"Error: An unexpected error: {e!s}"
 
 @mcp.tool()
-async def render_image(ctx: Context, file_path: str = "render.png") -> str:
+@traced
+async def render_image(ctx: Context, file_path: str = "render.png", timeout: Optional[float] = None) -> str:
     try:
-        blender = get_blender_connection()
-        result = blender.send_command("render_scene", {"output_path":file_path})
+        blender = await asyncio.to_thread(get_blender_connection, ctx)
+        result = await asyncio.to_thread(blender.send_command, "render_scene", {"output_path": file_path},
+                                         timeout=timeout)
         if result:
             try:
                 with open(file_path, "rb") as image_file:
@@ -511,22 +1327,106 @@ async def render_image(ctx: Context, file_path: str = "render.png") -> str:
 
 def main():
     """Run the MCP server."""
+    global _ollama_model, _worker_pool, _blender_host, _blender_port, _blender_socket
+    global _blender_connections, _blender_max_in_flight, _blender_max_queued, _blender_multiplex, _blender_codec
+    global _blender_compression, _blender_compress_threshold
     parser = argparse.ArgumentParser(description="BlenderMCP Server")
-    parser.add_argument("--ollama-url", type=str, default=_ollama_url,
-                        help="URL of the Ollama server")
+    parser.add_argument("--ollama-url", type=str, default=",".join(_ollama_backends.urls),
+                        help="URL of the Ollama server, or several separated by commas to balance across")
+    parser.add_argument("--ollama-probe-interval", type=float, default=_ollama_backends.probe_interval,
+                        help="Seconds between Ollama health checks")
     parser.add_argument("--ollama-model", type=str, default=_ollama_model,
                         help="Default Ollama model to use")
+    parser.add_argument("--ollama-max-concurrent", type=int, default=_ollama_limiter.max_concurrent,
+                        help="Most Ollama generations running at once; the rest queue fairly by session")
     parser.add_argument("--port", type=int, default=8000,
                         help="Port for the MCP server to listen on")
     parser.add_argument("--host", type=str, default="0.0.0.0",
                         help="Host for the MCP server to listen on")
+    parser.add_argument("--log-level", type=str, default="INFO",
+                        help="Default log level")
+    parser.add_argument("--log-levels", type=str, default="",
+                        help="Per-subsystem levels, e.g. Connection=DEBUG,Ollama=WARNING,httpx=WARNING")
+    parser.add_argument("--log-sample-rate", type=float, default=1.0,
+                        help="Fraction of DEBUG/INFO records to emit (warnings and errors always pass)")
+    parser.add_argument("--log-queue", action="store_true",
+                        help="Format and write logs on a background thread")
+    parser.add_argument("--log-format", choices=["text", "json"], default="text",
+                        help="Log output format")
+    parser.add_argument("--trace-file", type=str, default=None,
+                        help="Append OpenTelemetry JSON spans for every tool call to this file")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Port for the Prometheus /metrics endpoint (0 disables it)")
+    parser.add_argument("--blender-host", type=str, default=_blender_host,
+                        help="Host of a running Blender addon server")
+    parser.add_argument("--blender-port", type=int, default=_blender_port,
+                        help="Port of a running Blender addon server")
+    parser.add_argument("--blender-socket", type=str, default=None,
+                        help="Unix socket path of a running Blender addon server on this host (instead of TCP)")
+    parser.add_argument("--blender-connections", type=int, default=_blender_connections,
+                        help="Connections to the Blender addon shared by all MCP sessions")
+    parser.add_argument("--blender-multiplex", action="store_true",
+                        help="Send all commands over one connection, matched to responses by request id")
+    parser.add_argument("--blender-max-in-flight", type=int, default=_blender_max_in_flight,
+                        help="Most Blender commands outstanding at once across all sessions")
+    parser.add_argument("--blender-max-queued", type=int, default=_blender_max_queued,
+                        help="Most Blender commands waiting for a connection before new ones are refused")
+    parser.add_argument("--blender-codec", choices=["auto", "json", "msgpack"], default=_blender_codec,
+                        help="Wire format for Blender commands; auto uses MessagePack when the msgpack package is installed")
+    parser.add_argument("--blender-compression", choices=["auto", "off", "zlib", "zstd"],
+                        default=_blender_compression,
+                        help="Compress large Blender frames; auto compresses only for non-local hosts")
+    parser.add_argument("--blender-compress-threshold", type=int, default=_blender_compress_threshold,
+                        help="Smallest frame in bytes worth compressing")
+    parser.add_argument("--blender-timeouts", type=str, default="",
+                        help="Per-command timeout budgets in seconds, e.g. render_scene=900,get_scene_info=5")
+    parser.add_argument("--blender-timeout-floor", type=float, default=TIMEOUTS.floor,
+                        help="Shortest adaptive idle timeout for any command")
+    parser.add_argument("--blender-workers", type=int, default=0,
+                        help="Number of headless Blender workers to spawn (0 uses a running Blender)")
+    parser.add_argument("--blender-executable", type=str, default="blender",
+                        help="Blender executable used for headless workers")
+    parser.add_argument("--blender-addon", type=str, default=DEFAULT_ADDON_PATH,
+                        help="Path to addon.py loaded by headless workers")
+    parser.add_argument("--worker-base-port", type=int, default=9900,
+                        help="First socket port assigned to headless workers")
+    parser.add_argument("--worker-polyhaven", action="store_true",
+                        help="Enable Poly Haven asset commands on headless workers")
 
     args = parser.parse_args()
+    configure_logging(args.log_level, parse_levels(args.log_levels), args.log_sample_rate,
+                      args.log_queue, args.log_format)
 
     # Set global variables from command-line arguments
-    global _ollama_url, _ollama_model
-    _ollama_url = args.ollama_url
+    _ollama_backends.set_urls([url.strip() for url in args.ollama_url.split(",") if url.strip()])
+    _ollama_backends.probe_interval = args.ollama_probe_interval
     _ollama_model = args.ollama_model
+    _ollama_limiter.max_concurrent = max(1, args.ollama_max_concurrent)
+    _blender_host = args.blender_host
+    _blender_port = args.blender_port
+    _blender_socket = args.blender_socket
+    _blender_connections = args.blender_connections
+    _blender_max_in_flight = args.blender_max_in_flight
+    _blender_max_queued = args.blender_max_queued
+    _blender_multiplex = args.blender_multiplex
+    _blender_codec = args.blender_codec
+    _blender_compression = args.blender_compression
+    _blender_compress_threshold = args.blender_compress_threshold
+    TIMEOUTS.budgets.update(parse_budgets(args.blender_timeouts))
+    TIMEOUTS.floor = args.blender_timeout_floor
+    if args.blender_workers > 0:
+        _worker_pool = BlenderWorkerPool(
+            args.blender_workers,
+            _connection_factory,
+            blender_executable=args.blender_executable,
+            addon_path=args.blender_addon,
+            base_port=args.worker_base_port,
+            polyhaven=args.worker_polyhaven,
+            transport_errors=(BlenderConnectionError, OSError))
+
+    configure_tracing(args.trace_file)
+    if args.metrics_port:
+        start_metrics_server(args.host, args.metrics_port)
 
     # MCP instance is already created globally
     mcp.run(host=args.host, port=args.port)
@@ -0,0 +1,633 @@
+"""Pure-Python stand-in for the Blender addon, for load testing without Blender.
+
+Speaks the addon's socket protocol (one command in, one response out, in
+JSON or negotiated MessagePack) and keeps an in-memory scene, so ``server.py`` and ``BlenderConnection``
+can be benchmarked on a plain Linux box::
+
+    python -m blender_open_mcp.simulator --port 9876 --latency-ms 5 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import base64
+import logging
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .codec import COMPRESS_THRESHOLD, COMPRESSORS, MSGPACK_NATIVE, JsonStream, make_stream
+
+logger = logging.getLogger("BlenderMCPServer.Simulator")
+
+# 1x1 transparent PNG written by render_scene.
+_PNG_1X1 = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+
+_MESH_COUNTS = {
+    "CUBE": (8, 12, 6),
+    "SPHERE": (482, 992, 512),
+    "CYLINDER": (64, 96, 34),
+    "PLANE": (4, 4, 1),
+    "CONE": (33, 64, 33),
+    "TORUS": (576, 1152, 576),
+}
+
+
+# get_objects_info columns; "mesh" and "bounds" are computed separately.
+_OBJECT_FIELDS: Dict[str, Any] = {
+    "type": lambda o: o["type"],
+    "location": lambda o: o["location"],
+    "rotation": lambda o: o["rotation"],
+    "scale": lambda o: o["scale"],
+    "world_location": lambda o: o["location"],
+    "dimensions": lambda o: [2 * abs(v) for v in o["scale"]] if o["type"] == "MESH" else [0.0, 0.0, 0.0],
+    "visible": lambda o: o["visible"],
+    "parent": lambda o: None,
+    "collections": lambda o: ["Collection"],
+    "materials": lambda o: o["materials"],
+    "data": lambda o: o["name"] if "mesh" in o else None,
+    "mesh": None,
+    "bounds": None,
+}
+_VECTOR_FIELDS = {"location", "rotation", "scale", "world_location", "dimensions"}
+
+
+@dataclass
+class SimulatorConfig:
+    latency: float = 0.0  # Seconds added to every command
+    jitter: float = 0.0  # Extra uniform random latency in seconds
+    response_padding: int = 0  # Bytes of filler added to every successful response
+    error_rate: float = 0.0  # Fraction of commands answered with an error status
+    drop_rate: float = 0.0  # Fraction of commands that close the connection unanswered
+    hang_rate: float = 0.0  # Fraction of commands that never get a response
+    seed: Optional[int] = None
+    codecs: Tuple[str, ...] = ("json", "msgpack")  # Wire codecs accepted in "hello"
+    compression: Tuple[str, ...] = ("zlib", "zstd")  # Frame compression accepted in "hello"
+    credits: int = 8  # Commands a connection may have outstanding, granted in "hello"
+
+
+@dataclass
+class SimulatedScene:
+    name: str = "Scene"
+    objects: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    materials: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    properties: Dict[Tuple[str, str, str], Any] = field(default_factory=dict)
+
+    def _unique_name(self, base: str) -> str:
+        if base not in self.objects:
+            return base
+        i = 1
+        while f"{base}.{i:03d}" in self.objects:
+            i += 1
+        return f"{base}.{i:03d}"
+
+    def _get(self, name: str) -> Dict[str, Any]:
+        obj = self.objects.get(name)
+        if obj is None:
+            raise ValueError(f"Object not found: {name}")
+        return obj
+
+    def get_scene_info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "object_count": len(self.objects),
+            "objects": [{"name": o["name"], "type": o["type"],
+                         "location": [round(float(v), 2) for v in o["location"]]}
+                        for o in list(self.objects.values())[:10]],
+            "materials_count": len(self.materials),
+        }
+
+    def create_object(self, type="CUBE", name=None, location=(0, 0, 0), rotation=(0, 0, 0), scale=(1, 1, 1)):
+        if type in _MESH_COUNTS:
+            obj_type = "MESH"
+        elif type in ("EMPTY", "CAMERA", "LIGHT"):
+            obj_type = type
+        else:
+            raise ValueError(f"Unsupported object type: {type}")
+        obj = {
+            "name": self._unique_name(name or type.capitalize()),
+            "type": obj_type,
+            "location": list(location),
+            "rotation": list(rotation),
+            "scale": list(scale) if obj_type == "MESH" else [1.0, 1.0, 1.0],
+            "visible": True,
+            "materials": [],
+        }
+        if obj_type == "MESH":
+            vertices, edges, polygons = _MESH_COUNTS[type]
+            obj["mesh"] = {"vertices": vertices, "edges": edges, "polygons": polygons}
+        self.objects[obj["name"]] = obj
+        return {k: obj[k] for k in ("name", "type", "location", "rotation", "scale")}
+
+    def modify_object(self, name, location=None, rotation=None, scale=None, visible=None):
+        obj = self._get(name)
+        if location is not None:
+            obj["location"] = list(location)
+        if rotation is not None:
+            obj["rotation"] = list(rotation)
+        if scale is not None:
+            obj["scale"] = list(scale)
+        if visible is not None:
+            obj["visible"] = bool(visible)
+        return {k: obj[k] for k in ("name", "type", "location", "rotation", "scale", "visible")}
+
+    def delete_object(self, name):
+        self._get(name)
+        del self.objects[name]
+        return {"deleted": name}
+
+    def get_object_info(self, name):
+        return dict(self._get(name))
+
+    def get_objects_info(self, names=None, types=None, collection=None, name_prefix=None,
+                         fields=("type", "location"), limit=1000, precision=4):
+        unknown = set(fields) - _OBJECT_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        if names is not None:
+            objects = [self.objects[name] for name in names if name in self.objects]
+            missing = [name for name in names if name not in self.objects]
+        else:
+            objects = [o for o in self.objects.values()
+                       if (not types or o["type"] in types)
+                       and (not name_prefix or o["name"].startswith(name_prefix))]
+            missing = []
+        total = len(objects)
+        objects = objects[:int(limit)] if limit else objects
+        columns: Dict[str, List[Any]] = {}
+        for name in fields:
+            if name == "mesh":
+                for column in ("vertices", "edges", "polygons"):
+                    columns[column] = [o["mesh"][column] if "mesh" in o else None for o in objects]
+            elif name == "bounds":
+                columns[name] = [[[round(v, precision) for v in corner] for corner in self._bounds(o)]
+                                 for o in objects]
+            elif name in _VECTOR_FIELDS:
+                columns[name] = [[round(v, precision) for v in _OBJECT_FIELDS[name](o)] for o in objects]
+            else:
+                columns[name] = [_OBJECT_FIELDS[name](o) for o in objects]
+        return {"count": len(objects), "total": total, "names": [o["name"] for o in objects],
+                "columns": columns, "missing": missing}
+
+    def _access_property(self, entry: Dict[str, Any], value: Any = None, write: bool = False) -> Any:
+        datablock = entry.get("datablock", "objects")
+        name = self.name if datablock == "scene" else entry.get("name")
+        path = entry.get("path")
+        if not name or not path:
+            raise ValueError("Each entry needs a datablock name and a path")
+        if datablock == "objects":
+            obj = self._get(name)
+            attr, _, index = path.rstrip("]").partition("[")
+            if attr in obj and attr != "mesh":
+                if write:
+                    if index:
+                        obj[attr][int(index)] = value
+                    else:
+                        obj[attr] = list(value) if isinstance(obj[attr], list) else value
+                return obj[attr][int(index)] if index else obj[attr]
+        # Anything else is remembered as written, like a property that exists with no default.
+        key = (datablock, name, path)
+        if write:
+            self.properties[key] = value
+        if key not in self.properties:
+            raise ValueError(f"Cannot resolve {path!r} on {datablock}[{name!r}]")
+        return self.properties[key]
+
+    def get_properties(self, entries):
+        values: List[Any] = []
+        errors = []
+        for i, entry in enumerate(entries):
+            try:
+                values.append(self._access_property(entry))
+            except Exception as e:
+                values.append(None)
+                errors.append({"index": i, "path": entry.get("path"), "message": str(e)})
+        return {"values": values, "errors": errors}
+
+    def set_properties(self, entries):
+        errors = []
+        for i, entry in enumerate(entries):
+            try:
+                self._access_property(entry, entry.get("value"), write=True)
+            except Exception as e:
+                errors.append({"index": i, "path": entry.get("path"), "message": str(e)})
+        return {"updated": len(entries) - len(errors), "errors": errors}
+
+    def _place(self, obj: Dict[str, Any], transform: Any) -> None:
+        if isinstance(transform, dict):
+            for key in ("location", "rotation", "scale"):
+                if transform.get(key) is not None:
+                    obj[key] = list(transform[key])
+        else:
+            obj["location"] = list(transform)
+
+    def duplicate_object(self, name, location=None, rotation=None, scale=None, linked=True, new_name=None):
+        source = self._get(name)
+        obj = dict(source, name=self._unique_name(new_name or name), materials=list(source["materials"]))
+        if not linked and "mesh" in source:
+            obj["mesh"] = dict(source["mesh"])
+        self._place(obj, {"location": location, "rotation": rotation, "scale": scale})
+        self.objects[obj["name"]] = obj
+        data = (name if linked else obj["name"]) if "mesh" in obj else None
+        return {"name": obj["name"], "data": data, "linked": linked,
+                "location": obj["location"]}
+
+    def instance_objects(self, source, transforms, mode="linked", collection=None):
+        if mode not in ("linked", "collection"):
+            raise ValueError(f"Unknown instance mode: {mode} (expected linked or collection)")
+        base = self._get(source)
+        names = []
+        for transform in transforms:
+            if mode == "collection":
+                obj = {"name": self._unique_name(f"{source}_instance_source_instance"), "type": "EMPTY",
+                       "location": [0.0, 0.0, 0.0], "rotation": [0.0, 0.0, 0.0], "scale": [1.0, 1.0, 1.0],
+                       "visible": True, "materials": []}
+            else:
+                obj = dict(base, name=self._unique_name(source))
+            self._place(obj, transform)
+            self.objects[obj["name"]] = obj
+            names.append(obj["name"])
+        return {"created": len(names), "mode": mode,
+                "source": f"{source}_instance_source" if mode == "collection" else source,
+                "data": source if mode == "linked" and "mesh" in base else None,
+                "collection": collection or "Collection", "names": names}
+
+    def _bounds(self, obj: Dict[str, Any]) -> Tuple[List[float], List[float]]:
+        # Primitives span -1..1 locally; rotation is ignored.
+        half = [abs(s) for s in obj["scale"]] if obj["type"] == "MESH" else [0.0, 0.0, 0.0]
+        return ([l - h for l, h in zip(obj["location"], half)],
+                [l + h for l, h in zip(obj["location"], half)])
+
+    def _query(self, found, limit, bounds=False):
+        found.sort(key=lambda item: item[0])
+        results = []
+        for distance, obj in found[:limit]:
+            result = {"name": obj["name"], "type": obj["type"],
+                      "location": [round(v, 4) for v in obj["location"]], "distance": round(distance, 4)}
+            if bounds:
+                result["bounds"] = [[round(v, 4) for v in corner] for corner in self._bounds(obj)]
+            results.append(result)
+        return {"objects": results, "total": len(found)}
+
+    def _distances(self, location, object_name, types):
+        point = self._get(object_name)["location"] if object_name is not None else location
+        if point is None:
+            raise ValueError("Either location or object_name is required")
+        return [(math.dist(point, obj["location"]), obj) for obj in self.objects.values()
+                if obj["name"] != object_name and (not types or obj["type"] in types)]
+
+    def query_nearest(self, location=None, object_name=None, count=1, types=None):
+        found = sorted(self._distances(location, object_name, types), key=lambda item: item[0])
+        return self._query(found[:int(count)], int(count))
+
+    def query_radius(self, radius, location=None, object_name=None, types=None, limit=100):
+        found = [(d, obj) for d, obj in self._distances(location, object_name, types) if d <= radius]
+        return self._query(found, int(limit))
+
+    def query_bbox(self, min, max, types=None, contained=False, limit=100):
+        center = [(a + b) / 2 for a, b in zip(min, max)]
+        found = []
+        for obj in self.objects.values():
+            if types and obj["type"] not in types:
+                continue
+            low, high = self._bounds(obj)
+            if contained:
+                inside = all(min[i] <= low[i] and high[i] <= max[i] for i in range(3))
+            else:
+                inside = all(low[i] <= max[i] and min[i] <= high[i] for i in range(3))
+            if inside:
+                found.append((math.dist(center, obj["location"]), obj))
+        return self._query(found, int(limit), bounds=True)
+
+    def scatter_on_surface(self, target, instance, density=10.0, seed=0, scale_min=1.0, scale_max=1.0,
+                           align_to_normal=False, name="MCP_Scatter"):
+        obj = self._get(target)
+        if obj["type"] != "MESH":
+            raise ValueError(f"Mesh object not found: {target}")
+        self._get(instance)
+        modifiers = obj.setdefault("modifiers", {})
+        modifiers[name] = {"instance": instance, "density": density, "seed": seed}
+        area = 24.0  # Surface of a -1..1 cube; density applies before object scale.
+        return {"target": target, "modifier": name, "node_group": f"{name}_{target}", "instance": instance,
+                "density": density, "seed": seed, "scale_range": [scale_min, scale_max],
+                "estimated_instances": int(area * density)}
+
+    def execute_code(self, code):
+        compile(code, "<mcp>", "exec")
+        return {"executed": True}
+
+    def set_material(self, object_name, material_name=None, create_if_missing=True, color=None):
+        obj = self._get(object_name)
+        if material_name is None and color:
+            material_name = "MCP_Color_" + "".join(
+                f"{max(0, min(255, int(round(c * 255)))):02x}" for c in (list(color) + [1.0])[:4])
+        material_name = material_name or f"{object_name}_material"
+        if material_name not in self.materials:
+            if not create_if_missing:
+                raise ValueError(f"Failed to create or find material: {material_name}")
+            self.materials[material_name] = {"color": color}
+        obj["materials"] = [material_name]
+        return {"status": "success", "object": object_name, "material": material_name, "color": color}
+
+    def set_materials(self, assignments, create_if_missing=True):
+        materials: Dict[str, int] = {}
+        errors = []
+        for assignment in assignments:
+            try:
+                result = self.set_material(assignment.get("object_name"), assignment.get("material_name"),
+                                           create_if_missing, assignment.get("color"))
+                materials[result["material"]] = materials.get(result["material"], 0) + 1
+            except Exception as e:
+                errors.append({"object": assignment.get("object_name"), "message": str(e)})
+        return {"assigned": sum(materials.values()), "materials": materials, "errors": errors}
+
+    def render_scene(self, output_path=None, resolution_x=None, resolution_y=None):
+        output_path = output_path or "render.png"
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(_PNG_1X1)
+        return {"rendered": True, "output_path": output_path,
+                "resolution": [resolution_x or 1920, resolution_y or 1080]}
+
+    def get_polyhaven_status(self):
+        return {"enabled": True, "message": "PolyHaven integration is enabled and ready to use."}
+
+    def get_polyhaven_categories(self, asset_type):
+        return {"categories": {"outdoor": 120, "indoor": 80, "studio": 40}}
+
+    def search_polyhaven_assets(self, asset_type=None, categories=None):
+        assets = {f"asset_{i}": {"name": f"Asset {i}", "type": 1, "categories": ["outdoor"],
+                                 "download_count": 1000 - i} for i in range(20)}
+        return {"assets": assets, "total_count": 200, "returned_count": len(assets)}
+
+    def download_polyhaven_asset(self, asset_id, asset_type, resolution="1k", file_format=None):
+        if asset_type == "textures":
+            self.materials[asset_id] = {"texture": asset_id}
+            return {"success": True, "message": f"Texture {asset_id} imported as material",
+                    "material": asset_id, "maps": ["diffuse", "rough", "nor_gl"]}
+        if asset_type == "models":
+            created = self.create_object("EMPTY", asset_id)
+            return {"success": True, "message": f"Model {asset_id} imported successfully",
+                    "imported_objects": [created["name"]]}
+        return {"success": True, "message": f"HDRI {asset_id} imported successfully",
+                "image_name": f"{asset_id}.hdr"}
+
+    def set_texture(self, object_name, texture_id):
+        obj = self._get(object_name)
+        mat_name = f"{texture_id}_material"
+        self.materials.setdefault(mat_name, {"texture": texture_id})
+        obj["materials"] = [mat_name]
+        return {"success": True, "message": f"Applied texture {texture_id} to {object_name}",
+                "material": mat_name, "maps": ["diffuse", "rough", "nor_gl"],
+                "material_info": {"name": mat_name, "has_nodes": True, "node_count": 7, "texture_nodes": []}}
+
+
+class BlenderSimulator:
+    """Asyncio socket server answering addon commands from a ``SimulatedScene``."""
+
+    def __init__(self, host: str = "localhost", port: int = 9876,
+                 config: Optional[SimulatorConfig] = None, scene: Optional[SimulatedScene] = None,
+                 socket_path: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.config = config or SimulatorConfig()
+        self.scene = scene or SimulatedScene()
+        self.commands_handled = 0
+        self._random = random.Random(self.config.seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._clients: set = set()
+
+    def handlers(self) -> Dict[str, Any]:
+        scene = self.scene
+        return {name: getattr(scene, name) for name in (
+            "get_scene_info", "create_object", "modify_object", "delete_object",
+            "get_object_info", "get_objects_info", "get_properties", "set_properties",
+            "query_nearest", "query_radius", "query_bbox",
+            "duplicate_object", "instance_objects", "scatter_on_surface",
+            "execute_code", "set_material", "set_materials",
+            "render_scene", "get_polyhaven_status", "get_polyhaven_categories",
+            "search_polyhaven_assets", "download_polyhaven_asset", "set_texture")}
+
+    def execute_command(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        started_ns = time.time_ns()
+        response = self._execute_command_internal(command)
+        if command.get("trace"):
+            response["spans"] = [{"name": "addon.execute", "start_ns": started_ns, "end_ns": time.time_ns(),
+                                  "attributes": {"command": command.get("type", ""),
+                                                 "status": response.get("status", ""),
+                                                 "simulated": True}}]
+        return response
+
+    def _execute_command_internal(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        cmd_type = command.get("type")
+        handler = self.handlers().get(cmd_type)
+        if handler is None:
+            return {"status": "error", "message": f"Unknown command type: {cmd_type}"}
+        started = time.perf_counter()
+        try:
+            result = handler(**command.get("params", {}))
+            if command.get("profile"):
+                result = {"result": result, "profile": {
+                    "sort": command["profile"].get("sort", "cumulative"),
+                    "total_time": round(time.perf_counter() - started, 6),
+                    "top": [], "output": None}}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+        response = {"status": "success", "result": result,
+                    "timing": {"handler": time.perf_counter() - started}}
+        if self.config.response_padding:
+            response["padding"] = "x" * self.config.response_padding
+        return response
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        stream = JsonStream()
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            while True:
+                data = await reader.read(8192)
+                if not data:
+                    break
+                for command in stream.feed(data):
+                    if command.get("type") == "hello":
+                        params = command.get("params", {})
+                        codec = self._choose_codec(params)
+                        compression = self._choose_compression(params)
+                        writer.write(stream.encode({"status": "success",
+                                                    "result": {"codec": codec, "compression": compression,
+                                                               "credits": self.config.credits}}))
+                        stream = make_stream(codec, compression, params.get("compress_threshold", COMPRESS_THRESHOLD))
+                        continue
+                    if not await self._respond(command, writer, stream):
+                        return
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(task)
+            writer.close()
+
+    def _choose_codec(self, params: Dict[str, Any]) -> str:
+        for codec in params.get("codecs", ["json"]):
+            if codec == "json" or (codec in self.config.codecs
+                                   and (MSGPACK_NATIVE or not params.get("native_only"))):
+                return codec
+        return "json"
+
+    def _choose_compression(self, params: Dict[str, Any]) -> Optional[str]:
+        for name in params.get("compression", []):
+            if name in self.config.compression and name in COMPRESSORS:
+                return name
+        return None
+
+    async def _respond(self, command: Dict[str, Any], writer: asyncio.StreamWriter, stream: Any) -> bool:
+        cfg = self.config
+        delay = cfg.latency + (self._random.uniform(0, cfg.jitter) if cfg.jitter else 0.0)
+        if delay:
+            await self._busy(delay, command, writer, stream)
+        self.commands_handled += 1
+        roll = self._random.random()
+        if roll < cfg.drop_rate:
+            logger.debug(f"Dropping connection on {command.get('type')}")
+            return False
+        roll -= cfg.drop_rate
+        if roll < cfg.hang_rate:
+            logger.debug(f"Hanging on {command.get('type')}")
+            return True
+        roll -= cfg.hang_rate
+        if roll < cfg.error_rate:
+            response = {"status": "error", "message": "Injected failure"}
+        else:
+            response = self.execute_command(command)
+        if "id" in command:
+            response["id"] = command["id"]
+        writer.write(stream.encode(response))
+        await writer.drain()
+        return True
+
+    async def _busy(self, delay: float, command: Dict[str, Any], writer: asyncio.StreamWriter,
+                    stream: Any) -> None:
+        """Simulate a command running for ``delay``, with heartbeats if the client asked."""
+        interval = command.get("heartbeat") or delay
+        elapsed = 0.0
+        while delay - elapsed > interval:
+            await asyncio.sleep(interval)
+            elapsed += interval
+            writer.write(stream.encode({"status": "heartbeat", "command": command.get("type", ""),
+                                        "elapsed": round(elapsed, 3)}))
+        await asyncio.sleep(delay - elapsed)
+
+    async def serve(self) -> None:
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = await asyncio.start_unix_server(self._handle_client, self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+            logger.info(f"Blender simulator listening on {self.socket_path}")
+            return
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Blender simulator listening on {self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        await self.serve()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> "BlenderSimulator":
+        """Serve from a background thread; returns once the port is bound."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.serve())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="blender-simulator", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        loop = self._loop
+
+        async def shutdown():
+            self._server.close()
+            for task in list(self._clients):
+                task.cancel()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self._server.wait_closed()
+            loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._loop = None
+        self._thread = None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the Blender simulator."""
+    parser = argparse.ArgumentParser(description="Stand-in Blender addon for load testing")
+    parser.add_argument("--host", type=str, default="localhost",
+                        help="Host for the simulator to listen on")
+    parser.add_argument("--port", type=int, default=9876,
+                        help="Port for the simulator to listen on")
+    parser.add_argument("--socket-path", type=str, default=None,
+                        help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Latency added to every command in milliseconds")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="Extra random latency per command in milliseconds")
+    parser.add_argument("--response-padding", type=int, default=0,
+                        help="Bytes of filler added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of commands answered with an error")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Fraction of commands that drop the connection")
+    parser.add_argument("--hang-rate", type=float, default=0.0,
+                        help="Fraction of commands that never get a response")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed for jitter and failure injection")
+    parser.add_argument("--json-only", action="store_true",
+                        help="Refuse binary codecs, like an older addon")
+    parser.add_argument("--no-compression", action="store_true",
+                        help="Refuse frame compression")
+    parser.add_argument("--credits", type=int, default=8,
+                        help="Commands each connection may have outstanding")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = SimulatorConfig(
+        latency=args.latency_ms / 1000.0,
+        jitter=args.jitter_ms / 1000.0,
+        response_padding=args.response_padding,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        hang_rate=args.hang_rate,
+        seed=args.seed,
+        codecs=("json",) if args.json_only else ("json", "msgpack"),
+        compression=() if args.no_compression else ("zlib", "zstd"),
+        credits=args.credits,
+    )
+    simulator = BlenderSimulator(args.host, args.port, config, socket_path=args.socket_path)
+    try:
+        asyncio.run(simulator.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Per-command timeouts that adapt to observed Blender latency.
+
+Each command type has a budget: the longest the server will wait for it in
+total, which is also sent to the addon as the command's deadline. Within
+that, the idle timeout (how long to wait without hearing anything back)
+tracks a multiple of the command's recent p99 latency, so cheap reads fail
+fast against a wedged Blender. Heartbeats from the addon restart the idle
+timer, but Blender operators that hold the GIL (renders, imports, arbitrary
+code) pause them, so those commands always get their whole budget.
+"""
+import threading
+from collections import deque
+from typing import Collection, Deque, Dict, Optional
+
+# Seconds; commands not listed get DEFAULT_BUDGET.
+DEFAULT_BUDGETS: Dict[str, float] = {
+    "get_polyhaven_status": 5.0,
+    "get_scene_info": 10.0,
+    "get_object_info": 10.0,
+    "get_objects_info": 30.0,
+    "get_properties": 30.0,
+    "set_properties": 30.0,
+    "query_nearest": 10.0,
+    "query_radius": 10.0,
+    "query_bbox": 10.0,
+    "render_scene": 600.0,
+    "download_polyhaven_asset": 300.0,
+    "search_polyhaven_assets": 60.0,
+    "get_polyhaven_categories": 60.0,
+    "set_texture": 120.0,
+    "instance_objects": 120.0,
+    "execute_code": 120.0,
+}
+DEFAULT_BUDGET = 15.0
+
+# Commands that can block Blender's main thread for longer than any recent
+# sample; their idle timeout stays at the full budget.
+BLOCKING_COMMANDS = frozenset({
+    "render_scene",
+    "download_polyhaven_asset",
+    "execute_code",
+})
+
+
+def parse_budgets(spec: str) -> Dict[str, float]:
+    """Parse ``"render_scene=900,get_scene_info=5"`` into command budgets."""
+    budgets: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        try:
+            budgets[name.strip()] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid timeout setting: {item!r} (expected COMMAND=SECONDS)")
+    return budgets
+
+
+class AdaptiveTimeouts:
+    """Budgets per command type and idle timeouts derived from recent latencies."""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None,
+                 default_budget: float = DEFAULT_BUDGET, floor: float = 2.0,
+                 factor: float = 4.0, window: int = 200, min_samples: int = 20,
+                 blocking: Collection[str] = BLOCKING_COMMANDS):
+        self.budgets = dict(DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.default_budget = default_budget
+        self.floor = floor
+        self.factor = factor
+        self.window = window
+        self.min_samples = min_samples
+        self.blocking = frozenset(blocking)
+        self._samples: Dict[str, Deque[float]] = {}
+        # Observations per command type; the window stops growing once full.
+        self._counts: Dict[str, int] = {}
+        self._idle: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def budget(self, command_type: str) -> float:
+        return self.budgets.get(command_type, self.default_budget)
+
+    def idle_timeout(self, command_type: str) -> float:
+        """``factor`` x recent p99, kept within ``[floor, budget]``; the budget until warmed up.
+
+        Blocking commands always get the budget.
+        """
+        if command_type in self.blocking:
+            return self.budget(command_type)
+        return self._idle.get(command_type) or self.budget(command_type)
+
+    def observe(self, command_type: str, seconds: float) -> None:
+        if command_type in self.blocking:
+            return
+        with self._lock:
+            samples = self._samples.get(command_type)
+            if samples is None:
+                samples = self._samples[command_type] = deque(maxlen=self.window)
+            samples.append(seconds)
+            count = self._counts[command_type] = self._counts.get(command_type, 0) + 1
+            # Re-derive the percentile every few samples rather than on every command.
+            if len(samples) < self.min_samples or count % 10:
+                return
+            ordered = sorted(samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        budget = self.budget(command_type)
+        self._idle[command_type] = min(budget, max(self.floor, p99 * self.factor))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            names = sorted(set(self._samples) | set(self.budgets))
+        return {name: {"budget": self.budget(name), "idle_timeout": self.idle_timeout(name)}
+                for name in names}
+
+
+TIMEOUTS = AdaptiveTimeouts()
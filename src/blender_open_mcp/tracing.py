@@ -0,0 +1,202 @@
+"""Request tracing across the MCP server, the Blender addon and Ollama.
+
+Tool calls open a root span; ``send_command`` and ``query_ollama`` add
+child spans and forward the trace context to the addon, which reports its
+own spans back in the response. Finished traces are appended to a file as
+OpenTelemetry (OTLP/JSON) ``ExportTraceServiceRequest`` documents, one per
+line. Tracing is off, and nearly free, until ``configure_tracing`` is called.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("BlenderMCPServer.Tracing")
+
+SERVICE_NAME = "blender-open-mcp"
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("mcp_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 kind: int = KIND_INTERNAL, start_ns: Optional[int] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+    def context(self) -> Dict[str, str]:
+        """Trace context forwarded to the addon with a command."""
+        return {"trace_id": self.trace_id, "span_id": self.span_id}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class FileSpanExporter:
+    """Appends finished traces to a file as OTLP/JSON lines."""
+
+    def __init__(self, path: str, max_buffer: int = 512):
+        self.path = path
+        self.max_buffer = max_buffer
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            # Flush whole traces: when a root span ends, or the buffer gets large.
+            if span.parent_id is None or len(self._buffer) >= self.max_buffer:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        spans, self._buffer = self._buffer, []
+        document = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(document) + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write trace file {self.path}: {e!s}")
+
+
+class Tracer:
+    def __init__(self):
+        self.exporter: Optional[FileSpanExporter] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Run a block as a child of the current span (or a new trace)."""
+        if self.exporter is None:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(name, parent.trace_id if parent else os.urandom(16).hex(),
+                    parent.span_id if parent else None, kind, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            self.finish(span)
+
+    def record(self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None,
+               kind: int = KIND_INTERNAL, **attributes: Any) -> Optional[Span]:
+        """Record an already-finished span, e.g. a measured phase or a remote addon span."""
+        parent = parent or _current_span.get()
+        if self.exporter is None or parent is None:
+            return None
+        span = Span(name, parent.trace_id, parent.span_id, kind, start_ns, attributes)
+        self.finish(span, end_ns)
+        return span
+
+    def finish(self, span: Span, end_ns: Optional[int] = None) -> None:
+        span.end_ns = end_ns if end_ns is not None else time.time_ns()
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+TRACER = Tracer()
+
+
+def configure_tracing(path: Optional[str]) -> None:
+    """Enable span export to ``path`` (or disable tracing with ``None``)."""
+    if TRACER.exporter is not None:
+        TRACER.exporter.flush()
+    TRACER.exporter = FileSpanExporter(path) if path else None
+    if path:
+        logger.info(f"Writing traces to {path}")
+
+
+def traced(fn: Callable) -> Callable:
+    """Wrap an MCP tool or prompt in a root span named after it."""
+    name = f"tool.{fn.__name__}"
+
+    def _check(span: Optional[Span], result: Any) -> None:
+        # Tools report failures as "Error: ..." strings rather than raising.
+        if span is not None and isinstance(result, str) and result.startswith("Error"):
+            span.set_error(result[:200])
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with TRACER.span(name, KIND_SERVER) as span:
+                result = await fn(*args, **kwargs)
+                _check(span, result)
+                return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with TRACER.span(name, KIND_SERVER) as span:
+            result = fn(*args, **kwargs)
+            _check(span, result)
+            return result
+    return wrapper